@@ -1,7 +1,7 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_sync_db as get_db
 from app.core.security import verify_token
 from app.crud.user import get_user_by_email
 from app.models.user import User, UserRole
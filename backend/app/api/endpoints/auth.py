@@ -1,37 +1,60 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
-from app.database import get_db
+from starlette.concurrency import run_in_threadpool
+from app.database import get_db, run_db, login_shards, resolve_tenant_placement, shard_session
 from app.schemas.auth import LoginRequest, Token
-from app.core.security import verify_password, create_access_token
-from app.crud.user import get_user_by_email
+from app.core.security import verify_and_update_password, create_access_token
+from app.core.auth import require_member_or_admin
+from app.core.cache import recent_writers
+from app.crud.backend import user as crud_user
 from app.core.exceptions import InvalidCredentials
+from app.core.log import get_logger
 
 router = APIRouter()
+logger = get_logger(__name__)
+
+async def _login_candidates(login_data: LoginRequest) -> list:
+    """
+    (user, shard) pairs matching the login. The user's shard is unknown (any
+    bearer token sent along may be another account's), so every shard, or
+    the tenant_slug's, is searched with a session of its own. Rows on a
+    shard their tenant has moved away from are skipped: until the source is
+    cleaned up they are stale copies, with an outdated token_version.
+    """
+    candidates = []
+    for shard in await run_in_threadpool(login_shards, login_data.tenant_slug):
+        async with shard_session(shard) as shard_db:
+            users = await run_db(
+                crud_user.get_login_candidates,
+                shard_db,
+                email=login_data.email,
+                tenant_slug=login_data.tenant_slug
+            )
+        for user in users:
+            if (await resolve_tenant_placement(user.tenant_id)).shard is shard:
+                candidates.append((user, shard))
+    return candidates
 
 @router.post("/login", response_model=Token)
-async def login(
-    login_data: LoginRequest,
-    db: Session = Depends(get_db)
-):
-    user = None
-    
-    # Try to find user in both tenants (Acme=1, Globex=2)
-    for tenant_id in [1, 2]:
-        user = get_user_by_email(db, email=login_data.email, tenant_id=tenant_id)
-        if user:
-            print(f"Found user: {user.email}, Role: {user.role}, Tenant: {tenant_id}")
-            break
+async def login(login_data: LoginRequest):
+    candidates = await _login_candidates(login_data)
     
-    if not user:
-        print(f"User not found: {login_data.email}")
+    if not candidates:
+        logger.info("login failed", extra={"reason": "unknown_email"})
         raise InvalidCredentials()
     
-    # Verify password
-    password_valid = verify_password(login_data.password, user.password_hash)
-    print(f"Password verification for {user.email}: {password_valid}")
+    # Verify password; an email registered in several tenants logs into the
+    # first account whose password matches (use tenant_slug to disambiguate)
+    user = None
+    new_hash = None
+    for candidate, shard in candidates:
+        password_valid, new_hash = await verify_and_update_password(login_data.password, candidate.password_hash)
+        if password_valid:
+            user = candidate
+            break
     
-    if not password_valid:
-        print(f"Invalid password for user: {user.email}")
+    if user is None:
+        logger.info("login failed", extra={"reason": "bad_password", "candidates": len(candidates)})
         raise InvalidCredentials()
     
     # Create access token
@@ -40,13 +63,31 @@ async def login(
             "sub": user.email,
             "user_id": user.id,
             "tenant_id": user.tenant_id,
-            "role": user.role.value
+            "role": user.role.value,
+            "ver": user.token_version
         }
     )
     
-    print(f"Login successful for: {user.email}, Role: {user.role.value}")
+    logger.debug("login succeeded", extra={"user_id": user.id, "tenant_id": user.tenant_id})
+    # A new account or token version may not have replicated yet: the
+    # first requests with this token read from the primary
+    await recent_writers.amark((user.tenant_id, user.id))
+    
+    # Transparently upgrade hashes created with a different bcrypt cost
+    if new_hash:
+        async with shard_session(shard) as user_db:
+            await run_db(crud_user.update_password_hash, user_db, user.id, user.tenant_id, new_hash)
     
     return {
         "access_token": access_token,
         "token_type": "bearer"
-    }
\ No newline at end of file
+    }
+
+@router.post("/revoke", status_code=status.HTTP_204_NO_CONTENT)
+async def revoke_tokens(
+    db: Session = Depends(get_db),
+    current_user = Depends(require_member_or_admin)
+):
+    """Sign out everywhere: invalidate every token issued to the current user"""
+    await run_db(crud_user.revoke_tokens, db, current_user.id, current_user.tenant_id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -1,7 +1,49 @@
 from fastapi import APIRouter
+from app.core.cache import principal_cache, token_cache
+from app.core.note_cache import note_cache
+from app.core.rate_limit import rate_limiter
+from app.core.security import password_hash_pool
+from app.core.startup import startup_report
+from app.database import get_pool_stats, get_shard_stats, read_replicas
 
 router = APIRouter()
 
 @router.get("/health")
 async def health_check():
-    return {"status": "ok"}
\ No newline at end of file
+    return {"status": "ok"}
+
+@router.get("/health/startup")
+async def startup_stats():
+    return startup_report.as_dict()
+
+@router.get("/health/principal-cache")
+async def principal_cache_stats():
+    return principal_cache.stats()
+
+@router.get("/health/token-cache")
+async def token_cache_stats():
+    return token_cache.stats()
+
+@router.get("/health/note-cache")
+async def note_cache_stats():
+    return note_cache.stats()
+
+@router.get("/health/rate-limit")
+async def rate_limit_stats():
+    return rate_limiter.stats()
+
+@router.get("/health/db-pool")
+async def db_pool_stats():
+    return get_pool_stats()
+
+@router.get("/health/db-replicas")
+async def db_replica_stats():
+    return read_replicas.stats()
+
+@router.get("/health/shards")
+async def shard_stats():
+    return get_shard_stats()
+
+@router.get("/health/password-hasher")
+async def password_hasher_stats():
+    return password_hash_pool.stats()
\ No newline at end of file
@@ -1,14 +1,41 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, File, Header, HTTPException, Query, Request, Response, UploadFile, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
-from app.schemas.note import Note, NoteCreate, NoteUpdate
-from app.crud import note as crud_note, tenant as crud_tenant
+from typing import List, Literal, Optional
+from app.database import get_db, run_db, reads_own_writes
+from app.schemas.note import (
+    Note,
+    NoteCreate,
+    NoteUpdate,
+    NoteListItem,
+    NoteSearchResult,
+    NoteBulkCreate,
+    NoteBulkUpdate,
+    NoteBulkDelete,
+    NoteBulkItemResult,
+    NoteBulkResponse,
+    NoteImportJob,
+    NOTE_LIST_FIELDS,
+    NOTE_SUMMARY_FIELDS,
+)
+from app.config import NOTE_PREVIEW_LENGTH
+from app.crud.backend import note as crud_note, tenant as crud_tenant
 from app.core.auth import require_member_or_admin
-from app.core.exceptions import NoteNotFound, NoteLimitReached
-from app.models.tenant import SubscriptionPlan
+from app.core.exceptions import NoteNotFound, NoteLimitReached, ImportJobNotFound, InvalidNoteFields
+from app.core.http_cache import (
+    collection_etag,
+    note_etag,
+    has_validators,
+    is_not_modified,
+    not_modified,
+    set_validators,
+)
+from app.core.note_cache import note_cache
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.utils.export import export_notes, MEDIA_TYPES
+from app.utils.imports import create_import_job, get_import_job, run_import_job, spool_upload
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 
 @router.post("/notes", response_model=Note)
 async def create_note(
@@ -16,78 +43,327 @@ async def create_note(
     db: Session = Depends(get_db),
     current_user = Depends(require_member_or_admin)
 ):
-    # Check subscription limits
-    tenant = crud_tenant.get_tenant_by_id(db, current_user.tenant_id)
-    if tenant.subscription_plan == SubscriptionPlan.FREE:
-        note_count = crud_note.count_notes_by_tenant(db, current_user.tenant_id)
-        if note_count >= 3:
-            raise NoteLimitReached()
-    
-    note = crud_note.create_note(
+    # The subscription limit is enforced atomically while inserting
+    note = await run_db(
+        crud_note.create_note,
         db=db,
         note=note_data,
         user_id=current_user.id,
         tenant_id=current_user.tenant_id
     )
+    if note is None:
+        raise NoteLimitReached()
     return note
 
-@router.get("/notes", response_model=List[Note])
+@router.post("/notes/bulk", response_model=NoteBulkResponse)
+async def create_notes_bulk(
+    bulk_data: NoteBulkCreate,
+    db: Session = Depends(get_db),
+    current_user = Depends(require_member_or_admin)
+):
+    """Create many notes in one transaction; the plan limit applies to the whole batch"""
+    notes = await run_db(
+        crud_note.create_notes_bulk,
+        db=db,
+        notes=bulk_data.notes,
+        user_id=current_user.id,
+        tenant_id=current_user.tenant_id
+    )
+    if notes is None:
+        raise NoteLimitReached()
+    return NoteBulkResponse(results=[
+        NoteBulkItemResult(index=index, id=note.id, status="created", note=note)
+        for index, note in enumerate(notes)
+    ])
+
+@router.put("/notes/bulk", response_model=NoteBulkResponse)
+async def update_notes_bulk(
+    bulk_data: NoteBulkUpdate,
+    db: Session = Depends(get_db),
+    current_user = Depends(require_member_or_admin)
+):
+    """Apply many partial updates in one transaction"""
+    notes = await run_db(
+        crud_note.update_notes_bulk,
+        db=db,
+        updates=bulk_data.notes,
+        tenant_id=current_user.tenant_id
+    )
+    return NoteBulkResponse(results=[
+        NoteBulkItemResult(index=index, id=item.id, status="updated", note=note)
+        if note is not None
+        else NoteBulkItemResult(index=index, id=item.id, status="not_found")
+        for index, (item, note) in enumerate(zip(bulk_data.notes, notes))
+    ])
+
+@router.post("/notes/bulk/delete", response_model=NoteBulkResponse)
+async def delete_notes_bulk(
+    bulk_data: NoteBulkDelete,
+    db: Session = Depends(get_db),
+    current_user = Depends(require_member_or_admin)
+):
+    """Delete many notes with a single statement"""
+    deleted = await run_db(
+        crud_note.delete_notes_bulk,
+        db=db,
+        note_ids=bulk_data.ids,
+        tenant_id=current_user.tenant_id
+    )
+    return NoteBulkResponse(results=[
+        NoteBulkItemResult(index=index, id=note_id, status="deleted" if note_id in deleted else "not_found")
+        for index, note_id in enumerate(bulk_data.ids)
+    ])
+
+def _selected_fields(fields: Optional[str], view: str) -> Optional[List[str]]:
+    """Fields to select for a sparse list, or None for full notes"""
+    if fields is None:
+        return list(NOTE_SUMMARY_FIELDS) if view == "summary" else None
+    selected = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in selected if field not in NOTE_LIST_FIELDS]
+    if unknown:
+        raise InvalidNoteFields(", ".join(unknown))
+    # id is always returned: the next-page cursor is built from it
+    return ["id"] + [field for field in dict.fromkeys(selected) if field != "id"]
+
+@router.get("/notes", response_model=List[NoteListItem], response_model_exclude_unset=True)
 async def get_notes(
-    skip: int = 0,
-    limit: int = 100,
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,title,preview"),
+    view: Literal["full", "summary"] = "full",
+    preview_length: int = Query(NOTE_PREVIEW_LENGTH, ge=1, le=10000),
+    db: Session = Depends(get_db),
+    current_user = Depends(require_member_or_admin)
+):
+    """
+    List notes ordered by id. When more notes exist, the opaque cursor for
+    the next page is returned in the X-Next-Cursor and Link headers.
+    Pages carry an ETag; send it back in If-None-Match to get a 304 when
+    nothing in the tenant's notes changed.
+    
+    view=summary (id, title, preview, timestamps) or fields=... select only
+    those columns; preview is the first preview_length characters of content,
+    cut by the database.
+    """
+    after_id = decode_cursor(cursor)
+    selected = _selected_fields(fields, view)
+    if "if-none-match" in request.headers:
+        # Revalidation costs one indexed read: answer 304 before any page is
+        # loaded or cached
+        notes_version = await run_db(crud_tenant.get_notes_version, db, tenant_id=current_user.tenant_id)
+        etag = collection_etag(current_user.tenant_id, notes_version, request.url.query)
+        if is_not_modified(request, etag):
+            return not_modified(etag)
+    
+    async def load_page():
+        # Read the version before the notes: a write landing in between leaves an
+        # ETag older than the page, which costs the client one extra refetch at most
+        notes_version = await run_db(crud_tenant.get_notes_version, db, tenant_id=current_user.tenant_id)
+        if selected is None:
+            notes = await run_db(
+                crud_note.get_notes_by_tenant,
+                db=db,
+                tenant_id=current_user.tenant_id,
+                skip=skip,
+                limit=limit + 1,
+                after_id=after_id
+            )
+            items = [Note.model_validate(note).model_dump(mode="json") for note in notes]
+        else:
+            rows = await run_db(
+                crud_note.get_note_fields_by_tenant,
+                db=db,
+                tenant_id=current_user.tenant_id,
+                fields=selected,
+                skip=skip,
+                limit=limit + 1,
+                after_id=after_id,
+                preview_length=preview_length
+            )
+            items = [NoteListItem(**row).model_dump(mode="json", exclude_unset=True) for row in rows]
+        return {"notes_version": notes_version, "notes": items}
+    
+    shape = "full" if selected is None else ",".join(selected)
+    if selected is not None and "preview" in selected:
+        shape += f"&preview={preview_length}"
+    if reads_own_writes(db):
+        # Pages cached from a replica may predate this caller's own recent write
+        page = await load_page()
+    else:
+        page = await note_cache.get_list(
+            current_user.tenant_id,
+            f"after={after_id}&skip={skip}&limit={limit}&fields={shape}",
+            load_page
+        )
+    etag = collection_etag(current_user.tenant_id, page["notes_version"], request.url.query)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    
+    notes = page["notes"]
+    if len(notes) > limit:
+        notes = notes[:limit]
+        next_cursor = encode_cursor(notes[-1]["id"])
+        next_url = request.url.remove_query_params("skip").include_query_params(cursor=next_cursor)
+        response.headers["X-Next-Cursor"] = next_cursor
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
+    set_validators(response, etag)
+    return notes
+
+@router.get("/notes/export")
+async def export_tenant_notes(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    gzip: bool = False,
+    after_id: Optional[int] = Query(None, ge=0),
+    current_user = Depends(require_member_or_admin)
+):
+    """
+    Stream every note in the tenant, ordered by id, in constant memory.
+    Resume an interrupted export with after_id set to the last id received.
+    """
+    filename = f"notes.{format}"
+    media_type = MEDIA_TYPES[format]
+    if gzip:
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        export_notes(current_user.tenant_id, format, after_id=after_id, gzip=gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.post("/notes/import", response_model=NoteImportJob, status_code=status.HTTP_202_ACCEPTED)
+async def import_notes(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    format: Optional[Literal["ndjson", "csv"]] = None,
+    current_user = Depends(require_member_or_admin)
+):
+    """
+    Upload an NDJSON or CSV file (title, content) and import it in the
+    background. Poll GET /notes/import/{job_id} for progress.
+    """
+    if format is None:
+        is_csv = (file.filename or "").lower().endswith(".csv") or file.content_type == "text/csv"
+        format = "csv" if is_csv else "ndjson"
+    path = await spool_upload(file, suffix=f".{format}")
+    job = create_import_job(current_user.tenant_id, current_user.id, format)
+    background_tasks.add_task(run_import_job, job, path)
+    return job
+
+@router.get("/notes/import/{job_id}", response_model=NoteImportJob)
+async def get_import_status(
+    job_id: str,
+    current_user = Depends(require_member_or_admin)
+):
+    job = get_import_job(job_id, current_user.tenant_id)
+    if job is None:
+        raise ImportJobNotFound()
+    return job
+
+@router.get("/notes/search", response_model=List[NoteSearchResult])
+async def search_notes(
+    q: str = Query(..., min_length=1, max_length=256),
+    limit: int = Query(20, ge=1, le=100),
     db: Session = Depends(get_db),
     current_user = Depends(require_member_or_admin)
 ):
-    notes = crud_note.get_notes_by_tenant(
+    """Full-text search over note title and content, best matches first"""
+    hits = await run_db(
+        crud_note.search_notes,
         db=db,
         tenant_id=current_user.tenant_id,
-        skip=skip,
+        q=q,
         limit=limit
     )
-    return notes
+    return [
+        NoteSearchResult(**Note.model_validate(note).model_dump(), rank=rank, snippet=snippet)
+        for note, rank, snippet in hits
+    ]
 
 @router.get("/notes/{note_id}", response_model=Note)
 async def get_note(
     note_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user = Depends(require_member_or_admin)
 ):
-    note = crud_note.get_note_by_id(
-        db=db,
-        note_id=note_id,
-        tenant_id=current_user.tenant_id
-    )
-    if not note:
-        raise NoteNotFound()
+    """Supports If-None-Match / If-Modified-Since, answered without loading the note body"""
+    # Skip the cache while the caller's own write may not have reached the replicas
+    fresh = reads_own_writes(db)
+    cached = None if fresh else await note_cache.peek_note(current_user.tenant_id, note_id)
+    if cached is None and has_validators(request):
+        validator = await run_db(
+            crud_note.get_note_validator,
+            db=db,
+            note_id=note_id,
+            tenant_id=current_user.tenant_id
+        )
+        if validator is None:
+            raise NoteNotFound()
+        etag = note_etag(validator.id, validator.updated_at)
+        if is_not_modified(request, etag, validator.updated_at):
+            return not_modified(etag, validator.updated_at)
+    
+    async def load_note():
+        note = await run_db(
+            crud_note.get_note_by_id,
+            db=db,
+            note_id=note_id,
+            tenant_id=current_user.tenant_id
+        )
+        return None if note is None else Note.model_validate(note).model_dump(mode="json")
+    
+    if cached is None:
+        cached = await (load_note() if fresh else note_cache.get_note(current_user.tenant_id, note_id, load_note))
+        if cached is None:
+            raise NoteNotFound()
+    note = Note.model_validate(cached)
+    etag = note_etag(note.id, note.updated_at)
+    if is_not_modified(request, etag, note.updated_at):
+        return not_modified(etag, note.updated_at)
+    set_validators(response, etag, note.updated_at)
     return note
 
 @router.put("/notes/{note_id}", response_model=Note)
 async def update_note(
     note_id: int,
     note_data: NoteUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user = Depends(require_member_or_admin)
 ):
-    note = crud_note.update_note(
+    """With If-Match, the update only applies if the note still has that ETag (412 otherwise)"""
+    note = await run_db(
+        crud_note.update_note,
         db=db,
         note_id=note_id,
         tenant_id=current_user.tenant_id,
-        note_update=note_data
+        note_update=note_data,
+        if_match=if_match
     )
     if not note:
         raise NoteNotFound()
+    set_validators(response, note_etag(note.id, note.updated_at), note.updated_at)
     return note
 
 @router.delete("/notes/{note_id}")
 async def delete_note(
     note_id: int,
+    if_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user = Depends(require_member_or_admin)
 ):
-    success = crud_note.delete_note(
+    success = await run_db(
+        crud_note.delete_note,
         db=db,
         note_id=note_id,
-        tenant_id=current_user.tenant_id
+        tenant_id=current_user.tenant_id,
+        if_match=if_match
     )
     if not success:
         raise NoteNotFound()
@@ -1,8 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_db, run_db
 from app.schemas.tenant import UpgradeResponse
-from app.crud import tenant as crud_tenant
+from app.crud.backend import tenant as crud_tenant
 from app.core.auth import require_admin
 from app.core.exceptions import TenantNotFound
 
@@ -15,7 +15,7 @@ async def upgrade_tenant(
     current_user = Depends(require_admin)
 ):
     # Get tenant by slug
-    tenant = crud_tenant.get_tenant_by_slug(db, slug)
+    tenant = await run_db(crud_tenant.get_tenant_by_slug, db, slug)
     if not tenant:
         raise TenantNotFound()
     
@@ -27,7 +27,7 @@ async def upgrade_tenant(
         )
     
     # Upgrade the tenant
-    upgraded_tenant = crud_tenant.upgrade_tenant_subscription(db, tenant.id)
+    upgraded_tenant = await run_db(crud_tenant.upgrade_tenant_subscription, db, tenant.id)
     if not upgraded_tenant:
         raise TenantNotFound()
     
@@ -1,11 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_db, run_db
 from app.schemas.user import User, UserCreate
-from app.crud import user as crud_user
-from app.core.auth import require_admin, require_member_or_admin
+from app.crud.backend import user as crud_user
+from app.core.security import hash_password_async
+from app.core.auth import require_admin, get_current_user as get_authenticated_user
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 
 @router.post("/users", response_model=User)
 async def create_user(
@@ -18,8 +20,8 @@ async def create_user(
     user_data.tenant_id = current_user.tenant_id
     
     # Check if user already exists
-    existing_user = crud_user.get_user_by_email(
-        db, email=user_data.email, tenant_id=current_user.tenant_id
+    existing_user = await run_db(
+        crud_user.get_user_by_email, db, email=user_data.email, tenant_id=current_user.tenant_id
     )
     if existing_user:
         raise HTTPException(
@@ -27,12 +29,13 @@ async def create_user(
             detail="Email already registered in this tenant"
         )
     
-    user = crud_user.create_user(db=db, user=user_data)
+    password_hash = await hash_password_async(user_data.password)
+    user = await run_db(crud_user.create_user, db=db, user=user_data, password_hash=password_hash)
     return user
 
 @router.get("/users/me", response_model=User)
 async def get_current_user(
-    current_user = Depends(require_member_or_admin)
+    current_user = Depends(get_authenticated_user)
 ):
-    """Get current user profile"""
+    """Get current user profile (loads the user row; token claims lack timestamps)"""
     return current_user
\ No newline at end of file
@@ -1,3 +1,4 @@
+import json
 import os
 from dotenv import load_dotenv
 
@@ -5,11 +6,114 @@ load_dotenv()
 
 # Database
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./test.db")
+# Serve requests through AsyncSession (asyncpg / aiosqlite) instead of the sync Session
+DATABASE_ASYNC = os.getenv("DATABASE_ASYNC", "False").lower() == "true"
+# Extra databases tenants can be placed on, as JSON {"name": "url"}; DATABASE_URL is shard "default".
+# Append new shards at the end: a shard's position fixes its PostgreSQL id block
+DATABASE_SHARDS = json.loads(os.getenv("DATABASE_SHARDS", "{}"))
+# How long a process caches a tenant's shard; tenant moves wait this long before cutting over
+SHARD_MAP_TTL_SECONDS = float(os.getenv("SHARD_MAP_TTL_SECONDS", "5"))
+# Ids on the PostgreSQL shard at position N start at N * SHARD_ID_BLOCK, so moved rows keep unique ids
+SHARD_ID_BLOCK = int(os.getenv("SHARD_ID_BLOCK", "100000000"))
+# Comma-separated read replica URLs; GET requests read from one of them
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+# How a replica is picked per request: round_robin or least_connections
+DATABASE_REPLICA_POLICY = os.getenv("DATABASE_REPLICA_POLICY", "round_robin").lower()
+# After a user's write commits, their reads stay on the primary this long (replication lag budget)
+DATABASE_READ_YOUR_WRITES_SECONDS = float(os.getenv("DATABASE_READ_YOUR_WRITES_SECONDS", "5"))
+# Where that window is kept: "memory" (per worker process) or "redis" (shared by every worker, via REDIS_URL)
+DATABASE_READ_YOUR_WRITES_BACKEND = os.getenv("DATABASE_READ_YOUR_WRITES_BACKEND", "memory").lower()
+
+# Connection pool
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "True").lower() == "true"
+
+# SQLite tuning
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
 
 # Security
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
+# Password hashing
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+
 # App settings
-DEBUG = os.getenv("DEBUG", "False").lower() == "true"
\ No newline at end of file
+DEBUG = os.getenv("DEBUG", "False").lower() == "true"
+# "production" turns off schema creation and seeding at boot
+ENVIRONMENT = os.getenv("ENVIRONMENT", "development").lower()
+# Create missing tables and columns at startup; in production run `alembic upgrade head` out of band instead
+DB_CREATE_ON_STARTUP = os.getenv("DB_CREATE_ON_STARTUP", str(ENVIRONMENT != "production")).lower() == "true"
+# Create the demo tenants and test accounts at startup
+SEED_ON_STARTUP = os.getenv("SEED_ON_STARTUP", str(ENVIRONMENT != "production")).lower() == "true"
+
+# Logging
+LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG" if DEBUG else "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+# Fraction of DEBUG/INFO records kept; warnings and errors are never sampled
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
+
+# Subscription limits
+FREE_PLAN_NOTE_LIMIT = int(os.getenv("FREE_PLAN_NOTE_LIMIT", "3"))
+
+# Bulk note operations
+NOTES_BULK_MAX_ITEMS = int(os.getenv("NOTES_BULK_MAX_ITEMS", "1000"))
+
+# Characters of content returned as "preview" by GET /notes?view=summary
+NOTE_PREVIEW_LENGTH = int(os.getenv("NOTE_PREVIEW_LENGTH", "200"))
+
+# Streaming export
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+# Streaming import
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "1000"))
+IMPORT_JOB_TTL_SECONDS = float(os.getenv("IMPORT_JOB_TTL_SECONDS", "86400"))
+
+# Response compression: encodings in server preference order (br/zstd need
+# the brotli and zstandard packages) and the smallest body worth compressing
+COMPRESSION_ENCODINGS = [
+    encoding.strip() for encoding in os.getenv("COMPRESSION_ENCODINGS", "zstd,br,gzip").split(",") if encoding.strip()
+]
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+
+# Principal cache
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+PRINCIPAL_CACHE_MAX_SIZE = int(os.getenv("PRINCIPAL_CACHE_MAX_SIZE", "10000"))
+# Upper bound on how long a revoked token keeps working on other workers
+TOKEN_VERSION_CACHE_TTL_SECONDS = float(os.getenv("TOKEN_VERSION_CACHE_TTL_SECONDS", "30"))
+
+# Note read cache: "memory" (per process), "redis" (shared, needs the redis package) or "none"
+NOTE_CACHE_BACKEND = os.getenv("NOTE_CACHE_BACKEND", "memory").lower()
+# With the memory backend this also bounds how stale other workers can be after a write
+NOTE_CACHE_TTL_SECONDS = float(os.getenv("NOTE_CACHE_TTL_SECONDS", "5"))
+NOTE_CACHE_MAX_SIZE = int(os.getenv("NOTE_CACHE_MAX_SIZE", "10000"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# Decoded-token cache; entries never outlive the token's own exp
+TOKEN_CACHE_TTL_SECONDS = float(os.getenv("TOKEN_CACHE_TTL_SECONDS", "900"))
+TOKEN_CACHE_MAX_SIZE = int(os.getenv("TOKEN_CACHE_MAX_SIZE", "10000"))
+
+# Rate limiting: token buckets per client IP, user and tenant. Backend is
+# "memory" (per process), "redis" (shared by all workers) or "none" (off)
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory").lower()
+RATE_LIMIT_MAX_BUCKETS = int(os.getenv("RATE_LIMIT_MAX_BUCKETS", "100000"))
+# Comma-separated reverse proxy addresses or CIDRs; requests they forward are limited
+# per client address from X-Forwarded-For instead of per proxy
+RATE_LIMIT_TRUSTED_PROXIES = [proxy.strip() for proxy in os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "").split(",") if proxy.strip()]
+# Limits read "<requests>/<second|minute|hour|day>"; the request count is also the burst size
+RATE_LIMIT_ANONYMOUS = os.getenv("RATE_LIMIT_ANONYMOUS", "120/minute")
+RATE_LIMIT_FREE_USER = os.getenv("RATE_LIMIT_FREE_USER", "300/minute")
+RATE_LIMIT_FREE_TENANT = os.getenv("RATE_LIMIT_FREE_TENANT", "600/minute")
+RATE_LIMIT_PRO_USER = os.getenv("RATE_LIMIT_PRO_USER", "1200/minute")
+RATE_LIMIT_PRO_TENANT = os.getenv("RATE_LIMIT_PRO_TENANT", "6000/minute")
+# Extra per-route buckets as JSON, merged over the defaults in app.core.rate_limit, e.g.
+# {"POST /notes/import": {"user": "5/minute"}, "GET /notes/search": {"user": {"free": "30/minute", "pro": "300/minute"}}}
+RATE_LIMIT_ROUTES = json.loads(os.getenv("RATE_LIMIT_ROUTES", "{}"))
@@ -1,15 +1,29 @@
-from .auth import get_current_user, require_admin, require_member_or_admin
-from .security import verify_password, get_password_hash, create_access_token, verify_token
-from .exceptions import (
-    TenantNotFound, 
-    UserNotFound, 
-    NoteNotFound, 
-    NoteLimitReached, 
-    InvalidCredentials
-)
+import importlib
 
-__all__ = [
-    "get_current_user", "require_admin", "require_member_or_admin",
-    "verify_password", "get_password_hash", "create_access_token", "verify_token",
-    "TenantNotFound", "UserNotFound", "NoteNotFound", "NoteLimitReached", "InvalidCredentials"
-]
\ No newline at end of file
+# Re-exports are resolved on first access (PEP 562), so importing a light
+# submodule such as app.core.log does not pull in auth, passlib and jose
+_EXPORTS = {
+    "get_current_user": ".auth",
+    "require_admin": ".auth",
+    "require_member_or_admin": ".auth",
+    "verify_password": ".security",
+    "get_password_hash": ".security",
+    "create_access_token": ".security",
+    "verify_token": ".security",
+    "TenantNotFound": ".exceptions",
+    "UserNotFound": ".exceptions",
+    "NoteNotFound": ".exceptions",
+    "NoteLimitReached": ".exceptions",
+    "InvalidCredentials": ".exceptions",
+    "InvalidCursor": ".exceptions",
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
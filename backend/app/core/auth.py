@@ -1,45 +1,143 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_db, run_db
 from app.core.security import verify_token
-from app.crud.user import get_user_by_email
+from app.core.cache import principal_cache, token_version_cache
+from app.crud.backend import user as crud_user
 from app.models.user import UserRole
+from app.schemas.auth import TokenData
+from dataclasses import dataclass
+from datetime import datetime
 from typing import Optional
 
 security = HTTPBearer()
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-):
+@dataclass(frozen=True)
+class CachedUser:
     """
-    Dependency to get current authenticated user
+    Detached snapshot of a verified user, safe to share across requests
     """
-    credentials_exception = HTTPException(
+    id: int
+    tenant_id: int
+    email: str
+    role: UserRole
+    token_version: int = 0
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    @classmethod
+    def from_user(cls, user) -> "CachedUser":
+        return cls(
+            id=user.id,
+            tenant_id=user.tenant_id,
+            email=user.email,
+            role=user.role,
+            token_version=user.token_version,
+            created_at=user.created_at,
+            updated_at=user.updated_at
+        )
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    Authenticated caller built from verified token claims, without a user row
+    """
+    id: int
+    tenant_id: int
+    email: str
+    role: UserRole
+
+_UNKNOWN = object()
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
+def _verified_token(credentials: Optional[HTTPAuthorizationCredentials]) -> TokenData:
     if not credentials:
-        raise credentials_exception
-    
+        raise _credentials_exception()
     token_data = verify_token(credentials.credentials)
     if token_data is None:
-        raise credentials_exception
+        raise _credentials_exception()
+    return token_data
+
+def _claimed_version(token_data: TokenData) -> int:
+    # Tokens issued before token versions existed carry no "ver" claim
+    return token_data.token_version or 0
+
+async def _current_token_version(db, tenant_id: int, user_id: int) -> Optional[int]:
+    cache_key = (tenant_id, user_id)
+    version = token_version_cache.get(cache_key, _UNKNOWN)
+    if version is _UNKNOWN:
+        version = await run_db(crud_user.get_token_version, db, user_id=user_id, tenant_id=tenant_id)
+        token_version_cache.set(cache_key, version)
+    return version
+
+async def _load_user(token_data: TokenData, db) -> CachedUser:
+    cache_key = (token_data.tenant_id, token_data.user_id)
+    cached = principal_cache.get(cache_key)
+    if cached is not None and cached.email == token_data.email:
+        principal = cached
+    else:
+        user = await run_db(
+            crud_user.get_user_by_email,
+            db, 
+            email=token_data.email, 
+            tenant_id=token_data.tenant_id
+        )
+        if user is None:
+            raise _credentials_exception()
+        principal = CachedUser.from_user(user)
+        principal_cache.set((principal.tenant_id, principal.id), principal)
+        token_version_cache.set((principal.tenant_id, principal.id), principal.token_version)
     
-    user = get_user_by_email(
-        db, 
-        email=token_data.email, 
-        tenant_id=token_data.tenant_id
-    )
-    if user is None:
-        raise credentials_exception
+    if _claimed_version(token_data) != principal.token_version:
+        raise _credentials_exception()
+    return principal
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """
+    Dependency to get current authenticated user, loaded from the database
+    """
+    return await _load_user(_verified_token(credentials), db)
+
+async def get_current_principal(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """
+    Dependency to get the authenticated principal from verified token claims.
+    Only the user's token version is checked (and cached), so a warm request
+    runs no auth queries; tokens without full claims fall back to get_current_user.
+    """
+    token_data = _verified_token(credentials)
+    if None in (token_data.user_id, token_data.tenant_id, token_data.role):
+        return await _load_user(token_data, db)
+    
+    try:
+        role = UserRole(token_data.role)
+    except ValueError:
+        raise _credentials_exception()
     
-    return user
+    version = await _current_token_version(db, token_data.tenant_id, token_data.user_id)
+    if version is None or version != _claimed_version(token_data):
+        raise _credentials_exception()
+    
+    return Principal(
+        id=token_data.user_id,
+        tenant_id=token_data.tenant_id,
+        email=token_data.email,
+        role=role
+    )
 
-def require_admin(current_user = Depends(get_current_user)):
+def require_admin(current_user = Depends(get_current_principal)):
     """
     Dependency to ensure current user is an admin
     """
@@ -50,7 +148,7 @@ def require_admin(current_user = Depends(get_current_user)):
         )
     return current_user
 
-def require_member_or_admin(current_user = Depends(get_current_user)):
+def require_member_or_admin(current_user = Depends(get_current_principal)):
     """
     Dependency to ensure current user is either a member or admin
     """
@@ -0,0 +1,264 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+from starlette.concurrency import run_in_threadpool
+from app.config import (
+    DATABASE_READ_YOUR_WRITES_BACKEND,
+    DATABASE_READ_YOUR_WRITES_SECONDS,
+    REDIS_URL,
+    SHARD_MAP_TTL_SECONDS,
+    PRINCIPAL_CACHE_TTL_SECONDS,
+    PRINCIPAL_CACHE_MAX_SIZE,
+    TOKEN_VERSION_CACHE_TTL_SECONDS,
+    TOKEN_CACHE_TTL_SECONDS,
+    TOKEN_CACHE_MAX_SIZE,
+)
+from app.core.log import get_logger
+
+logger = get_logger(__name__)
+
+_MISSING = object()
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with a per-entry time-to-live and a size bound
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            value, expires_at = entry
+            if expires_at <= now:
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        if self.maxsize <= 0:
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def pop_matching(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Remove every entry whose key matches the predicate"""
+        with self._lock:
+            keys = [key for key in self._data if predicate(key)]
+            for key in keys:
+                del self._data[key]
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+class MemoryBackend:
+    """
+    In-process cache backend. Values are stored as-is; counters never expire
+    so a namespace generation cannot fall back to an old value.
+    """
+    name = "memory"
+    blocking = False
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        return self._cache.get(key)
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self._cache.set(key, value, ttl)
+
+    def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._cache.pop(key)
+
+    def get_counter(self, key: str) -> int:
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            value = self._counters[key] = self._counters.get(key, 0) + 1
+            return value
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+class RedisBackend:
+    """
+    Shared cache backend over any client with redis-py's get/set/delete/incr
+    API. Values are stored as JSON.
+    """
+    name = "redis"
+    # Every call is a network round trip; NoteCache runs them in the threadpool
+    blocking = True
+
+    def __init__(self, client, prefix: str = "saas-notes:"):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisBackend":
+        try:
+            import redis
+        except ImportError as exc:
+            raise RuntimeError("The redis cache backend requires the redis package (pip install redis)") from exc
+        return cls(redis.Redis.from_url(url))
+
+    def get(self, key: str) -> Any:
+        raw = self.client.get(self.prefix + key)
+        return None if raw is None else json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self.client.set(self.prefix + key, json.dumps(value, default=str), ex=max(1, int(ttl)))
+
+    def delete(self, *keys: str) -> None:
+        if keys:
+            self.client.delete(*(self.prefix + key for key in keys))
+
+    def get_counter(self, key: str) -> int:
+        raw = self.client.get(self.prefix + key)
+        if raw is None:
+            # Seed from the clock so an evicted counter never restarts below
+            # a generation that may still have live entries
+            self.client.set(self.prefix + key, int(time.time() * 1000), nx=True)
+            raw = self.client.get(self.prefix + key)
+        return int(raw)
+
+    def incr(self, key: str) -> int:
+        self.get_counter(key)
+        return int(self.client.incr(self.prefix + key))
+
+    def stats(self) -> dict:
+        return {"prefix": self.prefix}
+
+class RecentWriters:
+    """
+    Users whose writes committed within the last ttl seconds, keyed by
+    (tenant_id, user_id); their reads skip the replicas. The memory backend
+    only knows the writes this worker process committed, the redis backend
+    shares the window between every worker.
+    """
+
+    def __init__(self, backend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self.errors = 0
+
+    @property
+    def blocking(self) -> bool:
+        return self.backend.blocking
+
+    @staticmethod
+    def _key(writer: Tuple[int, int]) -> str:
+        return f"recent-writer:{writer[0]}:{writer[1]}"
+
+    def mark(self, writer: Tuple[int, int]) -> None:
+        try:
+            self.backend.set(self._key(writer), True, self.ttl)
+        except Exception:
+            self.errors += 1
+            logger.warning("read-your-writes marker write failed", exc_info=True)
+
+    def is_recent(self, writer: Tuple[int, int]) -> bool:
+        try:
+            return bool(self.backend.get(self._key(writer)))
+        except Exception:
+            self.errors += 1
+            logger.warning("read-your-writes marker read failed", exc_info=True)
+            # Unknown: read from the primary rather than risk a stale replica
+            return True
+
+    async def amark(self, writer: Tuple[int, int]) -> None:
+        if self.blocking:
+            await run_in_threadpool(self.mark, writer)
+        else:
+            self.mark(writer)
+
+    async def ais_recent(self, writer: Tuple[int, int]) -> bool:
+        if self.blocking:
+            return await run_in_threadpool(self.is_recent, writer)
+        return self.is_recent(writer)
+
+    def stats(self) -> dict:
+        return {"backend": self.backend.name, "errors": self.errors, **self.backend.stats()}
+
+def create_recent_writers(kind: str) -> RecentWriters:
+    if kind == "memory":
+        backend = MemoryBackend(maxsize=PRINCIPAL_CACHE_MAX_SIZE, ttl=DATABASE_READ_YOUR_WRITES_SECONDS)
+    elif kind == "redis":
+        backend = RedisBackend.from_url(REDIS_URL)
+    else:
+        raise ValueError(f"Unknown DATABASE_READ_YOUR_WRITES_BACKEND: {kind}")
+    return RecentWriters(backend, ttl=DATABASE_READ_YOUR_WRITES_SECONDS)
+
+# Verified principals keyed by (tenant_id, user_id)
+principal_cache = TTLCache(maxsize=PRINCIPAL_CACHE_MAX_SIZE, ttl=PRINCIPAL_CACHE_TTL_SECONDS)
+
+# Current users.token_version keyed by (tenant_id, user_id); None for deleted users
+token_version_cache = TTLCache(maxsize=PRINCIPAL_CACHE_MAX_SIZE, ttl=TOKEN_VERSION_CACHE_TTL_SECONDS)
+
+# Verified TokenData keyed by the SHA-256 digest of the raw bearer token
+token_cache = TTLCache(maxsize=TOKEN_CACHE_MAX_SIZE, ttl=TOKEN_CACHE_TTL_SECONDS)
+
+# Tenant subscription plans keyed by tenant_id, for picking rate limits
+tenant_plan_cache = TTLCache(maxsize=PRINCIPAL_CACHE_MAX_SIZE, ttl=PRINCIPAL_CACHE_TTL_SECONDS)
+
+# Users whose writes committed recently; their reads skip the replicas
+recent_writers = create_recent_writers(DATABASE_READ_YOUR_WRITES_BACKEND)
+
+# Shard placements from the tenant_shards directory, keyed by tenant_id
+tenant_shard_cache = TTLCache(maxsize=PRINCIPAL_CACHE_MAX_SIZE, ttl=SHARD_MAP_TTL_SECONDS)
+
+def invalidate_principal(tenant_id: int, user_id: int) -> None:
+    """Drop a cached principal so role changes and deletions apply immediately"""
+    principal_cache.pop((tenant_id, user_id))
+    token_version_cache.pop((tenant_id, user_id))
+
+def invalidate_tenant_plan(tenant_id: int) -> None:
+    """Drop a cached plan so an upgrade gets its new limits immediately"""
+    tenant_plan_cache.pop(tenant_id)
@@ -0,0 +1,249 @@
+"""
+Negotiated response compression (zstd, brotli, gzip) as pure ASGI middleware.
+
+Bodies smaller than COMPRESSION_MIN_SIZE, responses that already carry a
+Content-Encoding and already-compressed media types (such as the gzipped
+note export) pass through untouched. Streaming responses are compressed chunk
+by chunk and flushed after every chunk, so clients still see progress.
+
+A compressed response's strong ETag gets the encoding appended ("abc" becomes
+"abc-gzip"), since strong validators must differ between representations;
+http_cache strips the suffix again when comparing request validators.
+
+brotli (or brotlicffi) and zstandard are optional: an encoding whose package
+is not installed is simply never negotiated.
+"""
+import zlib
+from typing import Dict, List, Optional, Sequence
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+ZSTD_LEVEL = 3
+# Larger bodies are compressed on the threadpool (all three codecs release
+# the GIL) instead of stalling the event loop
+OFFLOAD_SIZE = 64 * 1024
+
+# Media types that are compressed already; recompressing only burns CPU
+INCOMPRESSIBLE_TYPES = (
+    "application/gzip",
+    "application/zip",
+    "application/zstd",
+    "application/x-brotli",
+    "application/octet-stream",
+    "image/",
+    "audio/",
+    "video/",
+)
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+class _GzipCompressor:
+    def __init__(self):
+        self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+class _BrotliCompressor:
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+class _ZstdCompressor:
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+COMPRESSORS = {"gzip": _GzipCompressor}
+if brotli is not None:
+    COMPRESSORS["br"] = _BrotliCompressor
+if zstandard is not None:
+    COMPRESSORS["zstd"] = _ZstdCompressor
+
+# Every encoding an ETag may have been suffixed with, installed here or not
+_ETAG_SUFFIXES = tuple(f'-{encoding}"' for encoding in ("zstd", "br", "gzip"))
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """The ETag of etag's representation encoded with encoding; weak ETags cover every encoding"""
+    if etag.startswith("W/") or not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+def decoded_etag(tag: str) -> str:
+    """Undo encoded_etag, so validators of compressed responses match the resource's ETag"""
+    for suffix in _ETAG_SUFFIXES:
+        if tag.endswith(suffix):
+            return tag[:-len(suffix)] + '"'
+    return tag
+
+def available_encodings(preferred: Sequence[str]) -> List[str]:
+    """The preferred encodings that can actually be produced, in order"""
+    return [encoding for encoding in preferred if encoding in COMPRESSORS]
+
+def negotiate(accept_encoding: str, encodings: Sequence[str]) -> Optional[str]:
+    """
+    Pick the encoding with the highest client q-value; ties go to the
+    server's preference order. None when nothing acceptable is available.
+    """
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[token] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in encodings:
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+def compress(data: bytes, encoding: str) -> bytes:
+    compressor = COMPRESSORS[encoding]()
+    return compressor.compress(data) + compressor.finish()
+
+async def _run(fn, data: bytes) -> bytes:
+    if len(data) >= OFFLOAD_SIZE:
+        return await run_in_threadpool(fn, data)
+    return fn(data)
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = 1024, encodings: Sequence[str] = ("zstd", "br", "gzip")):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encodings = available_encodings(encodings)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.encodings:
+            await self.app(scope, receive, send)
+            return
+        request_headers = Headers(scope=scope)
+        encoding = negotiate(request_headers.get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressingResponder(
+            send, encoding, self.minimum_size, request_headers.get("if-none-match", "")
+        )
+        await self.app(scope, receive, responder)
+
+class _CompressingResponder:
+    def __init__(self, send, encoding: str, minimum_size: int, if_none_match: str = ""):
+        self.send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.if_none_match = if_none_match
+        self.start_message = None
+        self.compressor = None
+        self.passthrough = False
+
+    def _compressible(self, headers: MutableHeaders) -> bool:
+        if self.start_message["status"] in (204, 304) or "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "").lower()
+        return not content_type.startswith(INCOMPRESSIBLE_TYPES)
+
+    def _revalidated(self, headers: MutableHeaders) -> None:
+        # A 304 has no body to compress: echo the ETag in the form the client
+        # cached, which was the compressed one if it sent that back
+        etag = headers.get("etag")
+        if etag is not None and encoded_etag(etag, self.encoding) in self.if_none_match:
+            headers["ETag"] = encoded_etag(etag, self.encoding)
+
+    def _flush(self, data: bytes) -> bytes:
+        return self.compressor.compress(data) + self.compressor.flush()
+
+    def _finish(self, data: bytes) -> bytes:
+        return self.compressor.compress(data) + self.compressor.finish()
+
+    async def __call__(self, message):
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            # Hold the headers until the first body chunk shows whether to compress
+            self.start_message = message
+            return
+        if message_type != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None:
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            if self.start_message["status"] == 304:
+                self._revalidated(headers)
+            if not self._compressible(headers):
+                self.passthrough = True
+                await self.send(self.start_message)
+                await self.send(message)
+                return
+            headers.add_vary_header("Accept-Encoding")
+            if not more_body and len(body) < self.minimum_size:
+                self.passthrough = True
+                await self.send(self.start_message)
+                await self.send(message)
+                return
+
+            self.compressor = COMPRESSORS[self.encoding]()
+            headers["Content-Encoding"] = self.encoding
+            if "etag" in headers:
+                headers["ETag"] = encoded_etag(headers["etag"], self.encoding)
+            if more_body:
+                # Streaming: the compressed length is not known up front
+                del headers["Content-Length"]
+            else:
+                body = await _run(self._finish, body)
+                headers["Content-Length"] = str(len(body))
+                await self.send(self.start_message)
+                await self.send({"type": "http.response.body", "body": body})
+                return
+            await self.send(self.start_message)
+
+        chunk = await _run(self._flush if more_body else self._finish, body)
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
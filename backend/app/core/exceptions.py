@@ -1,3 +1,4 @@
+import math
 from fastapi import HTTPException, status
 
 class TenantNotFound(HTTPException):
@@ -21,6 +22,41 @@ class NoteNotFound(HTTPException):
             detail="Note not found"
         )
 
+class InvalidCursor(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+class NotePreconditionFailed(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="Note was modified since it was read; fetch it again before retrying"
+        )
+
+class InvalidNoteFields(HTTPException):
+    def __init__(self, unknown: str):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown note field(s): {unknown}"
+        )
+
+class SearchNotSupported(HTTPException):
+    def __init__(self, dialect: str):
+        super().__init__(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=f"Full-text search is not supported on {dialect}"
+        )
+
+class ImportJobNotFound(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Import job not found"
+        )
+
 class NoteLimitReached(HTTPException):
     def __init__(self):
         super().__init__(
@@ -34,4 +70,30 @@ class InvalidCredentials(HTTPException):
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password",
             headers={"WWW-Authenticate": "Bearer"}
+        )
+
+class PasswordHashingBusy(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many concurrent login attempts, please retry shortly",
+            headers={"Retry-After": "1"}
+        )
+
+class TenantMoving(HTTPException):
+    def __init__(self, retry_after: float):
+        seconds = max(1, math.ceil(retry_after))
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Tenant is being moved to another database; writes are paused, retry shortly",
+            headers={"Retry-After": str(seconds)}
+        )
+
+class RateLimited(HTTPException):
+    def __init__(self, scope: str, retry_after: float):
+        seconds = max(1, math.ceil(retry_after))
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Rate limit exceeded for this {scope}, retry in {seconds}s",
+            headers={"Retry-After": str(seconds)}
         )
\ No newline at end of file
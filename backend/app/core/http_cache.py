@@ -0,0 +1,81 @@
+"""
+Conditional request helpers (RFC 9110) for note reads and writes.
+
+A note's ETag is derived from (id, updated_at); a page of the note list is
+identified by the tenant's notes_version plus the query string. Both are
+cheap to look up without loading note content, so revalidation can answer
+304 Not Modified before any note row is read.
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import List, Optional
+from fastapi import Request, Response, status
+from app.core.compression import decoded_etag
+
+# Clients may keep responses but must revalidate them on every use
+CACHE_CONTROL = "private, no-cache"
+
+def _strong_etag(*parts) -> str:
+    digest = hashlib.sha256(":".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+def as_utc(value: datetime) -> datetime:
+    # SQLite returns naive datetimes; every timestamp is stored in UTC
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def note_etag(note_id: int, updated_at: Optional[datetime]) -> str:
+    stamp = as_utc(updated_at).isoformat() if updated_at is not None else ""
+    return _strong_etag("note", note_id, stamp)
+
+def collection_etag(tenant_id: int, notes_version: int, query: str = "") -> str:
+    return _strong_etag("notes", tenant_id, notes_version, query)
+
+def http_date(value: datetime) -> str:
+    return format_datetime(as_utc(value).replace(microsecond=0), usegmt=True)
+
+def _parse_etags(header: str) -> List[str]:
+    # Tags of compressed responses carry the encoding; compare the resource's
+    return [decoded_etag(tag.strip()) for tag in header.split(",") if tag.strip()]
+
+def if_none_match(header: str, etag: str) -> bool:
+    """Weak comparison, as RFC 9110 requires for If-None-Match"""
+    tags = _parse_etags(header)
+    return "*" in tags or etag in (tag[2:] if tag.startswith("W/") else tag for tag in tags)
+
+def if_match(header: str, etag: str) -> bool:
+    """Strong comparison: weak validators never satisfy If-Match"""
+    tags = _parse_etags(header)
+    return "*" in tags or etag in tags
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """True when the client's cached copy is current; If-None-Match wins over If-Modified-Since"""
+    none_match = request.headers.get("if-none-match")
+    if none_match is not None:
+        return if_none_match(none_match, etag)
+    modified_since = request.headers.get("if-modified-since")
+    if modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        return False
+    return as_utc(last_modified).replace(microsecond=0) <= since
+
+def has_validators(request: Request) -> bool:
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+def set_validators(response: Response, etag: str, last_modified: Optional[datetime] = None) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    if last_modified is not None:
+        response.headers["Last-Modified"] = http_date(last_modified)
+
+def not_modified(etag: str, last_modified: Optional[datetime] = None) -> Response:
+    response = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+    set_validators(response, etag, last_modified)
+    return response
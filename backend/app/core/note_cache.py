@@ -0,0 +1,215 @@
+"""
+Tenant-scoped read-through cache for note lists and single notes.
+
+Keys are namespaced by tenant. List pages live under a per-tenant generation
+(t{tenant}:lists:g{gen}:{query}) that every note write bumps, so one counter
+increment retires every cached page of that tenant. Single notes live under
+t{tenant}:note:{id} and are deleted only when that note changes.
+
+Concurrent misses for the same key within a process share a single load, so
+a burst of polls right after a write costs one database query. Calls to a
+blocking backend (Redis) run in the threadpool, off the event loop.
+"""
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+from starlette.concurrency import run_in_threadpool
+from app.config import NOTE_CACHE_BACKEND, NOTE_CACHE_TTL_SECONDS, NOTE_CACHE_MAX_SIZE, REDIS_URL
+from app.core.cache import MemoryBackend, RedisBackend
+from app.core.log import get_logger
+
+logger = get_logger(__name__)
+
+def _generation_key(tenant_id: int) -> str:
+    return f"t{tenant_id}:lists:gen"
+
+def _note_key(tenant_id: int, note_id: int) -> str:
+    return f"t{tenant_id}:note:{note_id}"
+
+class NoteCache:
+    def __init__(self, backend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.coalesced = 0
+        self.invalidations = 0
+        self.errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    def _count(self, field: str) -> None:
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    async def _call(self, fn: Callable, *args) -> Any:
+        """Run a backend call, in the threadpool when the backend does network I/O"""
+        if self.backend.blocking:
+            return await run_in_threadpool(fn, *args)
+        return fn(*args)
+
+    async def _get(self, key: str) -> Any:
+        try:
+            value = await self._call(self.backend.get, key)
+        except Exception:
+            # A cache outage degrades to uncached reads, never to errors
+            self._count("errors")
+            logger.warning("note cache read failed", exc_info=True)
+            return None
+        self._count("hits" if value is not None else "misses")
+        return value
+
+    async def _set(self, key: str, value: Any) -> None:
+        try:
+            await self._call(self.backend.set, key, value, self.ttl)
+        except Exception:
+            self._count("errors")
+            logger.warning("note cache write failed", exc_info=True)
+
+    async def _generation(self, tenant_id: int) -> Optional[int]:
+        try:
+            return await self._call(self.backend.get_counter, _generation_key(tenant_id))
+        except Exception:
+            self._count("errors")
+            logger.warning("note cache read failed", exc_info=True)
+            return None
+
+    async def _load_once(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Run loader for key, or wait for the load already in flight"""
+        future = self._inflight.get(key)
+        if future is not None:
+            self._count("coalesced")
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # The request running the load went away; load for ourselves
+                return await loader()
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            self._count("loads")
+            value = await loader()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            # Waiters re-raise it; mark it retrieved for the no-waiter case
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            del self._inflight[key]
+
+    async def get_list(self, tenant_id: int, query: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """A cached page of the tenant's note list, loading it on a miss"""
+        if not self.enabled:
+            return await loader()
+        generation = await self._generation(tenant_id)
+        if generation is None:
+            return await loader()
+        key = f"t{tenant_id}:lists:g{generation}:{query}"
+        value = await self._get(key)
+        if value is not None:
+            return value
+
+        async def load():
+            value = await loader()
+            # Pages loaded under an old generation are simply never read again
+            await self._set(key, value)
+            return value
+
+        return await self._load_once(key, load)
+
+    async def peek_note(self, tenant_id: int, note_id: int) -> Any:
+        """The cached note, or None without loading"""
+        if not self.enabled:
+            return None
+        return await self._get(_note_key(tenant_id, note_id))
+
+    async def get_note(self, tenant_id: int, note_id: int, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """A cached note, loading it on a miss; missing notes are not cached"""
+        if not self.enabled:
+            return await loader()
+        key = _note_key(tenant_id, note_id)
+        value = await self._get(key)
+        if value is not None:
+            return value
+
+        async def load():
+            generation = await self._generation(tenant_id)
+            value = await loader()
+            # Every note write bumps the generation: if one landed during the
+            # load, the row read may predate it, so do not cache it
+            if value is not None and generation is not None and await self._generation(tenant_id) == generation:
+                await self._set(key, value)
+            return value
+
+        return await self._load_once(key, load)
+
+    def invalidate(self, tenant_id: int, note_ids: Iterable[int] = ()) -> None:
+        """
+        Retire the tenant's cached lists and the given notes (call after
+        commit). Blocks on a Redis backend; use ainvalidate on the event loop.
+        """
+        if not self.enabled:
+            return
+        self._count("invalidations")
+        try:
+            self.backend.incr(_generation_key(tenant_id))
+            keys = [_note_key(tenant_id, note_id) for note_id in note_ids]
+            if keys:
+                self.backend.delete(*keys)
+        except Exception:
+            self._count("errors")
+            logger.error("note cache invalidation failed", exc_info=True)
+
+    async def ainvalidate(self, tenant_id: int, note_ids: Iterable[int] = ()) -> None:
+        if not self.enabled:
+            return
+        await self._call(self.invalidate, tenant_id, list(note_ids))
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                "backend": self.backend.name if self.enabled else "none",
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "loads": self.loads,
+                "coalesced": self.coalesced,
+                "invalidations": self.invalidations,
+                "errors": self.errors,
+            }
+        if self.enabled:
+            stats["store"] = self.backend.stats()
+        return stats
+
+def create_backend(kind: str):
+    if kind == "memory":
+        return MemoryBackend(maxsize=NOTE_CACHE_MAX_SIZE, ttl=NOTE_CACHE_TTL_SECONDS)
+    if kind == "redis":
+        return RedisBackend.from_url(REDIS_URL)
+    if kind == "none":
+        return None
+    raise ValueError(f"Unknown NOTE_CACHE_BACKEND: {kind}")
+
+note_cache = NoteCache(create_backend(NOTE_CACHE_BACKEND), ttl=NOTE_CACHE_TTL_SECONDS)
+
+def invalidate_notes(tenant_id: int, note_ids: Iterable[int] = ()) -> None:
+    note_cache.invalidate(tenant_id, note_ids)
+
+async def ainvalidate_notes(tenant_id: int, note_ids: Iterable[int] = ()) -> None:
+    await note_cache.ainvalidate(tenant_id, note_ids)
@@ -0,0 +1,400 @@
+"""
+Token-bucket rate limiting per client IP, user and tenant.
+
+Every request on a limited router is charged one token from each bucket that
+applies to it: tenant and user buckets sized by the tenant's subscription
+plan for authenticated callers, a per-IP bucket otherwise, plus any per-route
+buckets (POST /auth/login is limited per IP because every attempt costs a
+bcrypt verify). An empty bucket answers 429 with Retry-After. Behind trusted
+reverse proxies the IP is the client's, taken from X-Forwarded-For.
+
+Buckets live in process memory, or in Redis so every worker shares them; a
+request's buckets are charged in one call (a single script round trip on
+Redis, made from the threadpool). A limiter outage, or a failed plan lookup,
+lets requests through rather than failing them.
+"""
+import ipaddress
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+from fastapi import Request
+from starlette.concurrency import run_in_threadpool
+from app.config import (
+    RATE_LIMIT_BACKEND,
+    RATE_LIMIT_MAX_BUCKETS,
+    RATE_LIMIT_TRUSTED_PROXIES,
+    RATE_LIMIT_ANONYMOUS,
+    RATE_LIMIT_FREE_USER,
+    RATE_LIMIT_FREE_TENANT,
+    RATE_LIMIT_PRO_USER,
+    RATE_LIMIT_PRO_TENANT,
+    RATE_LIMIT_ROUTES,
+    REDIS_URL,
+)
+from app.core.cache import tenant_plan_cache
+from app.core.exceptions import RateLimited
+from app.core.log import get_logger
+from app.core.security import verify_authorization
+from app.crud.backend import tenant as crud_tenant
+from app.database import resolve_tenant_placement, run_db, shard_session
+from app.models.tenant import SubscriptionPlan
+
+logger = get_logger(__name__)
+
+# Plan name for callers without a valid bearer token
+ANONYMOUS = "anonymous"
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+# Per-route buckets charged on top of the plan limits; RATE_LIMIT_ROUTES
+# entries replace these route by route. A scope maps to one limit for every
+# plan or to a {plan: limit} mapping.
+DEFAULT_ROUTE_LIMITS = {
+    "POST /auth/login": {"ip": "10/minute"},
+    "POST /notes/import": {"user": "10/minute"},
+    "GET /notes/export": {"user": "30/minute"},
+    "GET /notes/search": {"user": {"free": "60/minute", "pro": "600/minute"}},
+    "POST /notes/bulk": {"user": "60/minute"},
+    "PUT /notes/bulk": {"user": "60/minute"},
+    "POST /notes/bulk/delete": {"user": "60/minute"},
+}
+
+@dataclass(frozen=True)
+class RateLimit:
+    """capacity requests per period seconds, refilled continuously"""
+    capacity: int
+    period: float
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.period
+
+    @classmethod
+    def parse(cls, spec: str) -> "RateLimit":
+        count, _, unit = spec.partition("/")
+        unit = unit.strip().lower().rstrip("s")
+        if unit not in _PERIODS or not count.strip().isdigit() or int(count) <= 0:
+            raise ValueError(f"Invalid rate limit {spec!r}, expected e.g. '60/minute'")
+        return cls(capacity=int(count), period=_PERIODS[unit])
+
+    def __str__(self) -> str:
+        return f"{self.capacity}/{self.period:g}s"
+
+class Decision(NamedTuple):
+    allowed: bool
+    remaining: float
+    retry_after: float
+
+Bucket = Tuple[str, RateLimit]
+
+class MemoryRateLimitBackend:
+    """
+    Buckets in process memory as (tokens, last refill) pairs. The least
+    recently used buckets are dropped past maxsize; a dropped bucket simply
+    starts full again.
+    """
+    name = "memory"
+    # Cheap enough to call on the event loop
+    blocking = False
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, buckets: Sequence[Bucket], cost: int = 1) -> List[Decision]:
+        """Charge buckets in order, stopping after the first empty one; one Decision per bucket charged"""
+        decisions = []
+        now = time.monotonic()
+        with self._lock:
+            for key, limit in buckets:
+                tokens, refilled_at = self._buckets.get(key, (limit.capacity, now))
+                tokens = min(limit.capacity, tokens + (now - refilled_at) * limit.rate)
+                allowed = tokens >= cost
+                if allowed:
+                    tokens -= cost
+                self._buckets[key] = (tokens, now)
+                self._buckets.move_to_end(key)
+                decisions.append(Decision(allowed, tokens, 0.0 if allowed else (cost - tokens) / limit.rate))
+                if not allowed:
+                    break
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        return decisions
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"buckets": len(self._buckets), "max_buckets": self.maxsize}
+
+# Refill, take and store every bucket of a request in one atomic step,
+# stopping after the first empty one. ARGV holds now and cost, then capacity
+# and rate per key. Returns numbers as strings since Redis truncates Lua
+# numbers to integers.
+_TOKEN_BUCKET_SCRIPT = """
+local now = tonumber(ARGV[1])
+local cost = tonumber(ARGV[2])
+local results = {}
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i + 1])
+    local rate = tonumber(ARGV[2 * i + 2])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local refilled_at = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - refilled_at) * rate)
+    local allowed = 0
+    local retry_after = 0
+    if tokens >= cost then
+        tokens = tokens - cost
+        allowed = 1
+    else
+        retry_after = (cost - tokens) / rate
+    end
+    redis.call('HSET', key, 'tokens', tostring(tokens), 'ts', tostring(now))
+    redis.call('PEXPIRE', key, math.ceil((capacity - tokens) / rate * 1000) + 1000)
+    table.insert(results, allowed)
+    table.insert(results, tostring(tokens))
+    table.insert(results, tostring(retry_after))
+    if allowed == 0 then
+        break
+    end
+end
+return results
+"""
+
+class RedisRateLimitBackend:
+    """
+    Buckets shared by every worker, stored as Redis hashes that expire once
+    they would have refilled completely. Needs a client with redis-py's
+    register_script (Redis 4+ for multi-field HSET).
+    """
+    name = "redis"
+    # One network round trip per request; run it off the event loop
+    blocking = True
+
+    def __init__(self, client, prefix: str = "saas-notes:rl:"):
+        self.client = client
+        self.prefix = prefix
+        self._script = client.register_script(_TOKEN_BUCKET_SCRIPT)
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisRateLimitBackend":
+        try:
+            import redis
+        except ImportError as exc:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requires the redis package (pip install redis)") from exc
+        return cls(redis.Redis.from_url(url))
+
+    def acquire(self, buckets: Sequence[Bucket], cost: int = 1) -> List[Decision]:
+        """Charge buckets in order, stopping after the first empty one; one Decision per bucket charged"""
+        if not buckets:
+            return []
+        # Wall clock, not monotonic: every worker must agree on the time base
+        args = [repr(time.time()), cost]
+        for _, limit in buckets:
+            args.extend((limit.capacity, repr(limit.rate)))
+        flat = self._script(keys=[self.prefix + key for key, _ in buckets], args=args)
+        return [
+            Decision(bool(int(allowed)), float(tokens), float(retry_after))
+            for allowed, tokens, retry_after in zip(flat[0::3], flat[1::3], flat[2::3])
+        ]
+
+    def stats(self) -> dict:
+        return {"prefix": self.prefix}
+
+ScopeLimits = Dict[str, RateLimit]
+
+class RateLimitPolicy:
+    """
+    Which buckets a request is charged to. plans maps a plan name to
+    {scope: limit}; routes maps "METHOD /path/template" to {scope: {plan: limit}},
+    with "*" as the plan for limits that apply to every plan.
+    """
+
+    def __init__(self, plans: Dict[str, ScopeLimits], routes: Dict[str, Dict[str, ScopeLimits]]):
+        self.plans = plans
+        self.routes = routes
+
+    @classmethod
+    def from_config(cls, plans: Dict[str, Dict[str, str]], routes: Dict[str, Dict[str, Union[str, Dict[str, str]]]]) -> "RateLimitPolicy":
+        parsed_plans = {
+            plan: {scope: RateLimit.parse(spec) for scope, spec in limits.items()}
+            for plan, limits in plans.items()
+        }
+        parsed_routes = {}
+        for route_key, scopes in routes.items():
+            method, _, path = route_key.partition(" ")
+            parsed_routes[f"{method.upper()} {path.strip()}"] = {
+                scope: {"*": RateLimit.parse(spec)} if isinstance(spec, str)
+                else {plan.lower(): RateLimit.parse(plan_spec) for plan, plan_spec in spec.items()}
+                for scope, spec in scopes.items()
+            }
+        return cls(parsed_plans, parsed_routes)
+
+    def buckets(self, route_key: Optional[str], plan: str, identities: Dict[str, object]) -> List[Tuple[str, str, RateLimit]]:
+        """(scope, bucket key, limit) for each bucket, route buckets first"""
+        buckets = []
+        for scope, limits in self.routes.get(route_key, {}).items():
+            limit = limits.get(plan, limits.get("*"))
+            if limit is not None and scope in identities:
+                buckets.append((scope, f"{scope}:{identities[scope]}:{route_key}", limit))
+        for scope, limit in self.plans.get(plan, {}).items():
+            if scope in identities:
+                # Keyed by plan too, so an upgrade starts from a full bucket
+                buckets.append((scope, f"{scope}:{identities[scope]}:{plan}", limit))
+        return buckets
+
+class RateLimiter:
+    def __init__(self, backend, policy: RateLimitPolicy):
+        self.backend = backend
+        self.policy = policy
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.limited: Dict[str, int] = {}
+        self.errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    def hit(self, route_key: Optional[str], plan: str, identities: Dict[str, object]) -> None:
+        """
+        Take a token from every applicable bucket; raises RateLimited when one
+        is empty. Blocks on backends with blocking set (see enforce_rate_limit).
+        """
+        buckets = self.policy.buckets(route_key, plan, identities)
+        try:
+            decisions = self.backend.acquire([(key, limit) for _, key, limit in buckets])
+        except Exception:
+            self.fail_open("rate limiter unavailable, allowing request")
+            return
+        for (scope, key, limit), decision in zip(buckets, decisions):
+            if not decision.allowed:
+                with self._lock:
+                    self.limited[scope] = self.limited.get(scope, 0) + 1
+                logger.info("rate limited", extra={
+                    "scope": scope, "bucket": key, "limit": str(limit), "plan": plan,
+                    "retry_after": round(decision.retry_after, 3)
+                })
+                raise RateLimited(scope, decision.retry_after)
+        with self._lock:
+            self.allowed += 1
+
+    def fail_open(self, message: str) -> None:
+        """Count a failure that lets the request through unlimited; call from an except block"""
+        with self._lock:
+            self.errors += 1
+        logger.warning(message, exc_info=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = {
+                "backend": self.backend.name if self.enabled else "none",
+                "allowed": self.allowed,
+                "limited": dict(self.limited),
+                "errors": self.errors,
+            }
+        if self.enabled:
+            stats["store"] = self.backend.stats()
+        stats["plans"] = {
+            plan: {scope: str(limit) for scope, limit in limits.items()}
+            for plan, limits in self.policy.plans.items()
+        }
+        return stats
+
+def create_backend(kind: str):
+    if kind == "memory":
+        return MemoryRateLimitBackend(maxsize=RATE_LIMIT_MAX_BUCKETS)
+    if kind == "redis":
+        return RedisRateLimitBackend.from_url(REDIS_URL)
+    if kind == "none":
+        return None
+    raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {kind}")
+
+rate_limiter = RateLimiter(
+    create_backend(RATE_LIMIT_BACKEND),
+    RateLimitPolicy.from_config(
+        plans={
+            ANONYMOUS: {"ip": RATE_LIMIT_ANONYMOUS},
+            SubscriptionPlan.FREE.value: {"user": RATE_LIMIT_FREE_USER, "tenant": RATE_LIMIT_FREE_TENANT},
+            SubscriptionPlan.PRO.value: {"user": RATE_LIMIT_PRO_USER, "tenant": RATE_LIMIT_PRO_TENANT},
+        },
+        routes={**DEFAULT_ROUTE_LIMITS, **RATE_LIMIT_ROUTES}
+    )
+)
+
+def ip_networks(specs: Sequence[str]) -> list:
+    return [ipaddress.ip_network(spec, strict=False) for spec in specs]
+
+# Reverse proxies whose X-Forwarded-For is believed
+TRUSTED_PROXIES = ip_networks(RATE_LIMIT_TRUSTED_PROXIES)
+
+def _is_trusted_proxy(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in TRUSTED_PROXIES)
+
+def client_address(request: Request) -> str:
+    """
+    The address per-IP buckets are keyed on. A request from a trusted proxy is
+    attributed to the rightmost X-Forwarded-For entry that is not a trusted
+    proxy itself; entries left of it are the client's to forge.
+    """
+    address = request.client.host if request.client else "unknown"
+    if not _is_trusted_proxy(address):
+        return address
+    forwarded = [
+        hop.strip()
+        for header in request.headers.getlist("x-forwarded-for")
+        for hop in header.split(",")
+        if hop.strip()
+    ]
+    for hop in reversed(forwarded):
+        address = hop
+        if not _is_trusted_proxy(hop):
+            break
+    return address
+
+async def _tenant_plan(tenant_id: int) -> str:
+    plan = tenant_plan_cache.get(tenant_id)
+    if plan is None:
+        # Not through get_db: the token's tenant is not the request's shard on
+        # login, and a tenant's plan stays readable while it is being moved
+        placement = await resolve_tenant_placement(tenant_id)
+        async with shard_session(placement.shard) as db:
+            plan = await run_db(crud_tenant.get_subscription_plan, db, tenant_id)
+        plan = plan.value if plan is not None else SubscriptionPlan.FREE.value
+        tenant_plan_cache.set(tenant_id, plan)
+    return plan
+
+async def enforce_rate_limit(request: Request):
+    """
+    Router dependency charging the request to its caller's buckets. The bearer
+    token is only decoded here (from the token cache) to find the user and
+    tenant; the endpoint's own auth dependencies still decide access, and a
+    missing or invalid token is limited per client IP.
+    """
+    if not rate_limiter.enabled:
+        return
+    route = request.scope.get("route")
+    route_key = f"{request.method} {route.path}" if route is not None else None
+    client_ip = client_address(request)
+
+    token_data = verify_authorization(request.headers.get("authorization"))
+    if token_data is not None and token_data.tenant_id is not None and token_data.user_id is not None:
+        try:
+            plan = await _tenant_plan(token_data.tenant_id)
+        except Exception:
+            rate_limiter.fail_open("rate limit plan lookup failed, allowing request")
+            return
+        identities = {"tenant": token_data.tenant_id, "user": token_data.user_id, "ip": client_ip}
+    else:
+        plan = ANONYMOUS
+        identities = {"ip": client_ip}
+    if rate_limiter.backend.blocking:
+        await run_in_threadpool(rate_limiter.hit, route_key, plan, identities)
+    else:
+        rate_limiter.hit(route_key, plan, identities)
@@ -1,21 +1,151 @@
-from passlib.context import CryptContext
-from jose import JWTError, jwt
+import asyncio
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
-from app.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
+from typing import Optional, Tuple
+from app.config import (
+    SECRET_KEY,
+    ALGORITHM,
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    BCRYPT_ROUNDS,
+    PASSWORD_HASH_WORKERS,
+    PASSWORD_HASH_MAX_PENDING,
+)
+from app.core.cache import token_cache
+from app.core.exceptions import PasswordHashingBusy
+from app.core.log import get_logger
 from app.schemas.auth import TokenData
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+logger = get_logger(__name__)
+
+_pwd_context = None
+_pwd_context_lock = threading.Lock()
+
+def get_pwd_context():
+    """
+    The passlib context, built on first use: passlib and jose are imported
+    lazily so that they stay out of cold-start import time.
+    """
+    global _pwd_context
+    if _pwd_context is None:
+        with _pwd_context_lock:
+            if _pwd_context is None:
+                from passlib.context import CryptContext
+                # Hashes created with a different cost are flagged by needs_update and rehashed on login
+                _pwd_context = CryptContext(
+                    schemes=["bcrypt"],
+                    deprecated="auto",
+                    bcrypt__default_rounds=BCRYPT_ROUNDS,
+                    bcrypt__min_rounds=BCRYPT_ROUNDS,
+                    bcrypt__max_rounds=BCRYPT_ROUNDS,
+                )
+    return _pwd_context
+
+class PasswordHashPool:
+    """
+    Bounded worker pool for bcrypt so hashing never runs on the event loop.
+    bcrypt releases the GIL, so threads give real parallelism.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.peak_pending = 0
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="password-hash"
+                )
+            return self._executor
+
+    async def run(self, fn, *args):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise PasswordHashingBusy()
+            self.pending += 1
+            self.submitted += 1
+            self.peak_pending = max(self.peak_pending, self.pending)
+        queued_at = time.perf_counter()
+
+        def job():
+            started_at = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                finished_at = time.perf_counter()
+                with self._lock:
+                    wait = started_at - queued_at
+                    self.total_wait_seconds += wait
+                    self.max_wait_seconds = max(self.max_wait_seconds, wait)
+                    self.total_run_seconds += finished_at - started_at
+                    self.completed += 1
+
+        def release(_future):
+            # Once the job has finished or was cancelled before starting, not
+            # when the awaiting request goes away: a cancelled login must keep
+            # counting against max_pending while its bcrypt work is queued or running
+            with self._lock:
+                self.pending -= 1
+
+        future = self._get_executor().submit(job)
+        future.add_done_callback(release)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "bcrypt_rounds": BCRYPT_ROUNDS,
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                "peak_pending": self.peak_pending,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_wait_ms": round(1000 * self.total_wait_seconds / self.completed, 3) if self.completed else 0.0,
+                "max_wait_ms": round(1000 * self.max_wait_seconds, 3),
+                "avg_run_ms": round(1000 * self.total_run_seconds / self.completed, 3) if self.completed else 0.0,
+            }
+
+password_hash_pool = PasswordHashPool(
+    max_workers=PASSWORD_HASH_WORKERS,
+    max_pending=PASSWORD_HASH_MAX_PENDING
+)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    result = pwd_context.verify(plain_password, hashed_password)
-    print(f"Password verification result: {result}")
-    return result
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
+
+async def hash_password_async(password: str) -> str:
+    """Hash a password on the bounded bcrypt pool"""
+    return await password_hash_pool.run(get_pwd_context().hash, password)
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password on the bounded bcrypt pool.
+    Returns (valid, new_hash); new_hash is set when the stored hash needs a rehash.
+    """
+    return await password_hash_pool.run(get_pwd_context().verify_and_update, plain_password, hashed_password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
+    from jose import jwt
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -23,30 +153,57 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    print(f"Created token for: {data.get('sub')} with role: {data.get('role')}")
+    logger.debug("access token issued", extra={"user_id": data.get("user_id"), "tenant_id": data.get("tenant_id")})
     return encoded_jwt
 
 def verify_token(token: str) -> Optional[TokenData]:
+    """
+    Decode and validate a bearer token. Successful decodes are cached by token
+    digest until the token expires, so repeat requests skip the HMAC check and
+    claim validation; rejected tokens are never cached.
+    """
+    cache_key = hashlib.sha256(token.encode()).digest()
+    token_data = token_cache.get(cache_key)
+    if token_data is not None:
+        return token_data
+    
+    decoded = _decode_token(token)
+    if decoded is None:
+        return None
+    token_data, expires_at = decoded
+    if expires_at is not None:
+        token_cache.set(cache_key, token_data, ttl=expires_at - time.time())
+    return token_data
+
+def verify_authorization(header: Optional[str]) -> Optional[TokenData]:
+    """verify_token for an Authorization header value; None unless it is a valid bearer token"""
+    scheme, _, token = (header or "").partition(" ")
+    if scheme.lower() != "bearer" or not token.strip():
+        return None
+    return verify_token(token.strip())
+
+def _decode_token(token: str) -> Optional[Tuple[TokenData, Optional[float]]]:
+    from jose import JWTError, jwt
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
         tenant_id: int = payload.get("tenant_id")
         user_id: int = payload.get("user_id")
         role: str = payload.get("role")
-        
-        print(f"Token decoded - Email: {email}, Tenant: {tenant_id}, Role: {role}")
+        token_version: int = payload.get("ver")
         
         if email is None:
-            print("Email is None in token")
+            logger.debug("token rejected", extra={"reason": "missing_subject"})
             return None
         
         token_data = TokenData(
             email=email, 
             tenant_id=tenant_id, 
             user_id=user_id, 
-            role=role
+            role=role,
+            token_version=token_version
         )
-        return token_data
+        return token_data, payload.get("exp")
     except JWTError as e:
-        print(f"JWT Error: {e}")
+        logger.debug("token rejected", extra={"reason": str(e)})
         return None
\ No newline at end of file
@@ -0,0 +1,56 @@
+"""
+Cold-start report: wall time of each import and init phase between the
+first line of main.py and the app being ready to serve.
+
+Only the standard library is imported here, so it can be the first import in
+main.py. The report is logged once at startup and served at /health/startup.
+"""
+import os
+import threading
+import time
+from typing import List, Optional, Tuple
+
+def _process_age() -> Optional[float]:
+    """Seconds since this process was started, including interpreter boot (Linux only)"""
+    try:
+        with open("/proc/self/stat") as stat:
+            # Field 22 (after the parenthesized command name) is the start time in clock ticks
+            started_ticks = int(stat.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as uptime:
+            boot_seconds = float(uptime.read().split()[0])
+        return boot_seconds - started_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+class StartupReport:
+    def __init__(self):
+        self.origin = time.perf_counter()
+        # Time already spent before this module was imported (interpreter boot)
+        self.before_origin = _process_age()
+        self.phases: List[Tuple[str, float]] = []
+        self._last = self.origin
+        self.ready_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def mark(self, name: str) -> None:
+        """Record the time since the previous mark (or the import of this module) as phase name"""
+        now = time.perf_counter()
+        with self._lock:
+            self.phases.append((name, now - self._last))
+            self._last = now
+
+    def ready(self) -> dict:
+        self.ready_at = time.perf_counter()
+        return self.as_dict()
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            end = self.ready_at if self.ready_at is not None else time.perf_counter()
+            return {
+                "ready": self.ready_at is not None,
+                "interpreter_ms": round(1000 * self.before_origin, 1) if self.before_origin is not None else None,
+                "total_ms": round(1000 * (end - self.origin), 1),
+                "phases": {name: round(1000 * seconds, 1) for name, seconds in self.phases},
+            }
+
+startup_report = StartupReport()
@@ -0,0 +1,3 @@
+from . import tenant, user, note
+
+__all__ = ["tenant", "user", "note"]
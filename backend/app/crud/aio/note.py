@@ -0,0 +1,149 @@
+from sqlalchemy import select, func, Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.note import Note
+from app.schemas.note import NoteCreate, NoteUpdate, NoteBulkUpdateItem
+from app.crud import note as sync_note
+from app.crud.tenant import reserve_note_quota_statement, release_note_quota_statement, touch_notes_statement
+from app.core.exceptions import NotePreconditionFailed
+from app.core.http_cache import note_etag, if_match as etag_matches
+from app.core.note_cache import ainvalidate_notes
+from app.crud.search import index_note, unindex_note, search_notes as search_notes_sync
+from typing import AsyncIterator, Optional, List, Sequence, Set, Tuple
+
+async def get_note_by_id(db: AsyncSession, note_id: int, tenant_id: int) -> Optional[Note]:
+    result = await db.execute(
+        select(Note).where(Note.id == note_id, Note.tenant_id == tenant_id)
+    )
+    return result.scalars().first()
+
+async def get_note_validator(db: AsyncSession, note_id: int, tenant_id: int) -> Optional[Row]:
+    result = await db.execute(
+        select(Note.id, Note.updated_at).where(Note.id == note_id, Note.tenant_id == tenant_id)
+    )
+    return result.first()
+
+async def _get_note_for_write(db: AsyncSession, note_id: int, tenant_id: int, if_match: Optional[str]) -> Optional[Note]:
+    query = select(Note).where(Note.id == note_id, Note.tenant_id == tenant_id)
+    if if_match is None:
+        return (await db.execute(query)).scalars().first()
+    db_note = (await db.execute(query.with_for_update())).scalars().first()
+    if db_note is not None and not etag_matches(if_match, note_etag(db_note.id, db_note.updated_at)):
+        await db.rollback()
+        raise NotePreconditionFailed()
+    return db_note
+
+async def get_notes_by_tenant(
+    db: AsyncSession,
+    tenant_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    after_id: Optional[int] = None
+) -> List[Note]:
+    query = select(Note).where(Note.tenant_id == tenant_id).order_by(Note.id)
+    if after_id is not None:
+        query = query.where(Note.id > after_id)
+    else:
+        query = query.offset(skip)
+    result = await db.execute(query.limit(limit))
+    return list(result.scalars().all())
+
+async def get_note_fields_by_tenant(
+    db: AsyncSession,
+    tenant_id: int,
+    fields: Sequence[str],
+    skip: int = 0,
+    limit: int = 100,
+    after_id: Optional[int] = None,
+    preview_length: int = 200
+) -> List[dict]:
+    statement = sync_note.note_fields_statement(tenant_id, fields, skip, limit, after_id, preview_length)
+    result = await db.execute(statement)
+    return [dict(row._mapping) for row in result]
+
+async def get_notes_by_user(db: AsyncSession, user_id: int, tenant_id: int, skip: int = 0, limit: int = 100) -> List[Note]:
+    result = await db.execute(
+        select(Note).where(
+            Note.user_id == user_id,
+            Note.tenant_id == tenant_id
+        ).offset(skip).limit(limit)
+    )
+    return list(result.scalars().all())
+
+async def iter_note_rows(db: AsyncSession, tenant_id: int, after_id: Optional[int] = None, batch_size: int = 1000) -> AsyncIterator[list]:
+    result = await db.stream(sync_note.export_notes_statement(tenant_id, after_id, batch_size))
+    async for partition in result.partitions():
+        yield partition
+
+async def count_notes_by_tenant(db: AsyncSession, tenant_id: int) -> int:
+    result = await db.execute(
+        select(func.count()).select_from(Note).where(Note.tenant_id == tenant_id)
+    )
+    return result.scalar_one()
+
+async def create_note(db: AsyncSession, note: NoteCreate, user_id: int, tenant_id: int) -> Optional[Note]:
+    result = await db.execute(reserve_note_quota_statement(tenant_id))
+    if result.rowcount != 1:
+        await db.rollback()
+        return None
+    db_note = Note(
+        title=note.title,
+        content=note.content,
+        user_id=user_id,
+        tenant_id=tenant_id
+    )
+    db.add(db_note)
+    await db.flush()
+    await db.run_sync(index_note, db_note)
+    await db.commit()
+    await ainvalidate_notes(tenant_id)
+    await db.refresh(db_note)
+    return db_note
+
+async def update_note(
+    db: AsyncSession,
+    note_id: int,
+    tenant_id: int,
+    note_update: NoteUpdate,
+    if_match: Optional[str] = None
+) -> Optional[Note]:
+    db_note = await _get_note_for_write(db, note_id, tenant_id, if_match)
+    if not db_note:
+        return None
+    
+    update_data = note_update.model_dump(exclude_unset=True)
+    for key, value in update_data.items():
+        setattr(db_note, key, value)
+    
+    await db.run_sync(index_note, db_note)
+    await db.execute(touch_notes_statement(tenant_id))
+    await db.commit()
+    await ainvalidate_notes(tenant_id, [note_id])
+    await db.refresh(db_note)
+    return db_note
+
+async def delete_note(db: AsyncSession, note_id: int, tenant_id: int, if_match: Optional[str] = None) -> bool:
+    db_note = await _get_note_for_write(db, note_id, tenant_id, if_match)
+    if not db_note:
+        return False
+    
+    await db.run_sync(unindex_note, db_note.id)
+    await db.delete(db_note)
+    await db.execute(release_note_quota_statement(tenant_id))
+    await db.commit()
+    await ainvalidate_notes(tenant_id, [note_id])
+    return True
+
+async def search_notes(db: AsyncSession, tenant_id: int, q: str, limit: int = 20) -> List[Tuple[Note, float, str]]:
+    return await db.run_sync(search_notes_sync, tenant_id, q, limit)
+
+# Bulk operations are dominated by a handful of batched statements, so the
+# sync implementations are reused through run_sync rather than duplicated
+
+async def create_notes_bulk(db: AsyncSession, notes: List[NoteCreate], user_id: int, tenant_id: int) -> Optional[List[Note]]:
+    return await db.run_sync(sync_note.create_notes_bulk, notes, user_id, tenant_id)
+
+async def update_notes_bulk(db: AsyncSession, updates: List[NoteBulkUpdateItem], tenant_id: int) -> List[Optional[Note]]:
+    return await db.run_sync(sync_note.update_notes_bulk, updates, tenant_id)
+
+async def delete_notes_bulk(db: AsyncSession, note_ids: List[int], tenant_id: int) -> Set[int]:
+    return await db.run_sync(sync_note.delete_notes_bulk, note_ids, tenant_id)
@@ -0,0 +1,69 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import invalidate_tenant_plan
+from app.crud import tenant as sync_tenant
+from app.models.tenant import Tenant, SubscriptionPlan
+from app.schemas.tenant import TenantCreate, TenantUpdate
+from typing import Optional
+
+async def get_tenant_by_id(db: AsyncSession, tenant_id: int) -> Optional[Tenant]:
+    result = await db.execute(select(Tenant).where(Tenant.id == tenant_id))
+    return result.scalars().first()
+
+async def get_tenant_by_slug(db: AsyncSession, slug: str) -> Optional[Tenant]:
+    result = await db.execute(select(Tenant).where(Tenant.slug == slug))
+    return result.scalars().first()
+
+async def create_tenant(db: AsyncSession, tenant: TenantCreate) -> Tenant:
+    db_tenant = Tenant(**tenant.model_dump())
+    db.add(db_tenant)
+    await db.commit()
+    await db.refresh(db_tenant)
+    return db_tenant
+
+async def update_tenant(db: AsyncSession, tenant_id: int, tenant_update: TenantUpdate) -> Optional[Tenant]:
+    db_tenant = await get_tenant_by_id(db, tenant_id)
+    if not db_tenant:
+        return None
+    
+    update_data = tenant_update.model_dump(exclude_unset=True)
+    for key, value in update_data.items():
+        setattr(db_tenant, key, value)
+    
+    await db.commit()
+    await db.refresh(db_tenant)
+    return db_tenant
+
+async def upgrade_tenant_subscription(db: AsyncSession, tenant_id: int) -> Optional[Tenant]:
+    db_tenant = await get_tenant_by_id(db, tenant_id)
+    if not db_tenant:
+        return None
+    
+    db_tenant.subscription_plan = SubscriptionPlan.PRO
+    await db.commit()
+    await db.refresh(db_tenant)
+    invalidate_tenant_plan(tenant_id)
+    return db_tenant
+
+async def get_subscription_plan(db: AsyncSession, tenant_id: int) -> Optional[SubscriptionPlan]:
+    result = await db.execute(select(Tenant.subscription_plan).where(Tenant.id == tenant_id))
+    return result.scalar()
+
+
+async def reserve_note_quota(db: AsyncSession, tenant_id: int, count: int = 1) -> bool:
+    result = await db.execute(sync_tenant.reserve_note_quota_statement(tenant_id, count))
+    return result.rowcount == 1
+
+async def release_note_quota(db: AsyncSession, tenant_id: int, count: int = 1) -> None:
+    if count:
+        await db.execute(sync_tenant.release_note_quota_statement(tenant_id, count))
+
+async def touch_notes(db: AsyncSession, tenant_id: int) -> None:
+    await db.execute(sync_tenant.touch_notes_statement(tenant_id))
+
+async def get_notes_version(db: AsyncSession, tenant_id: int) -> Optional[int]:
+    result = await db.execute(select(Tenant.notes_version).where(Tenant.id == tenant_id))
+    return result.scalar()
+
+async def reconcile_note_counts(db: AsyncSession, tenant_id: Optional[int] = None) -> int:
+    return await db.run_sync(sync_tenant.reconcile_note_counts, tenant_id)
\ No newline at end of file
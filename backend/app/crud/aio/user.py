@@ -0,0 +1,115 @@
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.user import User
+from app.models.tenant import Tenant
+from app.models.note import Note
+from app.schemas.user import UserCreate, UserUpdate
+from app.core.security import get_password_hash
+from app.crud.aio.tenant import release_note_quota
+from app.crud.search import unindex_notes
+from app.core.cache import invalidate_principal
+from app.core.note_cache import ainvalidate_notes
+from typing import Optional, List
+
+async def get_user_by_id(db: AsyncSession, user_id: int, tenant_id: int) -> Optional[User]:
+    result = await db.execute(
+        select(User).where(User.id == user_id, User.tenant_id == tenant_id)
+    )
+    return result.scalars().first()
+
+async def get_user_by_email(db: AsyncSession, email: str, tenant_id: int) -> Optional[User]:
+    result = await db.execute(
+        select(User).where(User.email == email, User.tenant_id == tenant_id)
+    )
+    return result.scalars().first()
+
+async def get_token_version(db: AsyncSession, user_id: int, tenant_id: int) -> Optional[int]:
+    """Current token version, or None if the user no longer exists"""
+    result = await db.execute(
+        select(User.token_version).where(User.id == user_id, User.tenant_id == tenant_id)
+    )
+    return result.scalar()
+
+async def get_login_candidates(db: AsyncSession, email: str, tenant_slug: Optional[str] = None) -> List[User]:
+    """Every account registered under an email, across tenants, in one query"""
+    query = select(User).where(User.email == email)
+    if tenant_slug:
+        query = query.join(Tenant, Tenant.id == User.tenant_id).where(Tenant.slug == tenant_slug)
+    result = await db.execute(query.order_by(User.tenant_id))
+    return list(result.scalars().all())
+
+async def get_users_by_tenant(db: AsyncSession, tenant_id: int, skip: int = 0, limit: int = 100) -> List[User]:
+    result = await db.execute(
+        select(User).where(User.tenant_id == tenant_id).offset(skip).limit(limit)
+    )
+    return list(result.scalars().all())
+
+async def create_user(db: AsyncSession, user: UserCreate, password_hash: Optional[str] = None) -> User:
+    if password_hash is None:
+        password_hash = get_password_hash(user.password)
+    db_user = User(
+        email=user.email,
+        password_hash=password_hash,
+        role=user.role,
+        tenant_id=user.tenant_id
+    )
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
+
+async def update_user(db: AsyncSession, user_id: int, tenant_id: int, user_update: UserUpdate) -> Optional[User]:
+    db_user = await get_user_by_id(db, user_id, tenant_id)
+    if not db_user:
+        return None
+    
+    update_data = user_update.model_dump(exclude_unset=True)
+    for key, value in update_data.items():
+        setattr(db_user, key, value)
+    # Email and role are token claims; outstanding tokens must not keep the old ones
+    if update_data:
+        db_user.token_version = User.token_version + 1
+    
+    await db.commit()
+    await db.refresh(db_user)
+    invalidate_principal(tenant_id, user_id)
+    return db_user
+
+async def update_password_hash(db: AsyncSession, user_id: int, tenant_id: int, password_hash: str) -> Optional[User]:
+    db_user = await get_user_by_id(db, user_id, tenant_id)
+    if not db_user:
+        return None
+    
+    db_user.password_hash = password_hash
+    await db.commit()
+    return db_user
+
+async def revoke_tokens(db: AsyncSession, user_id: int, tenant_id: int) -> bool:
+    """Invalidate every access token issued to the user so far"""
+    result = await db.execute(
+        update(User)
+        .where(User.id == user_id, User.tenant_id == tenant_id)
+        .values(token_version=User.token_version + 1)
+    )
+    await db.commit()
+    invalidate_principal(tenant_id, user_id)
+    return result.rowcount > 0
+
+async def delete_user(db: AsyncSession, user_id: int, tenant_id: int) -> bool:
+    db_user = await get_user_by_id(db, user_id, tenant_id)
+    if not db_user:
+        return False
+    
+    # The user's notes go with them (cascade): give back their quota and
+    # drop them from the search index in the same transaction
+    result = await db.execute(
+        select(Note.id).where(Note.tenant_id == tenant_id, Note.user_id == user_id)
+    )
+    note_ids = list(result.scalars())
+    await db.run_sync(unindex_notes, note_ids)
+    await db.delete(db_user)
+    await release_note_quota(db, tenant_id, len(note_ids))
+    await db.commit()
+    invalidate_principal(tenant_id, user_id)
+    await ainvalidate_notes(tenant_id, note_ids)
+    return True
@@ -0,0 +1,9 @@
+"""Crud implementation matching the configured database mode"""
+from app.config import DATABASE_ASYNC
+
+if DATABASE_ASYNC:
+    from app.crud.aio import tenant, user, note
+else:
+    from app.crud import tenant, user, note
+
+__all__ = ["tenant", "user", "note"]
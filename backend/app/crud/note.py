@@ -1,7 +1,13 @@
+from sqlalchemy import insert, delete, select, func, Row
 from sqlalchemy.orm import Session
 from app.models.note import Note
-from app.schemas.note import NoteCreate, NoteUpdate
-from typing import Optional, List
+from app.schemas.note import NoteCreate, NoteUpdate, NoteBulkUpdateItem
+from app.crud.search import index_note, index_notes, unindex_note, unindex_notes, search_notes
+from app.crud.tenant import reserve_note_quota, release_note_quota, touch_notes
+from app.core.exceptions import NotePreconditionFailed
+from app.core.http_cache import note_etag, if_match as etag_matches
+from app.core.note_cache import invalidate_notes
+from typing import Iterator, Optional, List, Sequence, Set
 
 def get_note_by_id(db: Session, note_id: int, tenant_id: int) -> Optional[Note]:
     return db.query(Note).filter(
@@ -9,10 +15,90 @@ def get_note_by_id(db: Session, note_id: int, tenant_id: int) -> Optional[Note]:
         Note.tenant_id == tenant_id
     ).first()
 
-def get_notes_by_tenant(db: Session, tenant_id: int, skip: int = 0, limit: int = 100) -> List[Note]:
-    return db.query(Note).filter(
+def get_note_validator(db: Session, note_id: int, tenant_id: int) -> Optional[Row]:
+    """(id, updated_at) without the content columns, for conditional requests"""
+    return db.query(Note.id, Note.updated_at).filter(
+        Note.id == note_id,
         Note.tenant_id == tenant_id
-    ).offset(skip).limit(limit).all()
+    ).first()
+
+def _get_note_for_write(db: Session, note_id: int, tenant_id: int, if_match: Optional[str]) -> Optional[Note]:
+    """
+    Load a note about to be modified. With an If-Match header the row is
+    locked and its ETag checked, raising NotePreconditionFailed on mismatch.
+    """
+    query = db.query(Note).filter(Note.id == note_id, Note.tenant_id == tenant_id)
+    if if_match is None:
+        return query.first()
+    db_note = query.with_for_update().first()
+    if db_note is not None and not etag_matches(if_match, note_etag(db_note.id, db_note.updated_at)):
+        db.rollback()
+        raise NotePreconditionFailed()
+    return db_note
+
+def get_notes_by_tenant(
+    db: Session,
+    tenant_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    after_id: Optional[int] = None
+) -> List[Note]:
+    """
+    Notes ordered by id. Pass after_id (keyset) instead of skip so deep
+    pages cost the same as the first one.
+    """
+    query = db.query(Note).filter(Note.tenant_id == tenant_id).order_by(Note.id)
+    if after_id is not None:
+        query = query.filter(Note.id > after_id)
+    else:
+        query = query.offset(skip)
+    return query.limit(limit).all()
+
+NOTE_COLUMNS = {
+    "id": Note.id,
+    "title": Note.title,
+    "content": Note.content,
+    "tenant_id": Note.tenant_id,
+    "user_id": Note.user_id,
+    "created_at": Note.created_at,
+    "updated_at": Note.updated_at,
+}
+
+def note_fields_statement(
+    tenant_id: int,
+    fields: Sequence[str],
+    skip: int = 0,
+    limit: int = 100,
+    after_id: Optional[int] = None,
+    preview_length: int = 200
+):
+    """
+    Same page as get_notes_by_tenant, selecting only the given fields as
+    plain columns. "preview" is substr(content) computed by the database,
+    so the full body never leaves it. id is always selected.
+    """
+    columns = [Note.id] + [NOTE_COLUMNS[field] for field in fields if field in NOTE_COLUMNS and field != "id"]
+    if "preview" in fields:
+        columns.append(func.substr(Note.content, 1, preview_length).label("preview"))
+    statement = select(*columns).where(Note.tenant_id == tenant_id).order_by(Note.id)
+    if after_id is not None:
+        statement = statement.where(Note.id > after_id)
+    else:
+        statement = statement.offset(skip)
+    return statement.limit(limit)
+
+def get_note_fields_by_tenant(
+    db: Session,
+    tenant_id: int,
+    fields: Sequence[str],
+    skip: int = 0,
+    limit: int = 100,
+    after_id: Optional[int] = None,
+    preview_length: int = 200
+) -> List[dict]:
+    """A page of notes as dicts holding only the requested fields"""
+    statement = note_fields_statement(tenant_id, fields, skip, limit, after_id, preview_length)
+    return [dict(row._mapping) for row in db.execute(statement)]
 
 def get_notes_by_user(db: Session, user_id: int, tenant_id: int, skip: int = 0, limit: int = 100) -> List[Note]:
     return db.query(Note).filter(
@@ -20,10 +106,29 @@ def get_notes_by_user(db: Session, user_id: int, tenant_id: int, skip: int = 0,
         Note.tenant_id == tenant_id
     ).offset(skip).limit(limit).all()
 
+EXPORT_COLUMNS = (Note.id, Note.user_id, Note.title, Note.content, Note.created_at, Note.updated_at)
+
+def export_notes_statement(tenant_id: int, after_id: Optional[int] = None, batch_size: int = 1000):
+    """Plain-column select streamed with a server-side cursor in batch_size partitions"""
+    statement = select(*EXPORT_COLUMNS).where(Note.tenant_id == tenant_id)
+    if after_id is not None:
+        statement = statement.where(Note.id > after_id)
+    return statement.order_by(Note.id).execution_options(yield_per=batch_size)
+
+def iter_note_rows(db: Session, tenant_id: int, after_id: Optional[int] = None, batch_size: int = 1000) -> Iterator[list]:
+    """Yield a tenant's notes as lists of rows without loading them all into memory"""
+    result = db.execute(export_notes_statement(tenant_id, after_id, batch_size))
+    for partition in result.partitions():
+        yield partition
+
 def count_notes_by_tenant(db: Session, tenant_id: int) -> int:
     return db.query(Note).filter(Note.tenant_id == tenant_id).count()
 
-def create_note(db: Session, note: NoteCreate, user_id: int, tenant_id: int) -> Note:
+def create_note(db: Session, note: NoteCreate, user_id: int, tenant_id: int) -> Optional[Note]:
+    """Create a note; returns None when the tenant's plan limit is reached"""
+    if not reserve_note_quota(db, tenant_id):
+        db.rollback()
+        return None
     db_note = Note(
         title=note.title,
         content=note.content,
@@ -31,12 +136,21 @@ def create_note(db: Session, note: NoteCreate, user_id: int, tenant_id: int) ->
         tenant_id=tenant_id
     )
     db.add(db_note)
+    db.flush()
+    index_note(db, db_note)
     db.commit()
+    invalidate_notes(tenant_id)
     db.refresh(db_note)
     return db_note
 
-def update_note(db: Session, note_id: int, tenant_id: int, note_update: NoteUpdate) -> Optional[Note]:
-    db_note = get_note_by_id(db, note_id, tenant_id)
+def update_note(
+    db: Session,
+    note_id: int,
+    tenant_id: int,
+    note_update: NoteUpdate,
+    if_match: Optional[str] = None
+) -> Optional[Note]:
+    db_note = _get_note_for_write(db, note_id, tenant_id, if_match)
     if not db_note:
         return None
     
@@ -44,15 +158,102 @@ def update_note(db: Session, note_id: int, tenant_id: int, note_update: NoteUpda
     for key, value in update_data.items():
         setattr(db_note, key, value)
     
+    index_note(db, db_note)
+    touch_notes(db, tenant_id)
     db.commit()
+    invalidate_notes(tenant_id, [note_id])
     db.refresh(db_note)
     return db_note
 
-def delete_note(db: Session, note_id: int, tenant_id: int) -> bool:
-    db_note = get_note_by_id(db, note_id, tenant_id)
+def delete_note(db: Session, note_id: int, tenant_id: int, if_match: Optional[str] = None) -> bool:
+    db_note = _get_note_for_write(db, note_id, tenant_id, if_match)
     if not db_note:
         return False
     
+    unindex_note(db, db_note.id)
     db.delete(db_note)
+    release_note_quota(db, tenant_id)
+    db.commit()
+    invalidate_notes(tenant_id, [note_id])
+    return True
+
+def create_notes_bulk(db: Session, notes: List[NoteCreate], user_id: int, tenant_id: int) -> Optional[List[Note]]:
+    """
+    Insert many notes with one INSERT ... RETURNING and a single commit.
+    All or nothing: returns None when the batch would exceed the plan limit.
+    """
+    if not reserve_note_quota(db, tenant_id, len(notes)):
+        db.rollback()
+        return None
+    # Without sort_by_parameter_order, which SQLite can only honour one row
+    # per statement, the rows go out in multi-VALUES batches. RETURNING order
+    # is unspecified, but ids are handed out in VALUES order, so sorting by
+    # id restores the request order
+    db_notes = list(db.scalars(
+        insert(Note).returning(Note),
+        [
+            {
+                "title": note.title,
+                "content": note.content,
+                "user_id": user_id,
+                "tenant_id": tenant_id
+            }
+            for note in notes
+        ]
+    ))
+    db_notes.sort(key=lambda db_note: db_note.id)
+    index_notes(db, db_notes)
+    # Detach so the commit does not expire them and force a reload per note
+    for db_note in db_notes:
+        db.expunge(db_note)
+    db.commit()
+    invalidate_notes(tenant_id)
+    return db_notes
+
+def update_notes_bulk(db: Session, updates: List[NoteBulkUpdateItem], tenant_id: int) -> List[Optional[Note]]:
+    """
+    Apply many partial updates in one transaction.
+    Returns the updated note per item, or None where the id was not found.
+    """
+    ids = {item.id for item in updates}
+    found = {
+        db_note.id: db_note
+        for db_note in db.query(Note).filter(Note.tenant_id == tenant_id, Note.id.in_(ids))
+    }
+    for item in updates:
+        db_note = found.get(item.id)
+        if db_note is None:
+            continue
+        for key, value in item.model_dump(exclude_unset=True, exclude={"id"}).items():
+            setattr(db_note, key, value)
+    
+    if found:
+        # updated_at is a Python-side onupdate, so the flush sets it on each
+        # note and nothing needs reloading before they are detached
+        db.flush()
+        index_notes(db, list(found.values()))
+        touch_notes(db, tenant_id)
+        for db_note in found.values():
+            db.expunge(db_note)
+    db.commit()
+    if found:
+        invalidate_notes(tenant_id, found.keys())
+    return [found.get(item.id) for item in updates]
+
+def delete_notes_bulk(db: Session, note_ids: List[int], tenant_id: int) -> Set[int]:
+    """Delete many notes with one DELETE; returns the ids that existed"""
+    found = {
+        note_id
+        for (note_id,) in db.query(Note.id).filter(Note.tenant_id == tenant_id, Note.id.in_(set(note_ids)))
+    }
+    if found:
+        unindex_notes(db, list(found))
+        db.execute(
+            delete(Note).where(Note.tenant_id == tenant_id, Note.id.in_(found)),
+            execution_options={"synchronize_session": False}
+        )
+        release_note_quota(db, tenant_id, len(found))
     db.commit()
-    return True
\ No newline at end of file
+    if found:
+        invalidate_notes(tenant_id, found)
+    return found
\ No newline at end of file
@@ -0,0 +1,165 @@
+"""
+Full-text search over note title and content.
+
+PostgreSQL uses an expression GIN index on to_tsvector(title || content),
+which the database keeps current on its own. SQLite uses an FTS5 table
+(notes_fts, rowid = note id) that the note crud functions update inside the
+same transaction as the note itself.
+"""
+import re
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+from typing import List, Tuple
+from app.models.note import Note
+from app.core.exceptions import SearchNotSupported
+
+SEARCH_CONFIG = "english"
+SNIPPET_TOKENS = 12
+
+_PG_DOCUMENT = f"to_tsvector('{SEARCH_CONFIG}', coalesce(title, '') || ' ' || coalesce(content, ''))"
+
+def _dialect(bind) -> str:
+    return bind.dialect.name
+
+def ensure_search_index(engine) -> None:
+    """Create the search index for the engine's dialect if it is missing"""
+    with engine.begin() as conn:
+        dialect = _dialect(conn)
+        if dialect == "postgresql":
+            conn.execute(text(
+                f"CREATE INDEX IF NOT EXISTS ix_notes_search ON notes USING GIN ({_PG_DOCUMENT})"
+            ))
+        elif dialect == "sqlite":
+            exists = conn.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'notes_fts'"
+            )).first()
+            if exists:
+                return
+            conn.execute(text(
+                "CREATE VIRTUAL TABLE notes_fts USING fts5("
+                "title, content, tenant_key, tokenize = 'porter unicode61')"
+            ))
+            # Backfill notes written before the index existed
+            conn.execute(text(
+                "INSERT INTO notes_fts (rowid, title, content, tenant_key) "
+                "SELECT id, title, coalesce(content, ''), 't' || tenant_id FROM notes"
+            ))
+
+def index_note(db: Session, note: Note) -> None:
+    """Add or refresh a note in the search index (call before commit)"""
+    index_notes(db, [note])
+
+def index_notes(db: Session, notes: List[Note]) -> None:
+    """Batched index_note: one executemany per statement"""
+    if not notes or _dialect(db.get_bind()) != "sqlite":
+        return
+    db.execute(
+        text("DELETE FROM notes_fts WHERE rowid = :id"),
+        [{"id": note.id} for note in notes]
+    )
+    db.execute(
+        text(
+            "INSERT INTO notes_fts (rowid, title, content, tenant_key) "
+            "VALUES (:id, :title, :content, :tenant_key)"
+        ),
+        [
+            {
+                "id": note.id,
+                "title": note.title,
+                "content": note.content or "",
+                "tenant_key": f"t{note.tenant_id}",
+            }
+            for note in notes
+        ]
+    )
+
+def index_notes_after(db: Session, after_id: int) -> None:
+    """Index every note with id > after_id, for bulk loads that bypass the note crud functions"""
+    if _dialect(db.get_bind()) != "sqlite":
+        return
+    db.execute(
+        text(
+            "INSERT INTO notes_fts (rowid, title, content, tenant_key) "
+            "SELECT id, title, coalesce(content, ''), 't' || tenant_id FROM notes WHERE id > :after_id"
+        ),
+        {"after_id": after_id}
+    )
+
+def unindex_note(db: Session, note_id: int) -> None:
+    """Remove a note from the search index (call before commit)"""
+    unindex_notes(db, [note_id])
+
+def unindex_notes(db: Session, note_ids: List[int]) -> None:
+    if not note_ids or _dialect(db.get_bind()) != "sqlite":
+        return
+    db.execute(
+        text("DELETE FROM notes_fts WHERE rowid = :id"),
+        [{"id": note_id} for note_id in note_ids]
+    )
+
+def unindex_tenant_notes(db: Session, tenant_ids: List[int]) -> None:
+    """Remove every note of the given tenants from the search index (call before deleting them)"""
+    if not tenant_ids or _dialect(db.get_bind()) != "sqlite":
+        return
+    db.execute(
+        text(
+            "DELETE FROM notes_fts WHERE rowid IN (SELECT id FROM notes WHERE tenant_id IN :tenant_ids)"
+        ).bindparams(bindparam("tenant_ids", expanding=True)),
+        {"tenant_ids": list(tenant_ids)}
+    )
+
+def _fts5_query(q: str, tenant_id: int) -> str:
+    """Quote every user term so FTS5 operators in the input are matched literally"""
+    terms = [term.replace('"', '""') for term in re.findall(r"[^\s\"]+", q)]
+    if not terms:
+        return ""
+    scoped = " AND ".join(f'{{title content}} : "{term}"' for term in terms)
+    return f'tenant_key : "t{tenant_id}" AND {scoped}'
+
+def search_notes(db: Session, tenant_id: int, q: str, limit: int = 20) -> List[Tuple[Note, float, str]]:
+    """Best matches first as (note, rank, snippet); higher rank is better"""
+    dialect = _dialect(db.get_bind())
+    if dialect == "postgresql":
+        rows = db.execute(
+            text(
+                # ts_headline only runs on the page of hits, not every match
+                f"SELECT id, rank, ts_headline('{SEARCH_CONFIG}', coalesce(content, ''), query,"
+                f" 'MaxWords={SNIPPET_TOKENS}, MinWords=3') AS snippet FROM ("
+                f"  SELECT id, content, query, ts_rank({_PG_DOCUMENT}, query) AS rank"
+                f"  FROM notes, websearch_to_tsquery('{SEARCH_CONFIG}', :q) AS query"
+                f"  WHERE tenant_id = :tenant_id AND {_PG_DOCUMENT} @@ query"
+                "   ORDER BY rank DESC LIMIT :limit"
+                ") AS hits ORDER BY rank DESC"
+            ),
+            {"q": q, "tenant_id": tenant_id, "limit": limit}
+        ).all()
+    elif dialect == "sqlite":
+        match = _fts5_query(q, tenant_id)
+        if not match:
+            return []
+        rows = db.execute(
+            text(
+                "SELECT rowid AS id, -bm25(notes_fts, 2.0, 1.0, 0.0) AS rank, "
+                f"snippet(notes_fts, 1, '<b>', '</b>', '…', {SNIPPET_TOKENS}) AS snippet "
+                "FROM notes_fts WHERE notes_fts MATCH :match "
+                "ORDER BY bm25(notes_fts, 2.0, 1.0, 0.0) LIMIT :limit"
+            ),
+            {"match": match, "limit": limit}
+        ).all()
+    else:
+        raise SearchNotSupported(dialect)
+
+    if not rows:
+        return []
+    notes = {
+        note.id: note
+        for note in db.query(Note).filter(
+            Note.tenant_id == tenant_id,
+            Note.id.in_([row.id for row in rows])
+        )
+    }
+    return [
+        (notes[row.id], float(row.rank), row.snippet)
+        for row in rows
+        if row.id in notes
+    ]
@@ -1,5 +1,9 @@
+from sqlalchemy import update, select, func, or_, case
 from sqlalchemy.orm import Session
+from app.config import FREE_PLAN_NOTE_LIMIT
+from app.core.cache import invalidate_tenant_plan
 from app.models.tenant import Tenant, SubscriptionPlan
+from app.models.note import Note
 from app.schemas.tenant import TenantCreate, TenantUpdate
 from typing import Optional
 
@@ -37,4 +41,68 @@ def upgrade_tenant_subscription(db: Session, tenant_id: int) -> Optional[Tenant]
     db_tenant.subscription_plan = SubscriptionPlan.PRO
     db.commit()
     db.refresh(db_tenant)
-    return db_tenant
\ No newline at end of file
+    invalidate_tenant_plan(tenant_id)
+    return db_tenant
+
+def get_subscription_plan(db: Session, tenant_id: int) -> Optional[SubscriptionPlan]:
+    return db.query(Tenant.subscription_plan).filter(Tenant.id == tenant_id).scalar()
+
+def reserve_note_quota_statement(tenant_id: int, count: int = 1):
+    """
+    Conditional increment of note_count that only matches while the tenant
+    stays within its plan limit. The row lock taken by the UPDATE makes
+    concurrent reservations serialize, so two creates cannot both pass.
+    """
+    return update(Tenant).where(
+        Tenant.id == tenant_id,
+        or_(
+            Tenant.subscription_plan != SubscriptionPlan.FREE,
+            Tenant.note_count + count <= FREE_PLAN_NOTE_LIMIT
+        )
+    ).values(
+        note_count=Tenant.note_count + count,
+        notes_version=Tenant.notes_version + 1
+    ).execution_options(synchronize_session=False)
+
+def release_note_quota_statement(tenant_id: int, count: int = 1):
+    return update(Tenant).where(Tenant.id == tenant_id).values(
+        note_count=case((Tenant.note_count > count, Tenant.note_count - count), else_=0),
+        notes_version=Tenant.notes_version + 1
+    ).execution_options(synchronize_session=False)
+
+def touch_notes_statement(tenant_id: int):
+    """Bump the tenant's notes_version for edits that do not change note_count"""
+    return update(Tenant).where(Tenant.id == tenant_id).values(
+        notes_version=Tenant.notes_version + 1
+    ).execution_options(synchronize_session=False)
+
+def reserve_note_quota(db: Session, tenant_id: int, count: int = 1) -> bool:
+    """
+    Reserve room for count new notes without committing; the caller commits
+    the reservation together with the inserts. Returns False when the plan
+    limit would be exceeded.
+    """
+    result = db.execute(reserve_note_quota_statement(tenant_id, count))
+    return result.rowcount == 1
+
+def release_note_quota(db: Session, tenant_id: int, count: int = 1) -> None:
+    """Give back quota for deleted notes (caller commits)"""
+    if count:
+        db.execute(release_note_quota_statement(tenant_id, count))
+
+def touch_notes(db: Session, tenant_id: int) -> None:
+    """Invalidate cached note lists for the tenant (caller commits)"""
+    db.execute(touch_notes_statement(tenant_id))
+
+def get_notes_version(db: Session, tenant_id: int) -> Optional[int]:
+    return db.query(Tenant.notes_version).filter(Tenant.id == tenant_id).scalar()
+
+def reconcile_note_counts(db: Session, tenant_id: Optional[int] = None) -> int:
+    """Repair note_count drift from the notes table; returns the number of tenants fixed"""
+    actual = select(func.count(Note.id)).where(Note.tenant_id == Tenant.id).scalar_subquery()
+    statement = update(Tenant).where(Tenant.note_count != actual).values(note_count=actual)
+    if tenant_id is not None:
+        statement = statement.where(Tenant.id == tenant_id)
+    result = db.execute(statement.execution_options(synchronize_session=False))
+    db.commit()
+    return result.rowcount
\ No newline at end of file
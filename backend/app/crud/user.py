@@ -1,7 +1,13 @@
 from sqlalchemy.orm import Session
 from app.models.user import User
+from app.models.tenant import Tenant
+from app.models.note import Note
 from app.schemas.user import UserCreate, UserUpdate
 from app.core.security import get_password_hash
+from app.crud.search import unindex_notes
+from app.crud.tenant import release_note_quota
+from app.core.cache import invalidate_principal
+from app.core.note_cache import invalidate_notes
 from typing import Optional, List
 
 def get_user_by_id(db: Session, user_id: int, tenant_id: int) -> Optional[User]:
@@ -16,13 +22,28 @@ def get_user_by_email(db: Session, email: str, tenant_id: int) -> Optional[User]
         User.tenant_id == tenant_id
     ).first()
 
+def get_token_version(db: Session, user_id: int, tenant_id: int) -> Optional[int]:
+    """Current token version, or None if the user no longer exists"""
+    return db.query(User.token_version).filter(
+        User.id == user_id,
+        User.tenant_id == tenant_id
+    ).scalar()
+
+def get_login_candidates(db: Session, email: str, tenant_slug: Optional[str] = None) -> List[User]:
+    """Every account registered under an email, across tenants, in one query"""
+    query = db.query(User).filter(User.email == email)
+    if tenant_slug:
+        query = query.join(Tenant, Tenant.id == User.tenant_id).filter(Tenant.slug == tenant_slug)
+    return query.order_by(User.tenant_id).all()
+
 def get_users_by_tenant(db: Session, tenant_id: int, skip: int = 0, limit: int = 100) -> List[User]:
     return db.query(User).filter(
         User.tenant_id == tenant_id
     ).offset(skip).limit(limit).all()
 
-def create_user(db: Session, user: UserCreate) -> User:
-    password_hash = get_password_hash(user.password)
+def create_user(db: Session, user: UserCreate, password_hash: Optional[str] = None) -> User:
+    if password_hash is None:
+        password_hash = get_password_hash(user.password)
     db_user = User(
         email=user.email,
         password_hash=password_hash,
@@ -42,16 +63,49 @@ def update_user(db: Session, user_id: int, tenant_id: int, user_update: UserUpda
     update_data = user_update.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_user, key, value)
+    # Email and role are token claims; outstanding tokens must not keep the old ones
+    if update_data:
+        db_user.token_version = User.token_version + 1
     
     db.commit()
     db.refresh(db_user)
+    invalidate_principal(tenant_id, user_id)
     return db_user
 
+def update_password_hash(db: Session, user_id: int, tenant_id: int, password_hash: str) -> Optional[User]:
+    db_user = get_user_by_id(db, user_id, tenant_id)
+    if not db_user:
+        return None
+    
+    db_user.password_hash = password_hash
+    db.commit()
+    return db_user
+
+def revoke_tokens(db: Session, user_id: int, tenant_id: int) -> bool:
+    """Invalidate every access token issued to the user so far"""
+    updated = db.query(User).filter(
+        User.id == user_id,
+        User.tenant_id == tenant_id
+    ).update({User.token_version: User.token_version + 1}, synchronize_session=False)
+    db.commit()
+    invalidate_principal(tenant_id, user_id)
+    return updated > 0
+
 def delete_user(db: Session, user_id: int, tenant_id: int) -> bool:
     db_user = get_user_by_id(db, user_id, tenant_id)
     if not db_user:
         return False
     
+    # The user's notes go with them (cascade): give back their quota and
+    # drop them from the search index in the same transaction
+    note_ids = [
+        note_id
+        for (note_id,) in db.query(Note.id).filter(Note.tenant_id == tenant_id, Note.user_id == user_id)
+    ]
+    unindex_notes(db, note_ids)
     db.delete(db_user)
+    release_note_quota(db, tenant_id, len(note_ids))
     db.commit()
+    invalidate_principal(tenant_id, user_id)
+    invalidate_notes(tenant_id, note_ids)
     return True
\ No newline at end of file
@@ -1,27 +1,581 @@
-from sqlalchemy import create_engine
+import inspect
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import List, NamedTuple, Optional, Tuple
+from sqlalchemy import create_engine, event, inspect as sa_inspect, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from app.config import DATABASE_URL
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from sqlalchemy.util import await_only
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from app.config import (
+    DATABASE_URL,
+    DATABASE_ASYNC,
+    DATABASE_SHARDS,
+    SHARD_MAP_TTL_SECONDS,
+    DATABASE_REPLICA_URLS,
+    DATABASE_REPLICA_POLICY,
+    DATABASE_READ_YOUR_WRITES_SECONDS,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING,
+    SQLITE_JOURNAL_MODE,
+    SQLITE_SYNCHRONOUS,
+    SQLITE_BUSY_TIMEOUT_MS,
+)
+from app.core.cache import recent_writers, tenant_shard_cache
+from app.core.exceptions import TenantMoving
 
-# Create engine
-engine = create_engine(DATABASE_URL)
+class PoolMetrics:
+    """
+    Checkout counters and wait times for one connection pool
+    """
 
-# Create SessionLocal class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.checked_out = 0
+        self.peak_checked_out = 0
+        self.timeouts = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def record_wait(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.total_wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def on_checkout(self, *args) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+
+    def on_checkin(self, *args) -> None:
+        with self._lock:
+            self.checkins += 1
+            self.checked_out -= 1
+
+    def snapshot(self, pool) -> dict:
+        with self._lock:
+            stats = {
+                "pool_class": type(pool).__name__,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "checked_out": self.checked_out,
+                "peak_checked_out": self.peak_checked_out,
+                "timeouts": self.timeouts,
+                "total_wait_seconds": round(self.total_wait_seconds, 6),
+                "max_wait_seconds": round(self.max_wait_seconds, 6),
+                "avg_wait_ms": round(1000 * self.total_wait_seconds / self.checkouts, 3) if self.checkouts else 0.0,
+            }
+        if isinstance(pool, QueuePool):
+            stats.update({
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "max_overflow": pool._max_overflow,
+                "timeout_seconds": pool.timeout(),
+            })
+        return stats
+
+def _timed_pool_class(base, metrics: PoolMetrics):
+    """Subclass a queue pool so time spent waiting for a connection is recorded"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = base._do_get(self)
+        except PoolTimeoutError:
+            metrics.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        metrics.record_wait(time.perf_counter() - start)
+        return conn
+
+    return type("Timed" + base.__name__, (base,), {"_do_get": _do_get})
+
+def _is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+def _is_memory_sqlite(url: str) -> bool:
+    return _is_sqlite(url) and (":memory:" in url or url.split("://", 1)[1] in ("", "/"))
+
+def engine_options(url: str, metrics: PoolMetrics, async_mode: bool = False) -> dict:
+    """Pool and driver keyword arguments for create_engine / create_async_engine"""
+    options = {"pool_pre_ping": DB_POOL_PRE_PING}
+    if _is_sqlite(url):
+        options["connect_args"] = {"check_same_thread": False}
+    if _is_memory_sqlite(url):
+        # In-memory databases live on a single connection; keep SQLAlchemy's default pool
+        return options
+    base = AsyncAdaptedQueuePool if async_mode else QueuePool
+    options.update({
+        "poolclass": _timed_pool_class(base, metrics),
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+    })
+    return options
+
+def configure_engine(engine, metrics: PoolMetrics) -> None:
+    """Attach pool metrics and SQLite pragmas to a (sync) engine"""
+    event.listen(engine, "checkout", metrics.on_checkout)
+    event.listen(engine, "checkin", metrics.on_checkin)
+    if engine.dialect.name == "sqlite":
+        @event.listens_for(engine, "connect")
+        def _set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            if not _is_memory_sqlite(str(engine.url)):
+                cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+            cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+            cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+            cursor.close()
+
+class ReplicaSet:
+    """
+    Read replica engines and the policy that picks one per read session
+    """
+
+    POLICIES = ("round_robin", "least_connections")
+
+    def __init__(self, engines: list, metrics: list, policy: str = "round_robin"):
+        if policy not in self.POLICIES:
+            raise ValueError(f"unknown replica policy {policy!r}, expected one of {', '.join(self.POLICIES)}")
+        self.engines = engines
+        self.metrics = metrics
+        self.policy = policy
+        self._lock = threading.Lock()
+        self._next = 0
+        self.routed = [0] * len(engines)
+        self.primary_reads = 0
+        self.pinned = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.engines)
+
+    def count(self, field: str) -> None:
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def choose(self):
+        """The (sync) engine of the replica a new read session should use"""
+        with self._lock:
+            if self.policy == "least_connections":
+                # Ties (e.g. all idle) go to the replica that was picked least
+                index = min(range(len(self.engines)), key=lambda i: (self.metrics[i].checked_out, self.routed[i]))
+            else:
+                index = self._next % len(self.engines)
+                self._next += 1
+            self.routed[index] += 1
+        return self.engines[index]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "policy": self.policy,
+                "read_your_writes_seconds": DATABASE_READ_YOUR_WRITES_SECONDS,
+                "read_your_writes_store": recent_writers.stats(),
+                # GET sessions kept on the primary because the caller wrote recently
+                "primary_reads": self.primary_reads,
+                # Read sessions moved to the primary by a write or commit
+                "pinned": self.pinned,
+                "replicas": [
+                    {
+                        "url": replica.url.render_as_string(hide_password=True),
+                        "routed": routed,
+                        "checked_out": metrics.checked_out,
+                    }
+                    for replica, metrics, routed in zip(self.engines, self.metrics, self.routed)
+                ],
+            }
+
+class RoutingSession(Session):
+    """
+    Session that reads from the replica in info["replica"] when one was
+    assigned, and otherwise uses its bound primary. The first flush, DML
+    statement or commit moves it to the primary for the rest of its life, so
+    a session always reads its own writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        replica = self.info.get("replica")
+        if replica is not None:
+            if not (self._flushing or getattr(clause, "is_dml", False)):
+                return replica
+            _pin_to_primary(self)
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+def _pin_to_primary(session: Session) -> None:
+    if session.info.pop("replica", None) is not None:
+        read_replicas.count("pinned")
+
+@event.listens_for(RoutingSession, "after_commit")
+def _after_commit(session: Session) -> None:
+    _pin_to_primary(session)
+    writer = session.info.get("writer")
+    if writer is None:
+        return
+    # Until replicas have caught up, this user's reads go to the primary
+    if DATABASE_ASYNC and recent_writers.blocking:
+        # Async sessions commit inside SQLAlchemy's greenlet on the event
+        # loop: wait for the shared store there without blocking the loop
+        await_only(recent_writers.amark(writer))
+    else:
+        recent_writers.mark(writer)
+
+def to_async_url(url: str) -> str:
+    """Map a sync database URL onto its async driver"""
+    if url.startswith("sqlite:"):
+        return "sqlite+aiosqlite:" + url[len("sqlite:"):]
+    if url.startswith("postgres://"):
+        return "postgresql+asyncpg://" + url[len("postgres://"):]
+    if url.startswith("postgresql://") or url.startswith("postgresql+psycopg2://"):
+        return "postgresql+asyncpg://" + url.split("://", 1)[1]
+    return url
+
+if DATABASE_ASYNC:
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+DEFAULT_SHARD = "default"
+
+class Shard:
+    """
+    One database tenants can be placed on, with its engines, session
+    factories and pool metrics. Shard "default" is DATABASE_URL.
+    """
+
+    def __init__(self, name: str, url: str, index: int):
+        self.name = name
+        # Position in the shard list; fixes the shard's PostgreSQL id block
+        self.index = index
+        self.pool_metrics = PoolMetrics()
+        self.engine = create_engine(url, **engine_options(url, self.pool_metrics))
+        configure_engine(self.engine, self.pool_metrics)
+        self.SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=self.engine)
+        self.async_engine = None
+        self.AsyncSessionLocal = None
+        self.async_pool_metrics = None
+        if DATABASE_ASYNC:
+            self.async_pool_metrics = PoolMetrics()
+            self.async_engine = create_async_engine(
+                to_async_url(url),
+                **engine_options(url, self.async_pool_metrics, async_mode=True)
+            )
+            configure_engine(self.async_engine.sync_engine, self.async_pool_metrics)
+            self.AsyncSessionLocal = async_sessionmaker(
+                bind=self.async_engine,
+                class_=AsyncSession,
+                sync_session_class=RoutingSession,
+                autoflush=False,
+                expire_on_commit=False
+            )
+
+    def session(self):
+        """A new session in the configured database mode; the caller closes it"""
+        return self.AsyncSessionLocal() if DATABASE_ASYNC else self.SessionLocal()
+
+    def stats(self) -> dict:
+        stats = {
+            "index": self.index,
+            "url": self.engine.url.render_as_string(hide_password=True),
+            "sync": self.pool_metrics.snapshot(self.engine.pool),
+        }
+        if self.async_engine is not None:
+            stats["async"] = self.async_pool_metrics.snapshot(self.async_engine.sync_engine.pool)
+        return stats
+
+# Create the default shard; its engine and session factories are the module-level ones
+default_shard = Shard(DEFAULT_SHARD, DATABASE_URL, 0)
+pool_metrics = default_shard.pool_metrics
+engine = default_shard.engine
+SessionLocal = default_shard.SessionLocal
+async_engine = default_shard.async_engine
+AsyncSessionLocal = default_shard.AsyncSessionLocal
+async_pool_metrics = default_shard.async_pool_metrics
+
+if DEFAULT_SHARD in DATABASE_SHARDS:
+    raise ValueError(f"DATABASE_SHARDS cannot redefine {DEFAULT_SHARD!r}; it is DATABASE_URL")
+shards = {DEFAULT_SHARD: default_shard}
+for index, (name, url) in enumerate(DATABASE_SHARDS.items(), start=1):
+    shards[name] = Shard(name, url, index)
 
 # Create Base class
 Base = declarative_base()
 
-def get_db():
-    """Dependency to get database session"""
-    db = SessionLocal()
+# Replica engines match the request mode; async ones are kept for dispose_async_engines
+async_replica_engines = []
+
+def _create_replicas() -> ReplicaSet:
+    engines, metrics = [], []
+    for url in DATABASE_REPLICA_URLS:
+        replica_metrics = PoolMetrics()
+        if DATABASE_ASYNC:
+            async_replica = create_async_engine(
+                to_async_url(url),
+                **engine_options(url, replica_metrics, async_mode=True)
+            )
+            async_replica_engines.append(async_replica)
+            replica = async_replica.sync_engine
+        else:
+            replica = create_engine(url, **engine_options(url, replica_metrics))
+        configure_engine(replica, replica_metrics)
+        engines.append(replica)
+        metrics.append(replica_metrics)
+    return ReplicaSet(engines, metrics, DATABASE_REPLICA_POLICY)
+
+# Replicas of the default shard
+read_replicas = _create_replicas()
+
+class ShardPlacement(NamedTuple):
+    shard: Shard
+    # Set while a move cuts the tenant over to another shard; its writes are refused meanwhile
+    moving: bool = False
+
+def _placement(row) -> ShardPlacement:
+    if row is None:
+        return ShardPlacement(default_shard)
+    shard = shards.get(row.shard)
+    if shard is None:
+        raise RuntimeError(f"tenant is placed on unknown shard {row.shard!r}; add it to DATABASE_SHARDS")
+    return ShardPlacement(shard, row.state == "moving")
+
+def tenant_placement(tenant_id: int) -> ShardPlacement:
+    """
+    The shard a tenant lives on, from the tenant_shards directory in the
+    default database; tenants without an entry live on the default shard.
+    Lookups are cached for SHARD_MAP_TTL_SECONDS (blocking; use the
+    threadpool from async code on a cache miss).
+    """
+    if len(shards) == 1:
+        return ShardPlacement(default_shard)
+    placement = tenant_shard_cache.get(tenant_id)
+    if placement is None:
+        with engine.connect() as conn:
+            row = conn.execute(
+                text("SELECT shard, state FROM tenant_shards WHERE tenant_id = :tenant_id"),
+                {"tenant_id": tenant_id}
+            ).first()
+        placement = _placement(row)
+        tenant_shard_cache.set(tenant_id, placement)
+    return placement
+
+async def resolve_tenant_placement(tenant_id: int) -> ShardPlacement:
+    """tenant_placement for async code: cache hits skip the threadpool"""
+    return tenant_shard_cache.get(tenant_id) or await run_in_threadpool(tenant_placement, tenant_id)
+
+def login_shards(tenant_slug: Optional[str] = None) -> List[Shard]:
+    """Shards a login may find its user on: the slug's shard when given, otherwise every shard"""
+    if len(shards) == 1:
+        return [default_shard]
+    if tenant_slug is None:
+        return list(shards.values())
+    with engine.connect() as conn:
+        row = conn.execute(
+            text("SELECT shard, state FROM tenant_shards WHERE slug = :slug"),
+            {"slug": tenant_slug}
+        ).first()
+    return [_placement(row).shard]
+
+READ_METHODS = ("GET", "HEAD")
+
+def request_caller(request: Request):
+    """Verified bearer claims of the request, decoded only when sharding or replicas need them"""
+    if len(shards) == 1 and not read_replicas.enabled:
+        return None
+    # Imported here: app.core.security depends on the models, which need Base from this module
+    from app.core.security import verify_authorization
+    return verify_authorization(request.headers.get("authorization"))
+
+def _sharded_tenant(caller) -> Optional[int]:
+    if len(shards) == 1 or caller is None:
+        return None
+    return caller.tenant_id
+
+def _request_shard(request: Request, placement: ShardPlacement) -> Shard:
+    if placement.moving and request.method not in READ_METHODS:
+        raise TenantMoving(retry_after=SHARD_MAP_TTL_SECONDS)
+    return placement.shard
+
+def session_writer(shard: Shard, caller) -> Optional[Tuple[int, int]]:
+    """
+    The (tenant_id, user_id) whose read-your-writes window applies to a
+    session on shard, or None when the shard's reads never go to a replica
+    """
+    if not read_replicas.enabled or shard is not default_shard:
+        return None
+    if caller is None or caller.tenant_id is None or caller.user_id is None:
+        return None
+    return (caller.tenant_id, caller.user_id)
+
+def route_session(db, request: Request, shard: Shard, writer: Optional[Tuple[int, int]], recently_wrote: bool) -> None:
+    """
+    Send a request's reads to a replica when it may use one: GET and HEAD
+    requests on the default shard do, unless the caller's own write committed
+    within the last DATABASE_READ_YOUR_WRITES_SECONDS (recently_wrote) and may
+    not have replicated yet. The writer is recorded on every session so that
+    its commits open that window.
+    """
+    if not read_replicas.enabled or shard is not default_shard:
+        return
+    if writer is not None:
+        db.info["writer"] = writer
+    if request.method not in READ_METHODS:
+        return
+    if recently_wrote:
+        db.info["read_your_writes"] = True
+        read_replicas.count("primary_reads")
+        return
+    db.info["replica"] = read_replicas.choose()
+
+def reads_own_writes(db) -> bool:
+    """True when the session stays on the primary because its caller wrote recently"""
+    return db.info.get("read_your_writes", False)
+
+def get_sync_db(request: Request):
+    """
+    Dependency to get a synchronous session on the caller's shard, reading
+    from a replica when allowed
+    """
+    caller = request_caller(request)
+    shard = default_shard
+    tenant_id = _sharded_tenant(caller)
+    if tenant_id is not None:
+        shard = _request_shard(request, tenant_placement(tenant_id))
+    writer = session_writer(shard, caller)
+    recently_wrote = writer is not None and request.method in READ_METHODS and recent_writers.is_recent(writer)
+    db = shard.SessionLocal()
     try:
+        route_session(db, request, shard, writer, recently_wrote)
         yield db
     finally:
         db.close()
 
+async def get_async_db(request: Request):
+    """
+    Dependency to get an async session on the caller's shard, reading from a
+    replica when allowed
+    """
+    caller = request_caller(request)
+    shard = default_shard
+    tenant_id = _sharded_tenant(caller)
+    if tenant_id is not None:
+        shard = _request_shard(request, await resolve_tenant_placement(tenant_id))
+    writer = session_writer(shard, caller)
+    recently_wrote = writer is not None and request.method in READ_METHODS and await recent_writers.ais_recent(writer)
+    async with shard.AsyncSessionLocal() as db:
+        route_session(db, request, shard, writer, recently_wrote)
+        yield db
+
+# Request-scoped session dependency for the configured database mode
+get_db = get_async_db if DATABASE_ASYNC else get_sync_db
+
+async def run_db(fn, *args, **kwargs):
+    """
+    Call a crud function without blocking the event loop: async crud
+    functions are awaited, sync ones run in the threadpool
+    """
+    if inspect.iscoroutinefunction(fn):
+        return await fn(*args, **kwargs)
+    return await run_in_threadpool(fn, *args, **kwargs)
+
+async def close_db(db) -> None:
+    """Close a session opened outside get_db, in either database mode"""
+    if DATABASE_ASYNC:
+        await db.close()
+    else:
+        await run_in_threadpool(db.close)
+
+@asynccontextmanager
+async def shard_session(shard: Shard):
+    """
+    A new session on shard, closed on exit, for requests whose shard is not
+    the caller's (e.g. login, which searches every shard)
+    """
+    db = shard.session()
+    try:
+        yield db
+    finally:
+        await close_db(db)
+
+def get_pool_stats() -> dict:
+    """Pool checkout, wait-time and overflow statistics for every engine of the default shard"""
+    stats = {"sync": pool_metrics.snapshot(engine.pool)}
+    if async_engine is not None:
+        stats["async"] = async_pool_metrics.snapshot(async_engine.sync_engine.pool)
+    if read_replicas.enabled:
+        stats["replicas"] = [
+            metrics.snapshot(replica.pool)
+            for replica, metrics in zip(read_replicas.engines, read_replicas.metrics)
+        ]
+    return stats
+
+def get_shard_stats() -> dict:
+    """Pools of every shard and hit rates of the cached tenant placements"""
+    return {
+        "placement_cache": tenant_shard_cache.stats(),
+        "shards": {name: shard.stats() for name, shard in shards.items()},
+    }
+
+async def dispose_async_engines() -> None:
+    """Close pooled async connections (aiosqlite runs one thread per connection)"""
+    for async_replica in async_replica_engines:
+        await async_replica.dispose()
+    for shard in shards.values():
+        if shard.async_engine is not None:
+            await shard.async_engine.dispose()
+
+def ensure_column(engine, table: str, column: str, ddl: str) -> bool:
+    """Add a column to databases created before it existed; True if it was added"""
+    columns = {existing["name"] for existing in sa_inspect(engine).get_columns(table)}
+    if column in columns:
+        return False
+    with engine.begin() as conn:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+    return True
+
+def ensure_index(engine, table: str, name: str, columns: List[str]) -> bool:
+    """Add an index to databases whose table predates it; True if it was added"""
+    indexes = {existing["name"] for existing in sa_inspect(engine).get_indexes(table)}
+    if name in indexes:
+        return False
+    with engine.begin() as conn:
+        conn.execute(text(f"CREATE INDEX {name} ON {table} ({', '.join(columns)})"))
+    return True
+
+def drop_index(engine, table: str, name: str) -> bool:
+    """Drop an index a newer one has superseded; True if it was there"""
+    indexes = {existing["name"] for existing in sa_inspect(engine).get_indexes(table)}
+    if name not in indexes:
+        return False
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP INDEX {name}"))
+    return True
+
 def create_tables():
-    """Create all tables"""
+    """Create all tables on every shard"""
     # Import models to register them
-    from app.models import tenant, user, note
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    from app.models import tenant, user, note, tenant_shard
+    from app.crud.search import ensure_search_index
+    from app.utils.note_counts import ensure_note_count_column, reconcile_shard_note_counts
+    for shard in shards.values():
+        Base.metadata.create_all(bind=shard.engine)
+        ensure_search_index(shard.engine)
+        if ensure_note_count_column(shard.engine):
+            reconcile_shard_note_counts(shard)
+        ensure_column(shard.engine, "users", "token_version", "INTEGER NOT NULL DEFAULT 0")
+        ensure_column(shard.engine, "tenants", "notes_version", "INTEGER NOT NULL DEFAULT 0")
+        # create_all skips indexes on tables that already exist
+        ensure_index(shard.engine, "notes", "ix_notes_tenant_id_id", ["tenant_id", "id"])
+        if ensure_index(shard.engine, "users", "ix_users_email_tenant_id", ["email", "tenant_id"]):
+            # The email-only index of older databases is a prefix of the new one
+            drop_index(shard.engine, "users", "ix_users_email")
@@ -1,5 +1,6 @@
 from .tenant import Tenant, SubscriptionPlan
 from .user import User, UserRole
 from .note import Note
+from .tenant_shard import TenantShard
 
-__all__ = ["Tenant", "SubscriptionPlan", "User", "UserRole", "Note"]
\ No newline at end of file
+__all__ = ["Tenant", "SubscriptionPlan", "User", "UserRole", "Note", "TenantShard"]
\ No newline at end of file
@@ -1,10 +1,18 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
+from datetime import datetime, timezone
 from app.database import Base
 
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
 class Note(Base):
     __tablename__ = "notes"
+    __table_args__ = (
+        # Keyset pagination: WHERE tenant_id = ? AND id > ? ORDER BY id
+        Index("ix_notes_tenant_id_id", "tenant_id", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False)
@@ -12,7 +20,9 @@ class Note(Base):
     title = Column(String, nullable=False)
     content = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    # Set in Python so edits within the same second (SQLite's CURRENT_TIMESTAMP
+    # resolution) still produce a new ETag
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=_utcnow)
 
     # Relationships
     tenant = relationship("Tenant", backref="notes")
@@ -14,5 +14,9 @@ class Tenant(Base):
     slug = Column(String, unique=True, index=True, nullable=False)
     name = Column(String, nullable=False)
     subscription_plan = Column(Enum(SubscriptionPlan), default=SubscriptionPlan.FREE, nullable=False)
+    # Maintained in the same transaction as note inserts/deletes; see crud.tenant.reserve_note_quota
+    note_count = Column(Integer, default=0, server_default="0", nullable=False)
+    # Bumped by every note insert, update and delete; versions the tenant's note list for ETags
+    notes_version = Column(Integer, default=0, server_default="0", nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
\ No newline at end of file
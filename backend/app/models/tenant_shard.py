@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from app.database import Base
+
+class TenantShard(Base):
+    """
+    Shard directory, read from the default database only: tenants without a
+    row live on the default shard. Written by python -m app.utils.shards move.
+    """
+    __tablename__ = "tenant_shards"
+
+    # Not a foreign key: the tenant row lives on its shard, not necessarily here
+    tenant_id = Column(Integer, primary_key=True)
+    slug = Column(String, unique=True, index=True, nullable=False)
+    shard = Column(String, nullable=False)
+    # "moving" while a move cuts the tenant over; its writes are refused meanwhile
+    state = Column(String, nullable=False, default="active", server_default="active")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,11 +1,17 @@
 from .auth import LoginRequest, Token, TokenData
 from .tenant import Tenant, TenantCreate, TenantUpdate, UpgradeResponse
 from .user import User, UserCreate, UserUpdate, UserInDB
-from .note import Note, NoteCreate, NoteUpdate
+from .note import (
+    Note, NoteCreate, NoteUpdate, NoteListItem, NoteSearchResult,
+    NoteBulkCreate, NoteBulkUpdate, NoteBulkUpdateItem, NoteBulkDelete,
+    NoteBulkItemResult, NoteBulkResponse, NoteImportError, NoteImportJob
+)
 
 __all__ = [
     "LoginRequest", "Token", "TokenData",
     "Tenant", "TenantCreate", "TenantUpdate", "UpgradeResponse",
     "User", "UserCreate", "UserUpdate", "UserInDB",
-    "Note", "NoteCreate", "NoteUpdate"
+    "Note", "NoteCreate", "NoteUpdate", "NoteListItem", "NoteSearchResult",
+    "NoteBulkCreate", "NoteBulkUpdate", "NoteBulkUpdateItem", "NoteBulkDelete",
+    "NoteBulkItemResult", "NoteBulkResponse", "NoteImportError", "NoteImportJob"
 ]
\ No newline at end of file
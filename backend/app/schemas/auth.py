@@ -4,6 +4,8 @@ from typing import Optional
 class LoginRequest(BaseModel):
     email: str
     password: str
+    # Optional tenant hint for emails registered in more than one tenant
+    tenant_slug: Optional[str] = None
 
 class Token(BaseModel):
     access_token: str
@@ -13,4 +15,5 @@ class TokenData(BaseModel):
     email: Optional[str] = None
     tenant_id: Optional[int] = None
     user_id: Optional[int] = None
-    role: Optional[str] = None
\ No newline at end of file
+    role: Optional[str] = None
+    token_version: Optional[int] = None
\ No newline at end of file
@@ -1,6 +1,7 @@
-from pydantic import BaseModel
-from datetime import datetime
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+from app.config import NOTES_BULK_MAX_ITEMS
+from app.schemas.types import UTCDateTime
 
 class NoteBase(BaseModel):
     title: str
@@ -17,8 +18,67 @@ class Note(NoteBase):
     id: int
     tenant_id: int
     user_id: int
-    created_at: datetime
-    updated_at: datetime
+    created_at: UTCDateTime
+    updated_at: UTCDateTime
+
+    class Config:
+        from_attributes = True
+
+class NoteListItem(BaseModel):
+    """A note limited to the fields picked with GET /notes?fields= or ?view=summary"""
+    id: int
+    title: Optional[str] = None
+    content: Optional[str] = None
+    # Leading characters of content, truncated by the database
+    preview: Optional[str] = None
+    tenant_id: Optional[int] = None
+    user_id: Optional[int] = None
+    created_at: Optional[UTCDateTime] = None
+    updated_at: Optional[UTCDateTime] = None
+
+NOTE_LIST_FIELDS = tuple(NoteListItem.model_fields)
+NOTE_SUMMARY_FIELDS = ("id", "title", "preview", "created_at", "updated_at")
+
+class NoteSearchResult(Note):
+    rank: float
+    snippet: Optional[str] = None
+
+class NoteBulkCreate(BaseModel):
+    notes: List[NoteCreate] = Field(..., min_length=1, max_length=NOTES_BULK_MAX_ITEMS)
+
+class NoteBulkUpdateItem(NoteUpdate):
+    id: int
+
+class NoteBulkUpdate(BaseModel):
+    notes: List[NoteBulkUpdateItem] = Field(..., min_length=1, max_length=NOTES_BULK_MAX_ITEMS)
+
+class NoteBulkDelete(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=NOTES_BULK_MAX_ITEMS)
+
+class NoteBulkItemResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    status: Literal["created", "updated", "deleted", "not_found"]
+    note: Optional[Note] = None
+
+class NoteBulkResponse(BaseModel):
+    results: List[NoteBulkItemResult]
+
+class NoteImportError(BaseModel):
+    line: int
+    error: str
+
+class NoteImportJob(BaseModel):
+    id: str
+    status: Literal["pending", "running", "completed", "failed"]
+    format: Literal["ndjson", "csv"]
+    processed: int
+    imported: int
+    failed: int
+    errors: List[NoteImportError]
+    detail: Optional[str] = None
+    created_at: UTCDateTime
+    finished_at: Optional[UTCDateTime] = None
 
     class Config:
         from_attributes = True
\ No newline at end of file
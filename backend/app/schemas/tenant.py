@@ -1,7 +1,7 @@
 from pydantic import BaseModel
-from datetime import datetime
 from typing import Optional
 from app.models.tenant import SubscriptionPlan
+from app.schemas.types import UTCDateTime
 
 class TenantBase(BaseModel):
     slug: str
@@ -17,8 +17,9 @@ class TenantUpdate(BaseModel):
 
 class Tenant(TenantBase):
     id: int
-    created_at: datetime
-    updated_at: datetime
+    note_count: int = 0
+    created_at: UTCDateTime
+    updated_at: UTCDateTime
 
     class Config:
         from_attributes = True
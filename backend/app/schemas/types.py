@@ -0,0 +1,8 @@
+from datetime import datetime
+from typing import Annotated
+from pydantic import AfterValidator
+from app.core.http_cache import as_utc
+
+# Timestamps as aware UTC datetimes, so a note serializes the same way
+# whether it was read back (naive on SQLite) or just written in Python
+UTCDateTime = Annotated[datetime, AfterValidator(as_utc)]
@@ -1,7 +1,7 @@
 from pydantic import BaseModel
-from datetime import datetime
 from typing import Optional
 from app.models.user import UserRole
+from app.schemas.types import UTCDateTime
 
 class UserBase(BaseModel):
     email: str
@@ -18,8 +18,8 @@ class UserUpdate(BaseModel):
 class User(UserBase):
     id: int
     tenant_id: int
-    created_at: datetime
-    updated_at: datetime
+    created_at: UTCDateTime
+    updated_at: UTCDateTime
 
     class Config:
         from_attributes = True
@@ -0,0 +1,222 @@
+"""
+Bulk fixture generator for load tests and large local databases.
+
+    python -m app.utils.bulk_seed --tenants 1000 --users 10 --notes 10000 [--seed 42]
+        [--prefix load-] [--plan pro|free|mixed] [--batch-size 5000] [--replace]
+
+Tenants ({prefix}000001, ...), their users (user1@{slug}.test is the admin,
+every password is "password") and notes are written with Core insert()
+batches. The password is hashed once for all users. Notes are generated
+lazily and committed batch by batch, so memory stays flat at any volume, and
+the same seed always produces the same rows.
+"""
+import argparse
+import math
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Iterator, List, Sequence
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+from app.core.log import configure_logging, get_logger
+from app.core.security import get_password_hash
+from app.crud.search import index_notes_after, unindex_tenant_notes
+from app.database import SessionLocal, create_tables
+from app.models.note import Note
+from app.models.tenant import Tenant, SubscriptionPlan
+from app.models.user import User, UserRole
+
+logger = get_logger(__name__)
+
+WORDS = (
+    "meeting notes project deadline review customer invoice draft roadmap design "
+    "backend frontend release bug fix plan quarterly budget hiring sync follow up "
+    "action items owner status blocked done todo retro sprint demo metrics"
+).split()
+
+DEFAULT_PASSWORD = "password"
+MEDIAN_CONTENT_CHARS = 500
+MAX_CONTENT_CHARS = 20000
+# Notes draw title and content from pools this big instead of building text per row
+POOL_SIZE = 4096
+# Timestamps are spread over the year after this fixed epoch
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+# Share of tenants on the Pro plan with --plan mixed
+MIXED_PRO_SHARE = 0.2
+
+def note_title(rng: random.Random) -> str:
+    return " ".join(rng.choices(WORDS, k=rng.randint(2, 8))).capitalize()
+
+def note_content(rng: random.Random) -> str:
+    """Log-normal length: median about 500 characters, a long tail of multi-kilobyte notes"""
+    length = min(MAX_CONTENT_CHARS, int(rng.lognormvariate(math.log(MEDIAN_CONTENT_CHARS), 1.0)))
+    # Average word plus separator is about 6 characters
+    return " ".join(rng.choices(WORDS, k=max(1, length // 6)))
+
+def batched(rows: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def note_rows(
+    rng: random.Random,
+    tenant_id: int,
+    user_ids: Sequence[int],
+    count: int,
+    titles: Sequence[str],
+    contents: Sequence[str]
+) -> Iterator[dict]:
+    # Plain random() scaling is several times cheaper than choice()/randrange() per row
+    draw = rng.random
+    for _ in range(count):
+        created_at = EPOCH + timedelta(seconds=int(draw() * 365 * 86400))
+        yield {
+            "tenant_id": tenant_id,
+            "user_id": user_ids[int(draw() * len(user_ids))],
+            "title": titles[int(draw() * len(titles))],
+            "content": contents[int(draw() * len(contents))],
+            "created_at": created_at,
+            "updated_at": created_at + timedelta(seconds=int(draw() * 7 * 86400)),
+        }
+
+def drop_seeded(db: Session, prefix: str) -> None:
+    """Delete every tenant whose slug starts with prefix, with its users and notes"""
+    tenant_ids = db.scalars(select(Tenant.id).where(Tenant.slug.startswith(prefix))).all()
+    for start in range(0, len(tenant_ids), 500):
+        chunk = tenant_ids[start:start + 500]
+        unindex_tenant_notes(db, chunk)
+        db.execute(delete(Note).where(Note.tenant_id.in_(chunk)))
+        db.execute(delete(User).where(User.tenant_id.in_(chunk)))
+        db.execute(delete(Tenant).where(Tenant.id.in_(chunk)))
+        db.commit()
+
+def _plan(rng: random.Random, plan: str) -> SubscriptionPlan:
+    if plan == "mixed":
+        return SubscriptionPlan.PRO if rng.random() < MIXED_PRO_SHARE else SubscriptionPlan.FREE
+    return SubscriptionPlan(plan)
+
+def _last_note_id(db: Session) -> int:
+    return db.scalar(select(func.max(Note.id))) or 0
+
+def bulk_seed(
+    db: Session,
+    tenants: int,
+    users_per_tenant: int,
+    notes_per_tenant: int,
+    seed: int = 42,
+    prefix: str = "load-",
+    plan: str = "pro",
+    batch_size: int = 5000,
+    password: str = DEFAULT_PASSWORD
+) -> dict:
+    """
+    Insert tenants, users and notes in batches; returns row counts and timing.
+    note_count is written up front, so an interrupted run leaves drift for
+    python -m app.utils.note_counts to repair.
+    """
+    if users_per_tenant < 1:
+        raise ValueError("every tenant needs at least one user to own its notes")
+    started = time.perf_counter()
+    rng = random.Random(seed)
+    titles = [note_title(rng) for _ in range(POOL_SIZE)]
+    contents = [note_content(rng) for _ in range(POOL_SIZE)]
+    password_hash = get_password_hash(password)
+    # SQLite's search index is maintained by application code, not the database
+    index_after = _last_note_id(db) if db.get_bind().dialect.name == "sqlite" else None
+    tenants_per_chunk = max(1, min(500, batch_size // users_per_tenant))
+    # Table-level inserts skip the ORM's bulk-insert bookkeeping
+    note_insert = insert(Note.__table__)
+    notes_written = 0
+
+    for first in range(1, tenants + 1, tenants_per_chunk):
+        numbers = range(first, min(tenants, first + tenants_per_chunk - 1) + 1)
+        slugs = [f"{prefix}{number:06d}" for number in numbers]
+        db.connection().execute(insert(Tenant.__table__), [
+            {
+                "slug": slug,
+                "name": f"{prefix.rstrip('-_').title() or 'Seed'} Tenant {number}",
+                "subscription_plan": _plan(rng, plan),
+                "note_count": notes_per_tenant,
+            }
+            for number, slug in zip(numbers, slugs)
+        ])
+        tenant_ids = dict(db.execute(select(Tenant.slug, Tenant.id).where(Tenant.slug.in_(slugs))).all())
+        db.connection().execute(insert(User.__table__), [
+            {
+                "tenant_id": tenant_ids[slug],
+                "email": f"user{number}@{slug}.test",
+                "password_hash": password_hash,
+                "role": UserRole.ADMIN if number == 1 else UserRole.MEMBER,
+            }
+            for slug in slugs
+            for number in range(1, users_per_tenant + 1)
+        ])
+        user_ids = {tenant_id: [] for tenant_id in tenant_ids.values()}
+        for user_id, tenant_id in db.execute(
+            select(User.id, User.tenant_id).where(User.tenant_id.in_(list(user_ids))).order_by(User.id)
+        ):
+            user_ids[tenant_id].append(user_id)
+        db.commit()
+
+        for slug in slugs:
+            tenant_id = tenant_ids[slug]
+            rows = note_rows(rng, tenant_id, user_ids[tenant_id], notes_per_tenant, titles, contents)
+            for batch in batched(rows, batch_size):
+                db.connection().execute(note_insert, batch)
+                if index_after is not None:
+                    index_notes_after(db, index_after)
+                    index_after = _last_note_id(db)
+                db.commit()
+                notes_written += len(batch)
+        logger.info("bulk seed progress", extra={
+            "tenants": numbers[-1],
+            "notes": notes_written,
+            "notes_per_second": round(notes_written / (time.perf_counter() - started)),
+        })
+
+    return {
+        "tenants": tenants,
+        "users": tenants * users_per_tenant,
+        "notes": notes_written,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-insert synthetic tenants, users and notes")
+    parser.add_argument("--tenants", type=int, default=10)
+    parser.add_argument("--users", type=int, default=5, help="users per tenant")
+    parser.add_argument("--notes", type=int, default=1000, help="notes per tenant")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--prefix", default="load-", help="tenant slug prefix")
+    parser.add_argument("--plan", choices=["free", "pro", "mixed"], default="pro")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--replace", action="store_true", help="first delete tenants with the same prefix")
+    args = parser.parse_args()
+
+    configure_logging()
+    create_tables()
+    db = SessionLocal()
+    try:
+        if args.replace:
+            drop_seeded(db, args.prefix)
+        result = bulk_seed(
+            db,
+            tenants=args.tenants,
+            users_per_tenant=args.users,
+            notes_per_tenant=args.notes,
+            seed=args.seed,
+            prefix=args.prefix,
+            plan=args.plan,
+            batch_size=args.batch_size
+        )
+        logger.info("bulk seed completed", extra=result)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
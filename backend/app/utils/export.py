@@ -0,0 +1,87 @@
+"""
+Streaming export of a tenant's notes as NDJSON or CSV.
+
+The generators open their own session on the tenant's shard, because the
+stream outlives the request-scoped session from get_db.
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, Iterable, Iterator, Optional
+from app.config import DATABASE_ASYNC, EXPORT_BATCH_SIZE
+from app.database import resolve_tenant_placement, tenant_placement
+from app.crud import note as crud_note
+
+EXPORT_FIELDS = ["id", "user_id", "title", "content", "created_at", "updated_at"]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+def _value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def _ndjson_chunk(rows) -> bytes:
+    return "".join(
+        json.dumps(dict(zip(EXPORT_FIELDS, map(_value, row))), ensure_ascii=False) + "\n"
+        for row in rows
+    ).encode()
+
+def _csv_chunk(rows, header: bool = False) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_FIELDS)
+    writer.writerows([_value(value) for value in row] for row in rows)
+    return buffer.getvalue().encode()
+
+def _format_chunk(fmt: str, rows) -> bytes:
+    return _csv_chunk(rows) if fmt == "csv" else _ndjson_chunk(rows)
+
+def _preamble(fmt: str) -> bytes:
+    return _csv_chunk([], header=True) if fmt == "csv" else b""
+
+def _sync_export(tenant_id: int, fmt: str, after_id: Optional[int]) -> Iterator[bytes]:
+    db = tenant_placement(tenant_id).shard.SessionLocal()
+    try:
+        yield _preamble(fmt)
+        for rows in crud_note.iter_note_rows(db, tenant_id, after_id, EXPORT_BATCH_SIZE):
+            yield _format_chunk(fmt, rows)
+    finally:
+        db.close()
+
+async def _async_export(tenant_id: int, fmt: str, after_id: Optional[int]) -> AsyncIterator[bytes]:
+    from app.crud.aio import note as aio_note
+
+    placement = await resolve_tenant_placement(tenant_id)
+    async with placement.shard.AsyncSessionLocal() as db:
+        yield _preamble(fmt)
+        async for rows in aio_note.iter_note_rows(db, tenant_id, after_id, EXPORT_BATCH_SIZE):
+            yield _format_chunk(fmt, rows)
+
+def _gzip(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(wbits=31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+async def _agzip(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(wbits=31)
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+def export_notes(tenant_id: int, fmt: str, after_id: Optional[int] = None, gzip: bool = False):
+    """Byte stream of the tenant's notes ordered by id, starting after after_id"""
+    if DATABASE_ASYNC:
+        stream = _async_export(tenant_id, fmt, after_id)
+        return _agzip(stream) if gzip else stream
+    stream = _sync_export(tenant_id, fmt, after_id)
+    return _gzip(stream) if gzip else stream
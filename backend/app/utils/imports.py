@@ -0,0 +1,141 @@
+"""
+Background import of notes from an uploaded NDJSON or CSV file.
+
+The upload is spooled to a temporary file, then parsed line by line and
+inserted in IMPORT_CHUNK_SIZE batches, each committed on its own, so
+neither the file nor the request has to stay in memory or open.
+"""
+import csv
+import io
+import json
+import os
+import tempfile
+import threading
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Iterator, List, Optional, Tuple
+from pydantic import ValidationError
+from app.config import IMPORT_CHUNK_SIZE, IMPORT_JOB_TTL_SECONDS
+from app.core.cache import TTLCache
+from app.database import ShardPlacement, tenant_placement
+from app.crud import note as crud_note
+from app.schemas.note import NoteCreate
+
+MAX_REPORTED_ERRORS = 100
+
+@dataclass
+class ImportJob:
+    id: str
+    tenant_id: int
+    user_id: int
+    format: str
+    status: str = "pending"
+    processed: int = 0
+    imported: int = 0
+    failed: int = 0
+    errors: List[dict] = field(default_factory=list)
+    detail: Optional[str] = None
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    finished_at: Optional[datetime] = None
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record_error(self, line: int, error: str) -> None:
+        with self._lock:
+            self.failed += 1
+            if len(self.errors) < MAX_REPORTED_ERRORS:
+                self.errors.append({"line": line, "error": error})
+
+    def finish(self, status: str, detail: Optional[str] = None) -> None:
+        self.status = status
+        self.detail = detail
+        self.finished_at = datetime.now(timezone.utc)
+
+# Finished jobs are kept for IMPORT_JOB_TTL_SECONDS so clients can poll the result
+import_jobs = TTLCache(maxsize=10000, ttl=IMPORT_JOB_TTL_SECONDS)
+
+def create_import_job(tenant_id: int, user_id: int, fmt: str) -> ImportJob:
+    job = ImportJob(id=uuid.uuid4().hex, tenant_id=tenant_id, user_id=user_id, format=fmt)
+    import_jobs.set(job.id, job)
+    return job
+
+def get_import_job(job_id: str, tenant_id: int) -> Optional[ImportJob]:
+    job = import_jobs.get(job_id)
+    if job is None or job.tenant_id != tenant_id:
+        return None
+    return job
+
+async def spool_upload(upload, suffix: str = "") -> str:
+    """Copy an UploadFile to a private temp file the background job can own"""
+    fd, path = tempfile.mkstemp(prefix="notes-import-", suffix=suffix)
+    with os.fdopen(fd, "wb") as out:
+        while chunk := await upload.read(1 << 20):
+            out.write(chunk)
+    return path
+
+def _describe(error: Exception) -> str:
+    if isinstance(error, ValidationError):
+        first = error.errors()[0]
+        location = ".".join(str(part) for part in first["loc"])
+        return f"{location}: {first['msg']}" if location else first["msg"]
+    return str(error)
+
+def _parse_ndjson(stream: io.TextIOBase) -> Iterator[Tuple[int, Optional[NoteCreate], Optional[str]]]:
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, NoteCreate.model_validate(json.loads(line)), None
+        except (ValueError, ValidationError) as e:
+            yield line_number, None, _describe(e)
+
+def _parse_csv(stream: io.TextIOBase) -> Iterator[Tuple[int, Optional[NoteCreate], Optional[str]]]:
+    reader = csv.DictReader(stream)
+    for row in reader:
+        line_number = reader.line_num
+        try:
+            yield line_number, NoteCreate(title=row.get("title"), content=row.get("content") or None), None
+        except ValidationError as e:
+            yield line_number, None, _describe(e)
+
+def _chunks(records, size: int, job: ImportJob) -> Iterator[List[NoteCreate]]:
+    chunk = []
+    for line_number, note, error in records:
+        job.processed += 1
+        if error is not None:
+            job.record_error(line_number, error)
+            continue
+        chunk.append(note)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def run_import_job(job: ImportJob, path: str) -> None:
+    """Parse the spooled upload and insert it chunk by chunk (runs as a background task)"""
+    job.status = "running"
+    shard = tenant_placement(job.tenant_id).shard
+    db = shard.SessionLocal()
+    try:
+        with open(path, encoding="utf-8-sig", newline="") as stream:
+            records = _parse_csv(stream) if job.format == "csv" else _parse_ndjson(stream)
+            for chunk in _chunks(records, IMPORT_CHUNK_SIZE, job):
+                # Bypasses get_db, so check for a shard move before every commit
+                if tenant_placement(job.tenant_id) != ShardPlacement(shard):
+                    job.failed += len(chunk)
+                    job.finish("failed", "Tenant is being moved to another database; retry the import afterwards")
+                    return
+                notes = crud_note.create_notes_bulk(db, chunk, user_id=job.user_id, tenant_id=job.tenant_id)
+                if notes is None:
+                    job.failed += len(chunk)
+                    job.finish("failed", "Note limit reached for current subscription plan")
+                    return
+                job.imported += len(notes)
+        job.finish("completed")
+    except Exception as e:
+        db.rollback()
+        job.finish("failed", str(e))
+    finally:
+        db.close()
+        os.remove(path)
@@ -0,0 +1,31 @@
+"""
+Reconciliation for the denormalized tenants.note_count column.
+
+Run periodically (e.g. from cron) to repair drift:
+    python -m app.utils.note_counts
+"""
+from app.database import ensure_column, shards
+from app.crud.tenant import reconcile_note_counts
+from app.core.log import configure_logging, get_logger
+
+logger = get_logger(__name__)
+
+def ensure_note_count_column(engine) -> bool:
+    """Add tenants.note_count to databases created before it existed; True if it was added"""
+    return ensure_column(engine, "tenants", "note_count", "INTEGER NOT NULL DEFAULT 0")
+
+def reconcile_shard_note_counts(shard) -> int:
+    db = shard.SessionLocal()
+    try:
+        fixed = reconcile_note_counts(db)
+        logger.info("note counts reconciled", extra={"shard": shard.name, "tenants_fixed": fixed})
+        return fixed
+    finally:
+        db.close()
+
+def reconcile_all_note_counts() -> int:
+    return sum(reconcile_shard_note_counts(shard) for shard in shards.values())
+
+if __name__ == "__main__":
+    configure_logging()
+    reconcile_all_note_counts()
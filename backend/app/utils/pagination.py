@@ -0,0 +1,22 @@
+import base64
+import json
+from typing import Optional
+from app.core.exceptions import InvalidCursor
+
+def encode_cursor(last_id: int) -> str:
+    """Opaque cursor pointing just past the given note id"""
+    raw = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: Optional[str]) -> Optional[int]:
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        last_id = payload["id"]
+    except (ValueError, KeyError, TypeError):
+        raise InvalidCursor()
+    if not isinstance(last_id, int):
+        raise InvalidCursor()
+    return last_id
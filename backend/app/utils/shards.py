@@ -0,0 +1,375 @@
+"""
+Shard administration: where tenants live, and moving a tenant to another
+shard while it keeps serving traffic.
+
+    python -m app.utils.shards status
+    python -m app.utils.shards init
+    python -m app.utils.shards move <tenant-slug> <shard> [--batch-size 1000] [--max-passes 10]
+        [--grace-seconds 5] [--drain-seconds N] [--keep-source]
+    python -m app.utils.shards cleanup <tenant-slug> <shard>
+
+A move runs in three phases:
+
+    copy      the tenant row, its users and notes are copied to the target
+              in id order while the tenant keeps working on the source;
+    catch-up  further passes copy what changed meanwhile (new and updated
+              rows by id and updated_at, deleted rows by missing id) until
+              a pass finds nothing to do, or --max-passes;
+    cutover   the directory marks the tenant "moving", which pauses its
+              writes (503 with Retry-After) once every process's cached
+              placement has expired; a final pass copies the rest, the
+              directory points the tenant at the target and writes resume.
+
+After --drain-seconds the tenant's notes and users are deleted from the
+source (or later with `cleanup`, given --keep-source). The emptied tenant
+row stays behind so the source never issues its id again.
+
+Rows keep their ids, so shards must not issue overlapping ones: `init`
+starts each PostgreSQL shard's sequences at its index * SHARD_ID_BLOCK.
+SQLite continues after the largest id present, so a move onto ids the
+target already uses is refused rather than merged.
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import delete, func, select, text, update, bindparam
+from sqlalchemy.orm import Session
+from app.config import SHARD_ID_BLOCK, SHARD_MAP_TTL_SECONDS
+from app.core.log import configure_logging, get_logger
+from app.crud.search import index_notes, unindex_notes
+from app.database import SessionLocal, Shard, create_tables, default_shard, shards
+from app.models.note import Note
+from app.models.tenant import Tenant
+from app.models.tenant_shard import TenantShard
+from app.models.user import User
+
+logger = get_logger(__name__)
+
+# Copied parents first; deletes run in reverse
+TENANT_TABLES = (Tenant.__table__, User.__table__, Note.__table__)
+# Largest id a 32-bit INTEGER primary key can hold
+MAX_ID = 2**31 - 1
+
+class ShardMoveError(Exception):
+    """A move that cannot go ahead; the tenant stays where it was"""
+
+def _tenant_clause(table, tenant_id: int):
+    return table.c.id == tenant_id if table is Tenant.__table__ else table.c.tenant_id == tenant_id
+
+def _compared_columns(table) -> list:
+    # Notes get updated_at from Python on every change; small tables compare whole rows
+    if table is Note.__table__:
+        return [table.c.id, table.c.updated_at]
+    return list(table.c)
+
+def _comparable(value):
+    # SQLite returns naive datetimes where PostgreSQL returns aware ones
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def _versions(db: Session, table, tenant_id: int, after: int, upto: Optional[int]) -> Dict[int, tuple]:
+    query = select(*_compared_columns(table)).where(_tenant_clause(table, tenant_id), table.c.id > after)
+    if upto is not None:
+        query = query.where(table.c.id <= upto)
+    return {row.id: tuple(map(_comparable, row)) for row in db.execute(query)}
+
+def _with_copied_authors(target: Session, rows: list) -> Tuple[list, int]:
+    """
+    Notes whose user already exists on the target, and how many were held
+    back: a user created after this pass copied users arrives next pass
+    """
+    author_ids = {row.user_id for row in rows}
+    copied = set(target.scalars(select(User.id).where(User.id.in_(author_ids))).all())
+    kept = [row for row in rows if row.user_id in copied]
+    return kept, len(rows) - len(kept)
+
+def _sync_table(source: Session, target: Session, table, tenant_id: int, batch_size: int) -> Tuple[dict, List[int]]:
+    """
+    Make the target's rows of one table match the source for the tenant,
+    batch by batch in id order. Returns the counts and the ids to delete,
+    which the caller removes child tables first.
+    """
+    counts = {"inserted": 0, "updated": 0, "deferred": 0}
+    gone: List[int] = []
+    after = 0
+    while True:
+        source_ids = source.scalars(
+            select(table.c.id).where(_tenant_clause(table, tenant_id), table.c.id > after)
+            .order_by(table.c.id).limit(batch_size)
+        ).all()
+        # The last batch is open-ended so it also covers target rows past the source's last id
+        upto = source_ids[-1] if len(source_ids) == batch_size else None
+        wanted = _versions(source, table, tenant_id, after, upto)
+        present = _versions(target, table, tenant_id, after, upto)
+        missing = [row_id for row_id in wanted if row_id not in present]
+        changed = [row_id for row_id in wanted if row_id in present and wanted[row_id] != present[row_id]]
+        gone.extend(row_id for row_id in present if row_id not in wanted)
+
+        if missing:
+            taken = target.scalars(select(table.c.id).where(table.c.id.in_(missing))).all()
+            if taken:
+                raise ShardMoveError(
+                    f"{table.name} ids {sorted(taken)[:10]} already exist on the target for another tenant"
+                )
+        if missing or changed:
+            rows = source.execute(select(table).where(table.c.id.in_(missing + changed))).all()
+            if table is Note.__table__:
+                rows, deferred = _with_copied_authors(target, rows)
+                counts["deferred"] += deferred
+            by_id = {row.id: row._asdict() for row in rows}
+            if missing:
+                target.execute(table.insert(), [by_id[row_id] for row_id in missing if row_id in by_id])
+            if changed:
+                target.execute(
+                    update(table).where(table.c.id == bindparam("_id")),
+                    [{"_id": row_id, **by_id[row_id]} for row_id in changed if row_id in by_id]
+                )
+            if table is Note.__table__:
+                index_notes(target, rows)
+            target.commit()
+            counts["inserted"] += sum(row_id in by_id for row_id in missing)
+            counts["updated"] += sum(row_id in by_id for row_id in changed)
+        if upto is None:
+            return counts, gone
+        after = upto
+
+def sync_tenant(source: Session, target: Session, tenant_id: int, batch_size: int = 1000) -> Dict[str, dict]:
+    """One copy/catch-up pass; returns inserted/updated/deleted counts per table"""
+    result = {}
+    gone = {}
+    for table in TENANT_TABLES:
+        result[table.name], gone[table.name] = _sync_table(source, target, table, tenant_id, batch_size)
+    for table in reversed(TENANT_TABLES):
+        ids = gone[table.name]
+        for start in range(0, len(ids), batch_size):
+            chunk = ids[start:start + batch_size]
+            if table is Note.__table__:
+                unindex_notes(target, chunk)
+            target.execute(delete(table).where(table.c.id.in_(chunk)))
+        target.commit()
+        result[table.name]["deleted"] = len(ids)
+    # End the read transaction so the next pass sees every write committed since
+    source.rollback()
+    return result
+
+def _changes(result: Dict[str, dict]) -> int:
+    return sum(sum(counts.values()) for counts in result.values())
+
+def _directory_entry(db: Session, slug: str) -> Optional[TenantShard]:
+    return db.query(TenantShard).filter(TenantShard.slug == slug).first()
+
+def _place(tenant_id: int, slug: str, shard: str, state: str) -> None:
+    """Write the tenant's directory entry in the default database"""
+    db = SessionLocal()
+    try:
+        entry = db.get(TenantShard, tenant_id)
+        if entry is None:
+            entry = TenantShard(tenant_id=tenant_id, slug=slug)
+            db.add(entry)
+        entry.shard = shard
+        entry.state = state
+        db.commit()
+    finally:
+        db.close()
+
+def _current_shard(slug: str) -> Shard:
+    db = SessionLocal()
+    try:
+        entry = _directory_entry(db, slug)
+    finally:
+        db.close()
+    return shards[entry.shard] if entry is not None else default_shard
+
+def drop_tenant_data(db: Session, tenant_id: int, batch_size: int = 1000) -> int:
+    """
+    Delete a tenant's notes and users from a shard it has left, in batches.
+    The tenant row stays (with note_count 0) so its id is never reissued.
+    """
+    deleted = 0
+    while True:
+        ids = db.scalars(select(Note.id).where(Note.tenant_id == tenant_id).limit(batch_size)).all()
+        if not ids:
+            break
+        unindex_notes(db, ids)
+        db.execute(delete(Note).where(Note.id.in_(ids)))
+        db.commit()
+        deleted += len(ids)
+    db.execute(delete(User).where(User.tenant_id == tenant_id))
+    db.execute(update(Tenant).where(Tenant.id == tenant_id).values(note_count=0))
+    db.commit()
+    return deleted
+
+def move_tenant(
+    slug: str,
+    target_name: str,
+    batch_size: int = 1000,
+    max_passes: int = 10,
+    grace_seconds: float = 5.0,
+    drain_seconds: Optional[float] = None,
+    keep_source: bool = False
+) -> dict:
+    """Copy, catch up and cut a tenant over to another shard; returns per-phase timings and counts"""
+    if target_name not in shards:
+        raise ShardMoveError(f"unknown shard {target_name!r}; configured: {', '.join(shards)}")
+    target = shards[target_name]
+    source = _current_shard(slug)
+    if source is target:
+        raise ShardMoveError(f"tenant {slug!r} already lives on {target_name!r}")
+    # Long enough for every process to drop its cached placement and finish in-flight writes
+    pause = SHARD_MAP_TTL_SECONDS + grace_seconds
+    drain_seconds = pause if drain_seconds is None else drain_seconds
+
+    started = time.perf_counter()
+    source_db = source.SessionLocal()
+    target_db = target.SessionLocal()
+    try:
+        tenant_id = source_db.scalar(select(Tenant.id).where(Tenant.slug == slug))
+        if tenant_id is None:
+            raise ShardMoveError(f"tenant {slug!r} not found on {source.name!r}")
+        log_extra = {"tenant_id": tenant_id, "source": source.name, "target": target.name}
+
+        passes = []
+        while len(passes) < max_passes:
+            result = sync_tenant(source_db, target_db, tenant_id, batch_size)
+            passes.append(result)
+            logger.info("shard move pass", extra={**log_extra, "pass": len(passes), **result})
+            # The first pass is the bulk copy; stop catching up once a pass had nothing left
+            if len(passes) > 1 and _changes(result) == 0:
+                break
+
+        cutover_started = time.perf_counter()
+        _place(tenant_id, slug, source.name, "moving")
+        logger.info("shard move cutover: writes paused", extra={**log_extra, "wait_seconds": pause})
+        cut_over = False
+        try:
+            time.sleep(pause)
+            final = sync_tenant(source_db, target_db, tenant_id, batch_size)
+            # With writes paused a second pass must find nothing; anything else means a writer slipped through
+            check = sync_tenant(source_db, target_db, tenant_id, batch_size)
+            if _changes(check):
+                raise ShardMoveError(
+                    "the tenant was still written during cutover; "
+                    "is SHARD_MAP_TTL_SECONDS the same for every process?"
+                )
+            _place(tenant_id, slug, target.name, "active")
+            cut_over = True
+        finally:
+            if not cut_over:
+                _place(tenant_id, slug, source.name, "active")
+                logger.warning("shard move aborted: writes resumed on source", extra=log_extra)
+        writes_paused = time.perf_counter() - cutover_started
+        logger.info("shard move cutover: complete", extra={**log_extra, "writes_paused_seconds": round(writes_paused, 3)})
+
+        dropped = None
+        if not keep_source:
+            # Processes that still cache the old placement keep reading the source meanwhile
+            time.sleep(drain_seconds)
+            dropped = drop_tenant_data(source_db, tenant_id, batch_size)
+        return {
+            **log_extra,
+            "passes": len(passes) + 2,
+            "copied": passes[0],
+            "final_pass": final,
+            "writes_paused_seconds": round(writes_paused, 3),
+            "source_notes_dropped": dropped,
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+    finally:
+        source_db.close()
+        target_db.close()
+
+def cleanup_tenant(slug: str, shard_name: str, batch_size: int = 1000) -> int:
+    """Delete a moved tenant's leftover notes and users from a shard it no longer lives on"""
+    shard = shards[shard_name]
+    if _current_shard(slug) is shard:
+        raise ShardMoveError(f"tenant {slug!r} lives on {shard_name!r}; refusing to delete its data")
+    db = shard.SessionLocal()
+    try:
+        tenant_id = db.scalar(select(Tenant.id).where(Tenant.slug == slug))
+        if tenant_id is None:
+            raise ShardMoveError(f"tenant {slug!r} has no rows on {shard_name!r}")
+        return drop_tenant_data(db, tenant_id, batch_size)
+    finally:
+        db.close()
+
+def init_shards() -> None:
+    """
+    Create the schema on every shard and move each PostgreSQL shard's id
+    sequences to the start of its block, so shards never issue the same id
+    """
+    create_tables()
+    for shard in shards.values():
+        start = shard.index * SHARD_ID_BLOCK
+        if start + SHARD_ID_BLOCK - 1 > MAX_ID:
+            raise ValueError(f"shard {shard.name!r} id block exceeds {MAX_ID}; lower SHARD_ID_BLOCK")
+        if shard.index == 0 or shard.engine.dialect.name != "postgresql":
+            continue
+        with shard.engine.begin() as conn:
+            for table in TENANT_TABLES:
+                sequence = conn.scalar(text("SELECT pg_get_serial_sequence(:table, 'id')"), {"table": table.name})
+                if conn.scalar(text(f"SELECT last_value FROM {sequence}")) < start:
+                    conn.execute(text("SELECT setval(:sequence, :start, false)"), {"sequence": sequence, "start": start})
+        logger.info("shard initialized", extra={"shard": shard.name, "first_id": start})
+
+def shard_status() -> dict:
+    """Directory entries and tenant, user and note counts per shard"""
+    db = SessionLocal()
+    try:
+        directory = [
+            {"tenant_id": entry.tenant_id, "slug": entry.slug, "shard": entry.shard, "state": entry.state}
+            for entry in db.query(TenantShard).order_by(TenantShard.tenant_id)
+        ]
+    finally:
+        db.close()
+    counts = {}
+    for shard in shards.values():
+        with shard.engine.connect() as conn:
+            counts[shard.name] = {
+                table.name: conn.scalar(select(func.count()).select_from(table))
+                for table in TENANT_TABLES
+            }
+    return {"directory": directory, "shards": counts}
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect shards and move tenants between them")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status", help="directory entries and row counts per shard")
+    commands.add_parser("init", help="create tables on every shard and set PostgreSQL id blocks")
+    move = commands.add_parser("move", help="move a tenant to another shard online")
+    move.add_argument("slug")
+    move.add_argument("shard")
+    move.add_argument("--batch-size", type=int, default=1000)
+    move.add_argument("--max-passes", type=int, default=10, help="copy plus catch-up passes before cutover")
+    move.add_argument("--grace-seconds", type=float, default=5.0, help="extra wait for in-flight writes at cutover")
+    move.add_argument("--drain-seconds", type=float, help="wait before deleting source rows (default: the cutover wait)")
+    move.add_argument("--keep-source", action="store_true", help="leave source rows for a later `cleanup`")
+    cleanup = commands.add_parser("cleanup", help="delete a moved tenant's leftover rows from a shard")
+    cleanup.add_argument("slug")
+    cleanup.add_argument("shard")
+    args = parser.parse_args()
+
+    configure_logging()
+    if args.command == "status":
+        print(json.dumps(shard_status(), indent=2))
+    elif args.command == "init":
+        init_shards()
+    elif args.command == "move":
+        result = move_tenant(
+            args.slug,
+            args.shard,
+            batch_size=args.batch_size,
+            max_passes=args.max_passes,
+            grace_seconds=args.grace_seconds,
+            drain_seconds=args.drain_seconds,
+            keep_source=args.keep_source
+        )
+        logger.info("shard move completed", extra=result)
+    else:
+        dropped = cleanup_tenant(args.slug, args.shard)
+        logger.info("shard cleanup completed", extra={"slug": args.slug, "shard": args.shard, "notes": dropped})
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Reproducible synthetic datasets for the load benchmark.
+
+The rows come from app.utils.bulk_seed under the bench- slug prefix, on the
+Pro plan so creates are never refused by the Free plan limit. Only bench-*
+tenants are ever deleted, so a dataset can be built in a database that also
+holds real tenants.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.models.note import Note
+from app.models.tenant import Tenant
+from app.models.user import User
+from app.utils.bulk_seed import DEFAULT_PASSWORD as PASSWORD, bulk_seed, drop_seeded, note_content, note_title
+
+SLUG_PREFIX = "bench-"
+
+@dataclass
+class Dataset:
+    # {"id", "slug"} per tenant
+    tenants: List[dict] = field(default_factory=list)
+    # {"id", "email", "tenant_id", "tenant_slug"} per user
+    users: List[dict] = field(default_factory=list)
+    # Note ids per tenant id
+    note_ids: Dict[int, List[int]] = field(default_factory=dict)
+
+    def describe(self) -> dict:
+        return {
+            "tenants": len(self.tenants),
+            "users": len(self.users),
+            "notes": sum(len(ids) for ids in self.note_ids.values()),
+        }
+
+def drop_dataset(db: Session) -> None:
+    """Delete every bench-* tenant with its users and notes"""
+    drop_seeded(db, SLUG_PREFIX)
+
+def load_dataset(db: Session) -> Dataset:
+    """The bench-* rows already in the database"""
+    dataset = Dataset()
+    for tenant_id, slug in db.execute(
+        select(Tenant.id, Tenant.slug).where(Tenant.slug.startswith(SLUG_PREFIX)).order_by(Tenant.id)
+    ):
+        dataset.tenants.append({"id": tenant_id, "slug": slug})
+        dataset.note_ids[tenant_id] = []
+    if not dataset.tenants:
+        return dataset
+
+    slugs = {tenant["id"]: tenant["slug"] for tenant in dataset.tenants}
+    for user_id, email, tenant_id in db.execute(
+        select(User.id, User.email, User.tenant_id).where(User.tenant_id.in_(slugs)).order_by(User.id)
+    ):
+        dataset.users.append({"id": user_id, "email": email, "tenant_id": tenant_id, "tenant_slug": slugs[tenant_id]})
+    for note_id, tenant_id in db.execute(
+        select(Note.id, Note.tenant_id).where(Note.tenant_id.in_(slugs)).order_by(Note.id)
+    ):
+        dataset.note_ids[tenant_id].append(note_id)
+    return dataset
+
+def build_dataset(
+    db: Session,
+    tenants: int,
+    users_per_tenant: int,
+    notes_per_tenant: int,
+    seed: int = 42,
+    batch_size: int = 1000
+) -> Dataset:
+    """Replace any bench-* rows with a freshly generated dataset"""
+    drop_dataset(db)
+    bulk_seed(
+        db,
+        tenants=tenants,
+        users_per_tenant=users_per_tenant,
+        notes_per_tenant=notes_per_tenant,
+        seed=seed,
+        prefix=SLUG_PREFIX,
+        plan="pro",
+        batch_size=batch_size
+    )
+    return load_dataset(db)
@@ -0,0 +1,385 @@
+"""
+Load benchmark: drive the notes API with a weighted request mix against a
+synthetic dataset and report throughput and p50/p95/p99 latency per operation.
+
+    python -m benchmarks.load [--server inprocess|uvicorn] [--workers 1]
+        [--database-url URL] [--async] [--mix read|mixed|write|login|list=60,get=40]
+        [--requests 2000 | --duration 30] [--concurrency 16]
+        [--tenants 4] [--users 5] [--notes 500] [--seed 42] [--reuse]
+        [--output results.json] [--baseline previous.json]
+
+"inprocess" calls the ASGI app directly (no sockets, one event loop shared
+with the clients); "uvicorn" starts real server processes. Each client logs
+in once as its own dataset user and then issues requests from the mix.
+Rate limiting is switched off for the run. Results are written as JSON
+(by default under benchmarks/results/), so runs against SQLite and Postgres,
+sync and async can be compared with --baseline.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+MIXES = {
+    "read": {"list": 45, "get": 45, "create": 5, "update": 5},
+    "mixed": {"list": 30, "get": 30, "create": 15, "update": 15, "delete": 10},
+    "write": {"create": 40, "update": 40, "delete": 20},
+    "login": {"login": 100},
+}
+OPERATIONS = ("login", "list", "get", "create", "update", "delete")
+
+def parse_mix(value: str) -> Dict[str, int]:
+    if value in MIXES:
+        return MIXES[value]
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS or not weight.strip().isdigit():
+            raise argparse.ArgumentTypeError(f"invalid mix entry {part!r}; use e.g. list=60,get=40")
+        mix[name] = int(weight)
+    return mix
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    rank = max(1, round(fraction * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+class Recorder:
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self.statuses: Dict[str, Dict[str, int]] = {}
+        self.errors: Dict[str, int] = {}
+
+    def record(self, operation: str, status: int, seconds: float) -> None:
+        self.samples.setdefault(operation, []).append(seconds)
+        statuses = self.statuses.setdefault(operation, {})
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+        if status >= 400:
+            self.errors[operation] = self.errors.get(operation, 0) + 1
+
+    @staticmethod
+    def _summarize(samples: List[float], errors: int, elapsed: float) -> dict:
+        ordered = sorted(samples)
+        return {
+            "count": len(ordered),
+            "errors": errors,
+            "throughput_rps": round(len(ordered) / elapsed, 2) if elapsed else 0.0,
+            "mean_ms": round(1000 * sum(ordered) / len(ordered), 3) if ordered else 0.0,
+            "p50_ms": round(1000 * percentile(ordered, 0.50), 3),
+            "p95_ms": round(1000 * percentile(ordered, 0.95), 3),
+            "p99_ms": round(1000 * percentile(ordered, 0.99), 3),
+            "max_ms": round(1000 * ordered[-1], 3) if ordered else 0.0,
+        }
+
+    def summary(self, elapsed: float) -> dict:
+        everything = [sample for samples in self.samples.values() for sample in samples]
+        result = self._summarize(everything, sum(self.errors.values()), elapsed)
+        result["duration_seconds"] = round(elapsed, 3)
+        return result
+
+    def operations(self, elapsed: float) -> dict:
+        return {
+            operation: {
+                **self._summarize(samples, self.errors.get(operation, 0), elapsed),
+                "statuses": self.statuses[operation],
+            }
+            for operation, samples in sorted(self.samples.items())
+        }
+
+class Client:
+    """One virtual user: logs in once, then runs operations from the mix"""
+
+    def __init__(self, http, user: dict, note_ids: List[int], rng: random.Random):
+        self.http = http
+        self.user = user
+        # Shared with every client of the same tenant
+        self.note_ids = note_ids
+        self.created: List[int] = []
+        self.rng = rng
+        self.headers: Dict[str, str] = {}
+
+    async def login(self):
+        from benchmarks.dataset import PASSWORD
+        return await self.http.post("/auth/login", json={
+            "email": self.user["email"],
+            "password": PASSWORD,
+            "tenant_slug": self.user["tenant_slug"],
+        })
+
+    async def authenticate(self) -> None:
+        response = await self.login()
+        response.raise_for_status()
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    def _note_body(self) -> dict:
+        from benchmarks.dataset import note_content, note_title
+        return {"title": note_title(self.rng), "content": note_content(self.rng)}
+
+    async def run(self, operation: str):
+        """Issue one request; returns (operation actually run, response)"""
+        if operation == "delete" and not self.created:
+            # Only notes this client created are deleted, so the dataset survives
+            operation = "create"
+        if operation in ("get", "update") and not self.note_ids:
+            operation = "create"
+
+        if operation == "login":
+            response = await self.login()
+        elif operation == "list":
+            response = await self.http.get("/notes", params={"limit": 20}, headers=self.headers)
+        elif operation == "get":
+            response = await self.http.get(f"/notes/{self.rng.choice(self.note_ids)}", headers=self.headers)
+        elif operation == "update":
+            note_id = self.rng.choice(self.note_ids)
+            response = await self.http.put(f"/notes/{note_id}", json=self._note_body(), headers=self.headers)
+        elif operation == "create":
+            response = await self.http.post("/notes", json=self._note_body(), headers=self.headers)
+            if response.status_code == 200:
+                note_id = response.json()["id"]
+                self.created.append(note_id)
+                self.note_ids.append(note_id)
+        else:
+            note_id = self.created.pop(self.rng.randrange(len(self.created)))
+            response = await self.http.delete(f"/notes/{note_id}", headers=self.headers)
+            if note_id in self.note_ids:
+                self.note_ids.remove(note_id)
+        return operation, response
+
+async def drive(http, dataset, args) -> dict:
+    users = dataset.users
+    if not users:
+        raise SystemExit("the dataset has no users; run without --reuse to build one")
+    clients = []
+    for index in range(args.concurrency):
+        user = users[index % len(users)]
+        clients.append(Client(http, user, dataset.note_ids[user["tenant_id"]], random.Random(args.seed + index)))
+    started = time.perf_counter()
+    await asyncio.gather(*(client.authenticate() for client in clients))
+    login_seconds = time.perf_counter() - started
+
+    names = list(args.mix)
+    weights = [args.mix[name] for name in names]
+    recorder = Recorder()
+    budget = {"warmup": args.warmup, "requests": args.requests}
+    deadline: Optional[float] = None
+
+    async def worker(client: Client, phase: str) -> None:
+        while True:
+            if phase == "requests" and deadline is not None:
+                if time.perf_counter() >= deadline:
+                    return
+            elif budget[phase] <= 0:
+                return
+            else:
+                budget[phase] -= 1
+            operation = client.rng.choices(names, weights)[0]
+            request_started = time.perf_counter()
+            operation, response = await client.run(operation)
+            if phase == "requests":
+                recorder.record(operation, response.status_code, time.perf_counter() - request_started)
+
+    await asyncio.gather(*(worker(client, "warmup") for client in clients))
+    if args.duration:
+        deadline = time.perf_counter() + args.duration
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(client, "requests") for client in clients))
+    elapsed = time.perf_counter() - started
+    return {
+        "setup_login_seconds": round(login_seconds, 3),
+        "summary": recorder.summary(elapsed),
+        "operations": recorder.operations(elapsed),
+    }
+
+async def run_inprocess(dataset, args) -> dict:
+    import httpx
+    from main import app
+    from app.database import dispose_async_engines
+    from app.core.log import shutdown_logging
+
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as http:
+            return await drive(http, dataset, args)
+    finally:
+        await dispose_async_engines()
+        shutdown_logging()
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+async def _wait_until_up(http, timeout: float) -> None:
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            if (await http.get("/health")).status_code == 200:
+                return
+        except Exception:
+            if time.perf_counter() >= deadline:
+                raise
+        await asyncio.sleep(0.2)
+
+async def run_uvicorn(dataset, args) -> dict:
+    import httpx
+    port = _free_port()
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(args.workers), "--log-level", "warning", "--no-access-log",
+        ],
+        cwd=BACKEND_DIR,
+        env=os.environ.copy(),
+    )
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=60, limits=limits) as http:
+            await _wait_until_up(http, timeout=60)
+            return await drive(http, dataset, args)
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+def prepare_dataset(args):
+    from app.database import SessionLocal, create_tables
+    from benchmarks.dataset import build_dataset, load_dataset
+
+    create_tables()
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        if args.reuse:
+            dataset = load_dataset(db)
+        else:
+            dataset = build_dataset(db, args.tenants, args.users, args.notes, seed=args.seed)
+        return dataset, time.perf_counter() - started
+    finally:
+        db.close()
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(baseline: dict, result: dict) -> None:
+    """Print throughput and p95 change per operation against an earlier run"""
+    print(f"--- vs {baseline.get('label')} ({baseline.get('git_commit')}) ---")
+    rows = [("all", baseline["summary"], result["summary"])]
+    rows += [
+        (operation, baseline["operations"][operation], stats)
+        for operation, stats in result["operations"].items()
+        if operation in baseline["operations"]
+    ]
+    for name, before, after in rows:
+        changes = []
+        for key in ("throughput_rps", "p95_ms"):
+            change = 100 * (after[key] - before[key]) / before[key] if before[key] else 0.0
+            changes.append(f"{key} {before[key]} -> {after[key]} ({change:+.1f}%)")
+        print(f"{name:>8}: " + ", ".join(changes))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--server", choices=["inprocess", "uvicorn"], default="inprocess")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--database-url", help="defaults to DATABASE_URL")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="serve through AsyncSession")
+    parser.add_argument("--mix", type=parse_mix, default="read", help=f"one of {', '.join(MIXES)} or op=weight,...")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--duration", type=float, help="run for this many seconds instead of --requests")
+    parser.add_argument("--warmup", type=int, default=100, help="unrecorded requests before measuring")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--tenants", type=int, default=4)
+    parser.add_argument("--users", type=int, default=5, help="users per tenant")
+    parser.add_argument("--notes", type=int, default=500, help="notes per tenant")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reuse", action="store_true", help="use the bench-* rows already in the database")
+    parser.add_argument("--label", help="free-form name stored with the results")
+    parser.add_argument("--output", type=Path, help="results file (default: benchmarks/results/<label>.json)")
+    parser.add_argument("--baseline", type=Path, help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    # Settings are read at import time, so the environment is fixed before any app import
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    if args.use_async:
+        os.environ["DATABASE_ASYNC"] = "true"
+    os.environ["RATE_LIMIT_BACKEND"] = "none"
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    from sqlalchemy.engine import make_url
+    from app.config import DATABASE_URL, DATABASE_ASYNC
+
+    dataset, build_seconds = prepare_dataset(args)
+    runner = run_inprocess if args.server == "inprocess" else run_uvicorn
+    run = asyncio.run(runner(dataset, args))
+
+    url = make_url(DATABASE_URL)
+    label = args.label or "-".join([
+        url.get_backend_name(),
+        "async" if DATABASE_ASYNC else "sync",
+        args.server,
+        datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ"),
+    ])
+    result = {
+        "label": label,
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "git_commit": _git_commit(),
+        "config": {
+            "server": args.server,
+            "workers": args.workers if args.server == "uvicorn" else None,
+            "database": url.get_backend_name(),
+            "database_url": url.render_as_string(hide_password=True),
+            "async": DATABASE_ASYNC,
+            "mix": args.mix,
+            "requests": None if args.duration else args.requests,
+            "duration": args.duration,
+            "warmup": args.warmup,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "python": platform.python_version(),
+        },
+        "dataset": {**dataset.describe(), "reused": args.reuse, "build_seconds": round(build_seconds, 3)},
+        **run,
+    }
+
+    print(f"--- {label} ---")
+    print(f"{'operation':>10} {'count':>7} {'errors':>6} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, stats in [*result["operations"].items(), ("all", result["summary"])]:
+        print(
+            f"{name:>10} {stats['count']:>7} {stats['errors']:>6} {stats['throughput_rps']:>9} "
+            f"{stats['p50_ms']:>9} {stats['p95_ms']:>9} {stats['p99_ms']:>9}"
+        )
+
+    output = args.output or RESULTS_DIR / f"{label}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2))
+    print(f"results written to {output}")
+
+    if args.baseline:
+        compare(json.loads(args.baseline.read_text()), result)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark: JSON rendering and compression of GET /notes pages.
+
+    python -m benchmarks.responses [--sizes 100 1000] [--repeat 20]
+
+For each page size, compares the stdlib JSONResponse with ORJSONResponse
+(response model validation/serialization included, as FastAPI runs it) and
+reports bytes on the wire and compression time per available encoding.
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+from app.core.compression import COMPRESSORS, compress
+from app.utils.bulk_seed import WORDS
+from app.schemas.note import Note
+
+def make_notes(count: int, seed: int = 42) -> List[dict]:
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    notes = []
+    for note_id in range(1, count + 1):
+        created_at = start + timedelta(minutes=rng.randint(0, 500000))
+        notes.append({
+            "id": note_id,
+            "tenant_id": 1,
+            "user_id": rng.randint(1, 20),
+            "title": " ".join(rng.choices(WORDS, k=rng.randint(2, 6))).capitalize(),
+            "content": " ".join(rng.choices(WORDS, k=rng.randint(20, 200))),
+            "created_at": created_at,
+            "updated_at": created_at + timedelta(minutes=rng.randint(0, 10000)),
+        })
+    return notes
+
+def _per_call_ms(fn, repeat: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return 1000 * (time.perf_counter() - start) / repeat
+
+def run(sizes: List[int], repeat: int) -> List[dict]:
+    adapter = TypeAdapter(List[Note])
+    results = []
+    for size in sizes:
+        notes = make_notes(size)
+
+        def serialize():
+            return adapter.dump_python(adapter.validate_python(notes), mode="json")
+
+        content = serialize()
+        body = ORJSONResponse(content).body
+        result = {
+            "notes": size,
+            "serialize_ms": round(_per_call_ms(serialize, repeat), 3),
+            "json_render_ms": round(_per_call_ms(lambda: JSONResponse(content).body, repeat), 3),
+            "orjson_render_ms": round(_per_call_ms(lambda: ORJSONResponse(content).body, repeat), 3),
+            "identity_bytes": len(body),
+        }
+        for encoding in COMPRESSORS:
+            result[f"{encoding}_bytes"] = len(compress(body, encoding))
+            result[f"{encoding}_ms"] = round(_per_call_ms(lambda: compress(body, encoding), repeat), 3)
+        results.append(result)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    for result in run(args.sizes, args.repeat):
+        print(f"--- {result.pop('notes')} notes ---")
+        for key, value in result.items():
+            print(f"{key:>18}: {value}")
+
+if __name__ == "__main__":
+    main()
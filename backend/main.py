@@ -1,9 +1,19 @@
-from fastapi import FastAPI
+# Stdlib-only; imported first so the cold-start report covers every import below
+from app.core.startup import startup_report
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import engine, create_tables
-from app.api.endpoints import health, auth, notes, tenants, users
-from app.utils.seed_data import seed_initial_data
-import os
+startup_report.mark("import_framework")
+from app.core.log import configure_logging, get_logger, shutdown_logging
+from app.database import shards, read_replicas, create_tables, dispose_async_engines
+from app.api.endpoints import health, auth, notes, tenants, users, metrics
+from app.core.metrics import RequestMetricsMiddleware, instrument_engine
+from app.core.compression import CompressionMiddleware
+from app.core.rate_limit import enforce_rate_limit
+from app.config import COMPRESSION_ENCODINGS, COMPRESSION_MIN_SIZE, DB_CREATE_ON_STARTUP, SEED_ON_STARTUP
+startup_report.mark("import_app")
+
+configure_logging()
+logger = get_logger(__name__)
 
 app = FastAPI(title="SaaS Notes API", version="1.0.0")
 
@@ -14,21 +24,54 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Link", "ETag", "Last-Modified", "Retry-After"],
+)
+
+# Negotiated zstd/br/gzip for bodies above the size threshold
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=COMPRESSION_MIN_SIZE,
+    encodings=COMPRESSION_ENCODINGS
 )
 
-# Include routers
+# Per-route latency, status and DB-time metrics, served at /metrics
+app.add_middleware(RequestMetricsMiddleware)
+for shard in shards.values():
+    instrument_engine(shard.engine)
+    if shard.async_engine is not None:
+        instrument_engine(shard.async_engine.sync_engine)
+for replica in read_replicas.engines:
+    instrument_engine(replica)
+
+# Include routers; API routes are rate limited per IP, user and tenant
+rate_limited = [Depends(enforce_rate_limit)]
 app.include_router(health.router)
-app.include_router(auth.router, prefix="/auth")
-app.include_router(notes.router)
-app.include_router(tenants.router)
-app.include_router(users.router)
+app.include_router(auth.router, prefix="/auth", dependencies=rate_limited)
+app.include_router(notes.router, dependencies=rate_limited)
+app.include_router(tenants.router, dependencies=rate_limited)
+app.include_router(users.router, dependencies=rate_limited)
+app.include_router(metrics.router)
+startup_report.mark("build_app")
 
 @app.on_event("startup")
 async def startup_event():
-    # Create tables
-    create_tables()
-    # Seed initial data
-    seed_initial_data()
+    # Server setup between importing this module and the startup event
+    startup_report.mark("server")
+    # In production the schema is managed with `alembic upgrade head`, run out of band
+    if DB_CREATE_ON_STARTUP:
+        create_tables()
+    startup_report.mark("create_tables")
+    if SEED_ON_STARTUP:
+        # Imported here so production boots never load the seeding code
+        from app.utils.seed_data import seed_initial_data
+        seed_initial_data()
+    startup_report.mark("seed")
+    logger.info("startup complete", extra=startup_report.ready())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await dispose_async_engines()
+    shutdown_logging()
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,52 @@
+from logging.config import fileConfig
+from sqlalchemy import create_engine, pool
+from alembic import context
+from app.config import DATABASE_URL, DATABASE_SHARDS
+from app.database import Base, DEFAULT_SHARD
+# Import models to register them on Base.metadata for autogenerate
+from app.models import tenant, user, note, tenant_shard
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+# Every shard has the same schema: alembic -x shard=<name> upgrade head
+shard = context.get_x_argument(as_dictionary=True).get("shard", DEFAULT_SHARD)
+database_url = DATABASE_URL if shard == DEFAULT_SHARD else DATABASE_SHARDS[shard]
+
+def include_object(obj, name, type_, reflected, compare_to) -> bool:
+    # notes_fts and its FTS5 shadow tables are managed outside the models
+    return not (type_ == "table" and name.startswith("notes_fts"))
+
+def run_migrations_offline() -> None:
+    """Emit the migration SQL for the shard without connecting (alembic upgrade --sql)"""
+    context.configure(
+        url=database_url,
+        target_metadata=target_metadata,
+        include_object=include_object,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online() -> None:
+    connectable = create_engine(database_url, poolclass=pool.NullPool)
+    with connectable.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
+            # SQLite cannot ALTER most constraints in place
+            render_as_batch=connection.dialect.name == "sqlite",
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
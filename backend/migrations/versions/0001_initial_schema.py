@@ -0,0 +1,158 @@
+"""initial schema
+
+The schema create_tables builds: tenants, users and notes with their
+indexes, plus the full-text search index (a GIN index on PostgreSQL, the
+notes_fts FTS5 table on SQLite). Databases create_tables already built
+are adopted: only missing tables, columns and indexes are added.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 15:22:13.279806
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+class _Existing:
+    """
+    What a database built by the app's create_tables (at any earlier version)
+    already has, so upgrading it only adds what is missing. Emitting SQL
+    offline (--sql) assumes an empty database.
+    """
+
+    def __init__(self) -> None:
+        self.inspector = None if context.is_offline_mode() else sa.inspect(op.get_bind())
+
+    def table(self, table: str) -> bool:
+        return self.inspector is not None and self.inspector.has_table(table)
+
+    def column(self, table: str, column: str) -> bool:
+        return self.table(table) and column in {c['name'] for c in self.inspector.get_columns(table)}
+
+    def index(self, table: str, name: str) -> bool:
+        return self.table(table) and name in {i['name'] for i in self.inspector.get_indexes(table)}
+
+
+def _create_index(existing: _Existing, name: str, table: str, columns: list, unique: bool = False) -> None:
+    if not existing.index(table, name):
+        op.create_index(name, table, columns, unique=unique)
+
+
+def _add_column(existing: _Existing, table: str, column: sa.Column) -> bool:
+    if existing.column(table, column.name):
+        return False
+    op.add_column(table, column)
+    return True
+
+
+def upgrade() -> None:
+    existing = _Existing()
+
+    if not existing.table('tenants'):
+        op.create_table('tenants',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('slug', sa.String(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('subscription_plan', sa.Enum('FREE', 'PRO', name='subscriptionplan'), nullable=False),
+        sa.Column('note_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('notes_version', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+    else:
+        if _add_column(existing, 'tenants', sa.Column('note_count', sa.Integer(), server_default='0', nullable=False)):
+            op.execute(
+                'UPDATE tenants SET note_count = '
+                '(SELECT count(*) FROM notes WHERE notes.tenant_id = tenants.id)'
+            )
+        _add_column(existing, 'tenants', sa.Column('notes_version', sa.Integer(), server_default='0', nullable=False))
+    _create_index(existing, 'ix_tenants_id', 'tenants', ['id'])
+    _create_index(existing, 'ix_tenants_slug', 'tenants', ['slug'], unique=True)
+
+    if not existing.table('users'):
+        op.create_table('users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('tenant_id', sa.Integer(), nullable=False),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('password_hash', sa.String(), nullable=False),
+        sa.Column('role', sa.Enum('ADMIN', 'MEMBER', name='userrole'), nullable=False),
+        sa.Column('token_version', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+    else:
+        _add_column(existing, 'users', sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+    _create_index(existing, 'ix_users_email_tenant_id', 'users', ['email', 'tenant_id'])
+    _create_index(existing, 'ix_users_id', 'users', ['id'])
+    if existing.index('users', 'ix_users_email'):
+        # Superseded by ix_users_email_tenant_id, which starts with email
+        op.drop_index('ix_users_email', table_name='users')
+
+    if not existing.table('notes'):
+        op.create_table('notes',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('tenant_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('content', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+    _create_index(existing, 'ix_notes_id', 'notes', ['id'])
+    _create_index(existing, 'ix_notes_tenant_id_id', 'notes', ['tenant_id', 'id'])
+
+    # Search index as of app.crud.search; spelled out so later changes there
+    # cannot alter what this revision does
+    dialect = op.get_context().dialect.name
+    if dialect == 'postgresql':
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS ix_notes_search ON notes USING GIN "
+            "(to_tsvector('english', coalesce(title, '') || ' ' || coalesce(content, '')))"
+        )
+    elif dialect == 'sqlite' and not existing.table('notes_fts'):
+        op.execute(
+            "CREATE VIRTUAL TABLE notes_fts USING fts5("
+            "title, content, tenant_key, tokenize = 'porter unicode61')"
+        )
+        # Notes written before the index existed
+        op.execute(
+            "INSERT INTO notes_fts (rowid, title, content, tenant_key) "
+            "SELECT id, title, coalesce(content, ''), 't' || tenant_id FROM notes"
+        )
+
+
+def downgrade() -> None:
+    dialect = op.get_context().dialect.name
+    if dialect == 'sqlite':
+        op.execute('DROP TABLE IF EXISTS notes_fts')
+    elif dialect == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_notes_search')
+
+    op.drop_index('ix_notes_tenant_id_id', table_name='notes')
+    op.drop_index('ix_notes_id', table_name='notes')
+    op.drop_table('notes')
+    op.drop_index('ix_users_id', table_name='users')
+    op.drop_index('ix_users_email_tenant_id', table_name='users')
+    op.drop_table('users')
+    op.drop_index('ix_tenants_slug', table_name='tenants')
+    op.drop_index('ix_tenants_id', table_name='tenants')
+    op.drop_table('tenants')
+    if dialect == 'postgresql':
+        op.execute('DROP TYPE IF EXISTS userrole')
+        op.execute('DROP TYPE IF EXISTS subscriptionplan')
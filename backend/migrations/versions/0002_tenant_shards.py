@@ -0,0 +1,41 @@
+"""tenant shard directory
+
+Adds tenant_shards, the tenant -> shard map read from the default database.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 18:04:51.530912
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # create_tables builds this table too; adopt it if it is already there
+    # (emitting SQL offline assumes it is not)
+    if not context.is_offline_mode() and sa.inspect(op.get_bind()).has_table('tenant_shards'):
+        return
+    op.create_table('tenant_shards',
+    sa.Column('tenant_id', sa.Integer(), nullable=False),
+    sa.Column('slug', sa.String(), nullable=False),
+    sa.Column('shard', sa.String(), nullable=False),
+    sa.Column('state', sa.String(), server_default='active', nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.PrimaryKeyConstraint('tenant_id')
+    )
+    op.create_index('ix_tenant_shards_slug', 'tenant_shards', ['slug'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tenant_shards_slug', table_name='tenant_shards')
+    op.drop_table('tenant_shards')
@@ -0,0 +1,28 @@
+"""
+Every test runs against throwaway SQLite databases (a default shard and an
+"east" shard) in a temporary directory. The settings are applied here,
+before app.config is first imported, so a developer's .env never points the
+suite at a real database. DATABASE_ASYNC is left to the caller:
+
+    DATABASE_ASYNC=true python -m unittest discover -s tests -t .
+"""
+import atexit
+import json
+import os
+import shutil
+import tempfile
+
+_data_dir = tempfile.mkdtemp(prefix="saas-notes-tests-")
+atexit.register(shutil.rmtree, _data_dir, ignore_errors=True)
+
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{_data_dir}/default.db",
+    "DATABASE_SHARDS": json.dumps({"east": f"sqlite:///{_data_dir}/east.db"}),
+    "DATABASE_REPLICA_URLS": "",
+    "SHARD_MAP_TTL_SECONDS": "0.05",
+    "BCRYPT_ROUNDS": "4",
+    "NOTE_CACHE_BACKEND": "memory",
+    "RATE_LIMIT_BACKEND": "none",
+    "LOG_LEVEL": "WARNING",
+    "ENVIRONMENT": "development",
+})
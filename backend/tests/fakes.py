@@ -0,0 +1,46 @@
+"""Test doubles for external services"""
+import threading
+import time
+from typing import Dict, Optional
+
+class FakeRedis:
+    """
+    Minimal in-process stand-in for a redis-py client (get/set/delete/incr
+    with expiry), for testing the redis cache backend without a server.
+    """
+
+    def __init__(self):
+        self._data: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def _live(self, name: str) -> Optional[tuple]:
+        entry = self._data.get(name)
+        if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+            del self._data[name]
+            return None
+        return entry
+
+    def get(self, name: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._live(name)
+            return None if entry is None else entry[0]
+
+    def set(self, name: str, value, ex: Optional[int] = None, nx: bool = False) -> Optional[bool]:
+        with self._lock:
+            if nx and self._live(name) is not None:
+                return None
+            if not isinstance(value, bytes):
+                value = str(value).encode()
+            self._data[name] = (value, time.monotonic() + ex if ex else None)
+            return True
+
+    def delete(self, *names: str) -> int:
+        with self._lock:
+            return sum(self._data.pop(name, None) is not None for name in names)
+
+    def incr(self, name: str) -> int:
+        with self._lock:
+            entry = self._live(name)
+            value = int(entry[0]) + 1 if entry is not None else 1
+            self._data[name] = (str(value).encode(), entry[1] if entry is not None else None)
+            return value
@@ -0,0 +1,99 @@
+"""Shared fixtures: a fresh, seeded database per test and an in-process client"""
+import asyncio
+import unittest
+from contextlib import contextmanager
+from typing import Iterator, List
+from fastapi.testclient import TestClient
+from sqlalchemy import event, text
+import main
+from app.config import (
+    DATABASE_ASYNC,
+    DATABASE_READ_YOUR_WRITES_SECONDS,
+    NOTE_CACHE_MAX_SIZE,
+    NOTE_CACHE_TTL_SECONDS,
+    PRINCIPAL_CACHE_MAX_SIZE,
+)
+from app.core import cache
+from app.core.cache import MemoryBackend
+from app.core.note_cache import note_cache
+from app.database import Base, create_tables, default_shard, dispose_async_engines, run_db, shard_session, shards
+from app.utils.seed_data import seed_initial_data
+
+PASSWORD = "password"
+
+def reset_database() -> None:
+    """Recreate every shard's schema, seed the test accounts and empty every cache"""
+    for shard in shards.values():
+        Base.metadata.drop_all(bind=shard.engine)
+        with shard.engine.begin() as conn:
+            conn.execute(text("DROP TABLE IF EXISTS notes_fts"))
+    create_tables()
+    seed_initial_data()
+    for name in (
+        "principal_cache",
+        "token_version_cache",
+        "token_cache",
+        "tenant_plan_cache",
+        "tenant_shard_cache",
+    ):
+        getattr(cache, name).clear()
+    cache.recent_writers.backend = MemoryBackend(maxsize=PRINCIPAL_CACHE_MAX_SIZE, ttl=DATABASE_READ_YOUR_WRITES_SECONDS)
+    if note_cache.enabled:
+        note_cache.backend = MemoryBackend(maxsize=NOTE_CACHE_MAX_SIZE, ttl=NOTE_CACHE_TTL_SECONDS)
+
+def call_crud(fn, *args, **kwargs):
+    """Run a crud function (sync or async, per mode) on the default shard outside any request"""
+    async def call():
+        async with shard_session(default_shard) as db:
+            result = await run_db(fn, db, *args, **kwargs)
+        # Connections belong to this event loop, not the test client's
+        await dispose_async_engines()
+        return result
+
+    return asyncio.run(call())
+
+def request_engine(shard):
+    """The engine a request on shard runs its statements on, in either database mode"""
+    return shard.async_engine.sync_engine if DATABASE_ASYNC else shard.engine
+
+@contextmanager
+def recorded_statements(shard) -> Iterator[List[str]]:
+    """Collect the SQL that requests run on shard inside the block"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = request_engine(shard)
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+class ApiTestCase(unittest.TestCase):
+    """Runs each test against freshly seeded databases through the real app"""
+
+    def setUp(self):
+        reset_database()
+        self.client = TestClient(main.app)
+
+    @classmethod
+    def tearDownClass(cls):
+        # aiosqlite keeps a thread per pooled connection, which would keep the process alive
+        asyncio.run(dispose_async_engines())
+
+    def login(self, email: str, password: str = PASSWORD, **extra) -> dict:
+        """Authorization header for the account"""
+        response = self.client.post("/auth/login", json={"email": email, "password": password, **extra})
+        self.assertEqual(response.status_code, 200, response.text)
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    def upgrade(self, headers: dict, slug: str) -> None:
+        response = self.client.post(f"/tenants/{slug}/upgrade", headers=headers)
+        self.assertEqual(response.status_code, 200, response.text)
+
+    def create_note(self, headers: dict, title: str, content: str = "") -> dict:
+        response = self.client.post("/notes", json={"title": title, "content": content}, headers=headers)
+        self.assertEqual(response.status_code, 200, response.text)
+        return response.json()
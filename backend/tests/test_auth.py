@@ -0,0 +1,53 @@
+import unittest
+from sqlalchemy import inspect as sa_inspect, text
+from app.database import create_tables, default_shard
+from tests.support import ApiTestCase
+
+class LoginTests(ApiTestCase):
+    def test_wrong_password_and_unknown_email_are_rejected_alike(self):
+        wrong = self.client.post("/auth/login", json={"email": "user@acme.test", "password": "nope"})
+        unknown = self.client.post("/auth/login", json={"email": "nobody@acme.test", "password": "password"})
+
+        self.assertEqual(wrong.status_code, 401)
+        self.assertEqual(unknown.status_code, 401)
+        self.assertEqual(wrong.json(), unknown.json())
+
+    def test_tenant_slug_picks_the_account_of_a_shared_email(self):
+        for email, slug in (("admin@acme.test", "acme"), ("admin@globex.test", "globex")):
+            response = self.client.post(
+                "/users",
+                json={"email": "shared@example.test", "role": "member", "password": f"{slug}-pass", "tenant_id": 0},
+                headers=self.login(email),
+            )
+            self.assertEqual(response.status_code, 200, response.text)
+
+        me = self.client.get(
+            "/users/me", headers=self.login("shared@example.test", "globex-pass", tenant_slug="globex")
+        ).json()
+        self.assertEqual(me["email"], "shared@example.test")
+        self.assertEqual(
+            me["tenant_id"],
+            self.client.get("/users/me", headers=self.login("admin@globex.test")).json()["tenant_id"],
+        )
+        wrong_tenant = self.client.post(
+            "/auth/login",
+            json={"email": "shared@example.test", "password": "globex-pass", "tenant_slug": "acme"},
+        )
+        self.assertEqual(wrong_tenant.status_code, 401)
+
+class UserIndexUpgradeTests(ApiTestCase):
+    def test_create_tables_replaces_the_email_index_on_existing_databases(self):
+        # Databases created before login was rewritten only have ix_users_email
+        with default_shard.engine.begin() as conn:
+            conn.execute(text("DROP INDEX ix_users_email_tenant_id"))
+            conn.execute(text("CREATE INDEX ix_users_email ON users (email)"))
+
+        create_tables()
+
+        indexes = {index["name"]: index["column_names"] for index in sa_inspect(default_shard.engine).get_indexes("users")}
+        self.assertEqual(indexes["ix_users_email_tenant_id"], ["email", "tenant_id"])
+        self.assertNotIn("ix_users_email", indexes)
+        self.login("user@acme.test")
+
+if __name__ == "__main__":
+    unittest.main()
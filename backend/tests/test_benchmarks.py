@@ -0,0 +1,48 @@
+import argparse
+import asyncio
+import unittest
+import httpx
+import main
+from app.database import SessionLocal, dispose_async_engines
+from benchmarks.dataset import build_dataset
+from benchmarks.load import MIXES, drive, parse_mix, percentile
+from tests.support import ApiTestCase
+
+class LoadHelperTests(unittest.TestCase):
+    def test_mixes_are_presets_or_explicit_weights(self):
+        self.assertEqual(parse_mix("write"), MIXES["write"])
+        self.assertEqual(parse_mix("list=60, get=40"), {"list": 60, "get": 40})
+        for invalid in ("list=many", "search=10"):
+            with self.assertRaises(argparse.ArgumentTypeError):
+                parse_mix(invalid)
+
+    def test_percentiles_use_the_nearest_rank(self):
+        ordered = [float(value) for value in range(1, 101)]
+
+        self.assertEqual([percentile(ordered, fraction) for fraction in (0.5, 0.95, 0.99)], [50.0, 95.0, 99.0])
+        self.assertEqual(percentile([], 0.5), 0.0)
+
+class LoadRunTests(ApiTestCase):
+    def test_every_operation_of_the_mixed_run_succeeds(self):
+        with SessionLocal() as db:
+            dataset = build_dataset(db, tenants=2, users_per_tenant=2, notes_per_tenant=5, seed=1)
+        self.assertEqual(dataset.describe(), {"tenants": 2, "users": 4, "notes": 10})
+        args = argparse.Namespace(
+            concurrency=3, seed=1, mix=parse_mix("mixed"), warmup=5, requests=60, duration=None
+        )
+
+        async def run():
+            transport = httpx.ASGITransport(app=main.app)
+            try:
+                async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+                    return await drive(http, dataset, args)
+            finally:
+                await dispose_async_engines()
+
+        result = asyncio.run(run())
+
+        self.assertEqual(result["summary"]["count"], 60)
+        self.assertEqual(result["summary"]["errors"], 0, result["operations"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+from app.database import default_shard
+from tests.support import ApiTestCase, recorded_statements
+
+class BulkNoteTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = self.login("admin@acme.test")
+        self.upgrade(self.admin, "acme")
+
+    def create_bulk(self, *titles: str) -> list:
+        response = self.client.post(
+            "/notes/bulk", json={"notes": [{"title": title} for title in titles]}, headers=self.admin
+        )
+        self.assertEqual(response.status_code, 200, response.text)
+        return response.json()["results"]
+
+    def test_create_reports_each_note_in_request_order(self):
+        results = self.create_bulk("one", "two", "three")
+
+        self.assertEqual([result["index"] for result in results], [0, 1, 2])
+        self.assertEqual([result["status"] for result in results], ["created"] * 3)
+        self.assertEqual([result["note"]["title"] for result in results], ["one", "two", "three"])
+        self.assertEqual([result["id"] for result in results], [result["note"]["id"] for result in results])
+        listed = self.client.get("/notes", headers=self.admin).json()
+        self.assertEqual([note["title"] for note in listed], ["one", "two", "three"])
+
+    def test_create_inserts_with_a_single_statement(self):
+        with recorded_statements(default_shard) as statements:
+            self.create_bulk(*(f"note {i}" for i in range(20)))
+
+        self.assertEqual(len([sql for sql in statements if sql.startswith("INSERT INTO notes ")]), 1)
+
+    def test_update_marks_missing_and_foreign_ids_not_found(self):
+        mine = self.create_bulk("mine")[0]["id"]
+        globex = self.login("admin@globex.test")
+        theirs = self.create_note(globex, "theirs")["id"]
+
+        response = self.client.put(
+            "/notes/bulk",
+            json={"notes": [{"id": mine, "content": "edited"}, {"id": theirs, "title": "stolen"}, {"id": 999999}]},
+            headers=self.admin,
+        )
+
+        results = response.json()["results"]
+        self.assertEqual([result["status"] for result in results], ["updated", "not_found", "not_found"])
+        self.assertEqual(results[0]["note"]["title"], "mine")
+        self.assertEqual(results[0]["note"]["content"], "edited")
+        self.assertEqual(self.client.get(f"/notes/{theirs}", headers=globex).json()["title"], "theirs")
+
+    def test_delete_reports_which_ids_existed(self):
+        ids = [result["id"] for result in self.create_bulk("one", "two")]
+
+        response = self.client.post("/notes/bulk/delete", json={"ids": [ids[0], 999999]}, headers=self.admin)
+
+        self.assertEqual([result["status"] for result in response.json()["results"]], ["deleted", "not_found"])
+        self.assertEqual([note["id"] for note in self.client.get("/notes", headers=self.admin).json()], [ids[1]])
+
+    def test_empty_batches_are_rejected(self):
+        response = self.client.post("/notes/bulk", json={"notes": []}, headers=self.admin)
+
+        self.assertEqual(response.status_code, 422)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+from sqlalchemy import func, select
+from app.database import SessionLocal
+from app.models.note import Note
+from app.models.tenant import Tenant
+from app.models.user import User
+from app.utils.bulk_seed import bulk_seed, drop_seeded
+from tests.support import ApiTestCase
+
+class BulkSeedTests(ApiTestCase):
+    def seed(self, prefix: str, seed: int = 7) -> dict:
+        db = SessionLocal()
+        try:
+            # Small batches, so tenants and notes both span several of them
+            return bulk_seed(db, tenants=3, users_per_tenant=2, notes_per_tenant=7, seed=seed, prefix=prefix, batch_size=4)
+        finally:
+            db.close()
+
+    def notes_of(self, slug: str) -> list:
+        with SessionLocal() as db:
+            return db.execute(
+                select(Note.title, Note.content, Note.created_at)
+                .join(Tenant, Tenant.id == Note.tenant_id)
+                .where(Tenant.slug == slug)
+                .order_by(Note.id)
+            ).all()
+
+    def test_writes_every_row_with_matching_note_counts(self):
+        result = self.seed("load-")
+
+        self.assertEqual((result["tenants"], result["users"], result["notes"]), (3, 6, 21))
+        with SessionLocal() as db:
+            counts = db.execute(
+                select(Tenant.note_count, func.count(Note.id))
+                .join(Note, Note.tenant_id == Tenant.id)
+                .where(Tenant.slug.startswith("load-"))
+                .group_by(Tenant.id)
+            ).all()
+        self.assertEqual(counts, [(7, 7)] * 3)
+
+    def test_same_seed_gives_the_same_notes(self):
+        self.seed("first-")
+        self.seed("second-")
+        self.seed("other-", seed=8)
+
+        self.assertEqual(self.notes_of("first-000002"), self.notes_of("second-000002"))
+        self.assertNotEqual(self.notes_of("first-000002"), self.notes_of("other-000002"))
+
+    def test_seeded_accounts_can_log_in_and_search(self):
+        self.seed("load-")
+        admin = self.login("user1@load-000003.test")
+        title = self.notes_of("load-000003")[0].title
+
+        me = self.client.get("/users/me", headers=admin).json()
+        hits = self.client.get("/notes/search", params={"q": title.split()[0]}, headers=admin).json()
+
+        self.assertEqual(me["role"], "admin")
+        self.assertTrue(hits)
+
+    def test_drop_seeded_removes_only_the_prefix(self):
+        self.seed("load-")
+        self.seed("keep-")
+
+        with SessionLocal() as db:
+            drop_seeded(db, "load-")
+            remaining = db.scalars(select(Tenant.slug).where(Tenant.slug.contains("-0"))).all()
+            orphans = db.scalar(select(func.count(User.id)).where(User.email.like("%@load-%")))
+        self.assertEqual(sorted(remaining), ["keep-000001", "keep-000002", "keep-000003"])
+        self.assertEqual(orphans, 0)
+        self.assertEqual(len(self.notes_of("load-000001")), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+from tests.support import ApiTestCase
+
+GZIP = {"Accept-Encoding": "gzip"}
+IDENTITY = {"Accept-Encoding": "identity"}
+
+class CompressedValidatorTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = self.login("admin@acme.test")
+        self.note = self.create_note(self.admin, "long", "compressible " * 500)
+        self.url = f"/notes/{self.note['id']}"
+
+    def test_compressed_representation_has_its_own_etag(self):
+        plain = self.client.get(self.url, headers={**self.admin, **IDENTITY})
+        compressed = self.client.get(self.url, headers={**self.admin, **GZIP})
+
+        self.assertEqual(compressed.headers["Content-Encoding"], "gzip")
+        self.assertEqual(compressed.headers["ETag"], plain.headers["ETag"][:-1] + '-gzip"')
+        self.assertEqual(compressed.json(), plain.json())
+
+    def test_compressed_etag_revalidates(self):
+        etag = self.client.get(self.url, headers={**self.admin, **GZIP}).headers["ETag"]
+
+        response = self.client.get(self.url, headers={**self.admin, **GZIP, "If-None-Match": etag})
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers["ETag"], etag)
+
+    def test_compressed_etag_satisfies_if_match(self):
+        etag = self.client.get(self.url, headers={**self.admin, **GZIP}).headers["ETag"]
+
+        response = self.client.put(self.url, json={"title": "edited"}, headers={**self.admin, "If-Match": etag})
+
+        self.assertEqual(response.status_code, 200, response.text)
+
+    def test_uncompressed_bodies_keep_the_etag(self):
+        small = self.create_note(self.admin, "short")
+        response = self.client.get(f"/notes/{small['id']}", headers={**self.admin, **GZIP})
+
+        self.assertNotIn("Content-Encoding", response.headers)
+        self.assertFalse(response.headers["ETag"].endswith('-gzip"'))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from app.config import DATABASE_ASYNC
+from app.database import PoolMetrics, configure_engine, engine_options
+from tests.support import ApiTestCase
+
+class PoolMetricsTests(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.url = f"sqlite:///{os.path.join(directory.name, 'pool.db')}"
+        self.metrics = PoolMetrics()
+        settings = {"DB_POOL_SIZE": 1, "DB_MAX_OVERFLOW": 0, "DB_POOL_TIMEOUT": 0.05}
+        with mock.patch.multiple("app.database", **settings):
+            self.engine = create_engine(self.url, **engine_options(self.url, self.metrics))
+        configure_engine(self.engine, self.metrics)
+        self.addCleanup(self.engine.dispose)
+
+    def test_checkouts_waits_and_timeouts_are_counted(self):
+        with self.engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            with self.assertRaises(PoolTimeoutError):
+                self.engine.connect()
+            busy = self.metrics.snapshot(self.engine.pool)
+
+        idle = self.metrics.snapshot(self.engine.pool)
+        self.assertEqual((busy["checked_out"], busy["timeouts"], busy["size"]), (1, 1, 1))
+        self.assertGreaterEqual(busy["max_wait_seconds"], 0.05)
+        self.assertEqual((idle["checkouts"], idle["checkins"], idle["checked_out"]), (1, 1, 0))
+        self.assertEqual(idle["checked_in"], 1)
+
+    def test_file_databases_get_the_sqlite_pragmas(self):
+        with self.engine.connect() as conn:
+            self.assertEqual(conn.execute(text("PRAGMA journal_mode")).scalar(), "wal")
+            self.assertGreater(conn.execute(text("PRAGMA busy_timeout")).scalar(), 0)
+
+class PoolStatsEndpointTests(ApiTestCase):
+    def test_stats_cover_every_engine_in_use(self):
+        self.client.get("/health")
+
+        stats = self.client.get("/health/db-pool").json()
+
+        self.assertEqual(stats["sync"]["pool_class"], "TimedQueuePool")
+        self.assertEqual(stats["sync"]["checked_out"], 0)
+        self.assertEqual("async" in stats, DATABASE_ASYNC)
+
+if __name__ == "__main__":
+    unittest.main()
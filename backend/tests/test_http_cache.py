@@ -0,0 +1,68 @@
+import unittest
+from app.core.http_cache import if_match, if_none_match
+from app.core.note_cache import note_cache
+from app.database import default_shard
+from tests.support import ApiTestCase, recorded_statements
+
+class ConditionalNoteTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = self.login("admin@acme.test")
+        self.note = self.create_note(self.admin, "first", "body")
+        self.url = f"/notes/{self.note['id']}"
+        self.read = self.client.get(self.url, headers=self.admin)
+
+    def test_reads_carry_validators(self):
+        self.assertEqual(self.read.headers["Cache-Control"], "private, no-cache")
+        self.assertTrue(self.read.headers["ETag"].startswith('"'))
+        self.assertIn("GMT", self.read.headers["Last-Modified"])
+
+    def test_matching_etag_is_answered_without_loading_the_note(self):
+        note_cache.backend = type(note_cache.backend)(maxsize=100, ttl=60)
+
+        with recorded_statements(default_shard) as statements:
+            response = self.client.get(self.url, headers={**self.admin, "If-None-Match": self.read.headers["ETag"]})
+
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse([sql for sql in statements if "notes.content" in sql])
+
+    def test_if_modified_since(self):
+        since = self.read.headers["Last-Modified"]
+
+        unchanged = self.client.get(self.url, headers={**self.admin, "If-Modified-Since": since})
+        stale = self.client.get(self.url, headers={**self.admin, "If-Modified-Since": "Mon, 01 Jan 2001 00:00:00 GMT"})
+
+        self.assertEqual(unchanged.status_code, 304)
+        self.assertEqual(stale.status_code, 200)
+
+    def test_stale_if_match_refuses_the_write(self):
+        etag = self.read.headers["ETag"]
+        edited = self.client.put(self.url, json={"title": "second"}, headers={**self.admin, "If-Match": etag})
+        self.assertEqual(edited.status_code, 200)
+        self.assertNotEqual(edited.headers["ETag"], etag)
+
+        lost_update = self.client.put(self.url, json={"title": "third"}, headers={**self.admin, "If-Match": etag})
+        lost_delete = self.client.delete(self.url, headers={**self.admin, "If-Match": etag})
+
+        self.assertEqual(lost_update.status_code, 412)
+        self.assertEqual(lost_delete.status_code, 412)
+        self.assertEqual(self.client.get(self.url, headers=self.admin).json()["title"], "second")
+
+    def test_current_if_match_deletes(self):
+        response = self.client.delete(self.url, headers={**self.admin, "If-Match": self.read.headers["ETag"]})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(self.url, headers=self.admin).status_code, 404)
+
+class EtagComparisonTests(unittest.TestCase):
+    def test_if_none_match_compares_weakly(self):
+        self.assertTrue(if_none_match('"a", W/"b"', '"b"'))
+        self.assertTrue(if_none_match("*", '"b"'))
+        self.assertFalse(if_none_match('"a"', '"b"'))
+
+    def test_if_match_compares_strongly(self):
+        self.assertTrue(if_match('"a", "b"', '"b"'))
+        self.assertFalse(if_match('W/"b"', '"b"'))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import json
+import unittest
+from unittest import mock
+from app.config import FREE_PLAN_NOTE_LIMIT
+from tests.support import ApiTestCase
+
+class NoteImportTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = self.login("admin@acme.test")
+
+    def start_import(self, filename: str, body: str, content_type: str = "application/octet-stream") -> dict:
+        # The test client runs background tasks before it returns the response
+        response = self.client.post(
+            "/notes/import", files={"file": (filename, body.encode(), content_type)}, headers=self.admin
+        )
+        self.assertEqual(response.status_code, 202, response.text)
+        return response.json()
+
+    def job_status(self, job_id: str, headers: dict = None):
+        return self.client.get(f"/notes/import/{job_id}", headers=headers or self.admin)
+
+    def titles(self) -> list:
+        return [note["title"] for note in self.client.get("/notes", headers=self.admin).json()]
+
+    def test_ndjson_import_reports_invalid_lines_and_imports_the_rest(self):
+        self.upgrade(self.admin, "acme")
+        body = "\n".join([
+            json.dumps({"title": "one", "content": "first"}),
+            "not json",
+            "",
+            json.dumps({"content": "no title"}),
+            json.dumps({"title": "two"}),
+        ])
+
+        job = self.start_import("notes.ndjson", body)
+
+        self.assertEqual(job["format"], "ndjson")
+        result = self.job_status(job["id"]).json()
+        self.assertEqual(result["status"], "completed")
+        self.assertEqual((result["processed"], result["imported"], result["failed"]), (4, 2, 2))
+        self.assertEqual([error["line"] for error in result["errors"]], [2, 4])
+        self.assertTrue(result["errors"][1]["error"].startswith("title"))
+        self.assertEqual(self.titles(), ["one", "two"])
+
+    def test_csv_is_detected_from_the_file_name(self):
+        job = self.start_import("notes.csv", 'title,content\nfirst,"multi\nline"\nsecond,\n')
+
+        self.assertEqual(job["format"], "csv")
+        self.assertEqual(self.job_status(job["id"]).json()["imported"], 2)
+        notes = self.client.get("/notes", headers=self.admin).json()
+        self.assertEqual([(note["title"], note["content"]) for note in notes], [("first", "multi\nline"), ("second", None)])
+
+    def test_each_chunk_commits_on_its_own_until_the_plan_limit(self):
+        body = "\n".join(json.dumps({"title": f"note {i}"}) for i in range(FREE_PLAN_NOTE_LIMIT + 2))
+
+        with mock.patch("app.utils.imports.IMPORT_CHUNK_SIZE", FREE_PLAN_NOTE_LIMIT - 1):
+            job = self.start_import("notes.ndjson", body)
+
+        result = self.job_status(job["id"]).json()
+        self.assertEqual(result["status"], "failed")
+        self.assertIn("Note limit reached", result["detail"])
+        self.assertEqual(result["imported"], FREE_PLAN_NOTE_LIMIT - 1)
+        self.assertEqual(len(self.titles()), FREE_PLAN_NOTE_LIMIT - 1)
+
+    def test_jobs_are_private_to_their_tenant(self):
+        job = self.start_import("notes.ndjson", json.dumps({"title": "one"}))
+
+        self.assertEqual(self.job_status(job["id"], self.login("admin@globex.test")).status_code, 404)
+        self.assertEqual(self.job_status("missing").status_code, 404)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import contextlib
+import io
+import json
+import logging
+import logging.handlers
+import unittest
+from unittest import mock
+from app.core.log import JsonFormatter, SamplingFilter, TextFormatter
+from tests.support import ApiTestCase
+
+def _record(level: int = logging.INFO, **extra) -> logging.LogRecord:
+    return logging.makeLogRecord({
+        "name": "app.test",
+        "levelno": level,
+        "levelname": logging.getLevelName(level),
+        "msg": "login failed",
+        **extra,
+    })
+
+class FormatterTests(unittest.TestCase):
+    def test_json_lines_carry_the_extra_context(self):
+        line = json.loads(JsonFormatter().format(_record(reason="bad_password", tenant_id=1)))
+
+        self.assertEqual(
+            {key: line[key] for key in ("level", "logger", "msg", "reason", "tenant_id")},
+            {"level": "info", "logger": "app.test", "msg": "login failed", "reason": "bad_password", "tenant_id": 1},
+        )
+        self.assertIn("ts", line)
+
+    def test_text_lines_append_the_context_as_key_value_pairs(self):
+        line = TextFormatter().format(_record(reason="unknown_email"))
+
+        self.assertTrue(line.endswith("INFO app.test: login failed reason=unknown_email"))
+
+    def test_sampling_never_drops_warnings(self):
+        sampler = SamplingFilter(0.0)
+
+        self.assertFalse(sampler.filter(_record(logging.INFO)))
+        self.assertTrue(sampler.filter(_record(logging.WARNING)))
+        with mock.patch("app.core.log.random.random", return_value=0.4):
+            self.assertTrue(SamplingFilter(0.5).filter(_record(logging.DEBUG)))
+
+class AuthLoggingTests(ApiTestCase):
+    def test_the_app_logs_through_a_queue(self):
+        self.assertEqual(
+            [type(handler) for handler in logging.getLogger().handlers], [logging.handlers.QueueHandler]
+        )
+
+    def test_failed_logins_are_logged_with_a_reason_and_nothing_is_printed(self):
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout), self.assertLogs("app.api.endpoints.auth", logging.INFO) as logs:
+            self.client.post("/auth/login", json={"email": "user@acme.test", "password": "wrong"})
+            self.client.post("/auth/login", json={"email": "nobody@acme.test", "password": "wrong"})
+
+        self.assertEqual([record.reason for record in logs.records], ["bad_password", "unknown_email"])
+        self.assertEqual(stdout.getvalue(), "")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import re
+import unittest
+from app.core.metrics import Histogram
+from tests.support import ApiTestCase
+
+class HistogramTests(unittest.TestCase):
+    def test_buckets_are_cumulative_and_end_with_inf(self):
+        histogram = Histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value, ("/notes",))
+
+        lines = histogram.render().splitlines()
+
+        self.assertEqual(lines[1], "# TYPE latency_seconds histogram")
+        self.assertEqual(lines[2:], [
+            'latency_seconds_bucket{route="/notes",le="0.1"} 2',
+            'latency_seconds_bucket{route="/notes",le="1.0"} 3',
+            'latency_seconds_bucket{route="/notes",le="+Inf"} 4',
+            'latency_seconds_sum{route="/notes"} 3.65',
+            'latency_seconds_count{route="/notes"} 4',
+        ])
+
+class MetricsEndpointTests(ApiTestCase):
+    def sample(self, line_start: str) -> float:
+        """The value of the series whose line starts with line_start, 0 when absent"""
+        text = self.client.get("/metrics").text
+        match = re.search(rf"^{re.escape(line_start)} (\S+)$", text, re.MULTILINE)
+        return float(match.group(1)) if match else 0.0
+
+    def test_requests_are_labelled_by_route_template_and_status(self):
+        admin = self.login("admin@acme.test")
+        note_id = self.create_note(admin, "first")["id"]
+        found = 'http_requests_total{method="GET",route="/notes/{note_id}",status="200"}'
+        missing = 'http_requests_total{method="GET",route="/notes/{note_id}",status="404"}'
+        before = self.sample(found), self.sample(missing)
+
+        self.client.get(f"/notes/{note_id}", headers=admin)
+        self.client.get("/notes/999999", headers=admin)
+
+        self.assertEqual((self.sample(found), self.sample(missing)), (before[0] + 1, before[1] + 1))
+
+    def test_database_statements_are_attributed_to_the_request(self):
+        series = 'http_request_db_queries_total{method="POST",route="/auth/login"}'
+        before = self.sample(series)
+
+        self.login("admin@acme.test")
+
+        self.assertGreater(self.sample(series), before)
+        response = self.client.get("/metrics")
+        self.assertTrue(response.headers["content-type"].startswith("text/plain; version=0.0.4"))
+        self.assertIn('http_request_db_seconds_count{method="POST",route="/auth/login"}', response.text)
+
+if __name__ == "__main__":
+    unittest.main()
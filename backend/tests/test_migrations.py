@@ -0,0 +1,54 @@
+import io
+import unittest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect as sa_inspect, text
+from app.database import default_shard
+from tests.support import ApiTestCase
+
+def alembic_config() -> Config:
+    # No ini file: alembic.ini's logging setup would replace the app's
+    config = Config(stdout=io.StringIO())
+    config.set_main_option("script_location", "migrations")
+    return config
+
+class UpgradeExistingDatabaseTests(ApiTestCase):
+    def tearDown(self):
+        with default_shard.engine.begin() as conn:
+            conn.execute(text("DROP TABLE IF EXISTS alembic_version"))
+
+    def test_upgrade_adopts_a_database_built_by_create_tables(self):
+        headers = self.login("admin@acme.test")
+        self.create_note(headers, "kept", "searchable body")
+        # As an older create_tables left it: no quota or version columns, no
+        # composite indexes, the email-only users index, no search index
+        with default_shard.engine.begin() as conn:
+            conn.execute(text("ALTER TABLE tenants DROP COLUMN note_count"))
+            conn.execute(text("ALTER TABLE tenants DROP COLUMN notes_version"))
+            conn.execute(text("DROP INDEX ix_notes_tenant_id_id"))
+            conn.execute(text("DROP INDEX ix_users_email_tenant_id"))
+            conn.execute(text("CREATE INDEX ix_users_email ON users (email)"))
+            conn.execute(text("DROP TABLE notes_fts"))
+
+        command.upgrade(alembic_config(), "head")
+
+        inspector = sa_inspect(default_shard.engine)
+        self.assertIn("ix_notes_tenant_id_id", {index["name"] for index in inspector.get_indexes("notes")})
+        user_indexes = {index["name"] for index in inspector.get_indexes("users")}
+        self.assertIn("ix_users_email_tenant_id", user_indexes)
+        self.assertNotIn("ix_users_email", user_indexes)
+        with default_shard.engine.connect() as conn:
+            counts = dict(conn.execute(text("SELECT slug, note_count FROM tenants")).all())
+        self.assertEqual(counts, {"acme": 1, "globex": 0})
+        command.check(alembic_config())
+        found = self.client.get("/notes/search", params={"q": "searchable"}, headers=headers).json()
+        self.assertEqual([note["title"] for note in found], ["kept"])
+
+    def test_upgrade_is_a_no_op_on_a_current_database(self):
+        command.upgrade(alembic_config(), "head")
+
+        command.check(alembic_config())
+        self.assertEqual(self.client.get("/notes", headers=self.login("user@acme.test")).status_code, 200)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import asyncio
+import unittest
+from app.core.cache import RedisBackend
+from app.core.note_cache import NoteCache
+from tests.fakes import FakeRedis
+
+class CountingLoader:
+    """Loader returning value after an optional gate, counting its calls"""
+
+    def __init__(self, value, gate: asyncio.Event = None):
+        self.value = value
+        self.gate = gate
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        if self.gate is not None:
+            await self.gate.wait()
+        return self.value
+
+class BrokenRedis(FakeRedis):
+    def get(self, name):
+        raise ConnectionError("redis is down")
+
+class NoteCacheTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.cache = NoteCache(RedisBackend(FakeRedis()), ttl=60)
+
+    async def test_list_is_cached_until_the_tenant_is_invalidated(self):
+        loader = CountingLoader([{"id": 1}])
+        self.assertEqual(await self.cache.get_list(1, "limit=50", loader), [{"id": 1}])
+        self.assertEqual(await self.cache.get_list(1, "limit=50", loader), [{"id": 1}])
+        self.assertEqual(loader.calls, 1)
+
+        await self.cache.ainvalidate(1)
+        await self.cache.get_list(1, "limit=50", loader)
+        self.assertEqual(loader.calls, 2)
+
+    async def test_invalidation_is_scoped_to_the_tenant(self):
+        other = CountingLoader([{"id": 2}])
+        await self.cache.get_list(2, "limit=50", other)
+        self.cache.invalidate(1)
+        await self.cache.get_list(2, "limit=50", other)
+        self.assertEqual(other.calls, 1)
+
+    async def test_invalidate_drops_only_the_given_notes(self):
+        await self.cache.get_note(1, 10, CountingLoader({"id": 10}))
+        await self.cache.get_note(1, 11, CountingLoader({"id": 11}))
+        await self.cache.ainvalidate(1, [10])
+        self.assertIsNone(await self.cache.peek_note(1, 10))
+        self.assertEqual(await self.cache.peek_note(1, 11), {"id": 11})
+
+    async def test_note_read_during_a_write_is_not_cached(self):
+        async def load_while_writing():
+            self.cache.invalidate(1, [10])
+            return {"id": 10, "title": "possibly stale"}
+
+        await self.cache.get_note(1, 10, load_while_writing)
+        self.assertIsNone(await self.cache.peek_note(1, 10))
+
+    async def test_concurrent_misses_share_one_load(self):
+        gate = asyncio.Event()
+        loader = CountingLoader([{"id": 1}], gate)
+        waiters = [asyncio.create_task(self.cache.get_list(1, "limit=50", loader)) for _ in range(10)]
+        # Let every request reach the in-flight load before it completes
+        while self.cache.coalesced < 9:
+            await asyncio.sleep(0.01)
+        gate.set()
+        results = await asyncio.gather(*waiters)
+        self.assertEqual(loader.calls, 1)
+        self.assertEqual(results, [[{"id": 1}]] * 10)
+        self.assertEqual(self.cache.loads, 1)
+
+    async def test_failed_load_reaches_every_waiter_and_is_retried(self):
+        gate = asyncio.Event()
+
+        async def failing():
+            await gate.wait()
+            raise RuntimeError("database is down")
+
+        waiters = [asyncio.create_task(self.cache.get_list(1, "q", failing)) for _ in range(3)]
+        while self.cache.coalesced < 2:
+            await asyncio.sleep(0.01)
+        gate.set()
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+
+        loader = CountingLoader([])
+        self.assertEqual(await self.cache.get_list(1, "q", loader), [])
+        self.assertEqual(loader.calls, 1)
+
+    async def test_backend_outage_falls_back_to_the_loader(self):
+        cache = NoteCache(RedisBackend(BrokenRedis()), ttl=60)
+        loader = CountingLoader([{"id": 1}])
+        with self.assertLogs("app.core.note_cache", "WARNING"):
+            self.assertEqual(await cache.get_list(1, "limit=50", loader), [{"id": 1}])
+        self.assertEqual(loader.calls, 1)
+        self.assertGreater(cache.errors, 0)
+
+if __name__ == "__main__":
+    unittest.main()
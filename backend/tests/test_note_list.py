@@ -0,0 +1,89 @@
+import unittest
+from app.core.note_cache import note_cache
+from app.database import default_shard
+from tests.support import ApiTestCase, recorded_statements, reset_database
+
+class NoteListRevalidationTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = self.login("admin@acme.test")
+        self.note = self.create_note(self.admin, "first", "body")
+
+    def test_matching_etag_is_answered_without_loading_the_page(self):
+        etag = self.client.get("/notes", headers=self.admin).headers["ETag"]
+        # Start cold, so a page load would have to reach the database
+        note_cache.backend = type(note_cache.backend)(maxsize=100, ttl=60)
+        loads = note_cache.stats()["loads"]
+
+        with recorded_statements(default_shard) as statements:
+            response = self.client.get("/notes", headers={**self.admin, "If-None-Match": etag})
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers["ETag"], etag)
+        self.assertEqual(note_cache.stats()["loads"], loads)
+        self.assertFalse([sql for sql in statements if "FROM notes" in sql])
+
+    def test_a_note_write_changes_the_etag(self):
+        etag = self.client.get("/notes", headers=self.admin).headers["ETag"]
+        self.create_note(self.admin, "second")
+
+        response = self.client.get("/notes", headers={**self.admin, "If-None-Match": etag})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+        self.assertEqual([note["title"] for note in response.json()], ["first", "second"])
+
+    def test_cached_pages_are_invalidated_by_writes(self):
+        self.assertEqual(len(self.client.get("/notes", headers=self.admin).json()), 1)
+        self.client.put(f"/notes/{self.note['id']}", json={"title": "renamed"}, headers=self.admin)
+
+        notes = self.client.get("/notes", headers=self.admin).json()
+
+        self.assertEqual([note["title"] for note in notes], ["renamed"])
+
+class SparseNoteListTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = self.login("admin@acme.test")
+        self.create_note(self.admin, "first", "x" * 500)
+
+    def test_summary_view_selects_a_preview_instead_of_content(self):
+        with recorded_statements(default_shard) as statements:
+            notes = self.client.get("/notes", params={"view": "summary", "preview_length": 10}, headers=self.admin).json()
+
+        self.assertEqual(set(notes[0]), {"id", "title", "preview", "created_at", "updated_at"})
+        self.assertEqual(notes[0]["preview"], "x" * 10)
+        # Only the preview's leading characters are read, never whole bodies
+        selects = [sql for sql in statements if "FROM notes" in sql]
+        self.assertTrue(selects)
+        self.assertFalse([sql for sql in selects if "notes.content" in sql.replace("substr(notes.content", "")])
+
+    def test_fields_returns_only_those_plus_id(self):
+        notes = self.client.get("/notes", params={"fields": "title"}, headers=self.admin).json()
+
+        self.assertEqual(notes, [{"id": notes[0]["id"], "title": "first"}])
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get("/notes", params={"fields": "title,password_hash"}, headers=self.admin)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("password_hash", response.text)
+
+class NoteTimestampTests(ApiTestCase):
+    def test_every_endpoint_serializes_a_note_the_same_way(self):
+        admin = self.login("admin@acme.test")
+        created = self.create_note(admin, "first")
+
+        bulk = self.client.put("/notes/bulk", json={"notes": [{"id": created["id"], "title": "renamed"}]}, headers=admin)
+        updated = bulk.json()["results"][0]["note"]
+
+        fetched = self.client.get(f"/notes/{created['id']}", headers=admin).json()
+        listed = self.client.get("/notes", headers=admin).json()[0]
+        summary = self.client.get("/notes", params={"view": "summary"}, headers=admin).json()[0]
+        self.assertEqual(fetched, updated)
+        self.assertEqual(listed, updated)
+        self.assertEqual(summary["updated_at"], updated["updated_at"])
+        self.assertTrue(updated["updated_at"].endswith("Z"))
+
+if __name__ == "__main__":
+    unittest.main()
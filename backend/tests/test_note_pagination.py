@@ -0,0 +1,68 @@
+import unittest
+from sqlalchemy import inspect as sa_inspect, text
+from app.database import create_tables, default_shard
+from tests.support import ApiTestCase
+
+class NoteCursorTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = self.login("admin@acme.test")
+        self.upgrade(self.admin, "acme")
+        self.ids = [self.create_note(self.admin, f"note {i}")["id"] for i in range(5)]
+
+    def test_cursor_walks_every_note_once(self):
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 2} if cursor is None else {"limit": 2, "cursor": cursor}
+            response = self.client.get("/notes", params=params, headers=self.admin)
+            self.assertEqual(response.status_code, 200)
+            seen += [note["id"] for note in response.json()]
+            cursor = response.headers.get("X-Next-Cursor")
+            if cursor is None:
+                break
+            self.assertIn(f"cursor={cursor}", response.headers["Link"])
+
+        self.assertEqual(seen, self.ids)
+
+    def test_cursor_is_stable_across_deletes_before_it(self):
+        first = self.client.get("/notes", params={"limit": 2}, headers=self.admin)
+        self.client.delete(f"/notes/{self.ids[0]}", headers=self.admin)
+
+        response = self.client.get(
+            "/notes", params={"limit": 2, "cursor": first.headers["X-Next-Cursor"]}, headers=self.admin
+        )
+
+        self.assertEqual([note["id"] for note in response.json()], self.ids[2:4])
+
+    def test_malformed_cursor_is_rejected(self):
+        response = self.client.get("/notes", params={"cursor": "not-a-cursor"}, headers=self.admin)
+
+        self.assertEqual(response.status_code, 400)
+
+class NoteIndexUpgradeTests(ApiTestCase):
+    def test_create_tables_adds_the_keyset_index_to_existing_databases(self):
+        # Databases created before the index only have ix_notes_id
+        with default_shard.engine.begin() as conn:
+            conn.execute(text("DROP INDEX ix_notes_tenant_id_id"))
+
+        create_tables()
+
+        indexes = {index["name"]: index["column_names"] for index in sa_inspect(default_shard.engine).get_indexes("notes")}
+        self.assertEqual(indexes["ix_notes_tenant_id_id"], ["tenant_id", "id"])
+        # Without statistics SQLite may scan the rowid range of an empty table instead
+        with default_shard.engine.begin() as conn:
+            tenant_ids = conn.execute(text("SELECT id FROM tenants")).scalars().all()
+            user_id = conn.execute(text("SELECT id FROM users")).scalars().first()
+            conn.execute(
+                text("INSERT INTO notes (tenant_id, user_id, title) VALUES (:tenant_id, :user_id, 'note')"),
+                [{"tenant_id": tenant_id, "user_id": user_id} for tenant_id in tenant_ids for _ in range(100)],
+            )
+            conn.execute(text("ANALYZE notes"))
+        with default_shard.engine.connect() as conn:
+            plan = conn.execute(text(
+                "EXPLAIN QUERY PLAN SELECT id FROM notes WHERE tenant_id = 1 AND id > 0 ORDER BY id LIMIT 10"
+            )).all()
+        self.assertIn("ix_notes_tenant_id_id", " ".join(str(row) for row in plan))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import asyncio
+import threading
+import unittest
+from unittest import mock
+from passlib.hash import bcrypt
+from sqlalchemy import text
+from app.config import BCRYPT_ROUNDS
+from app.core.exceptions import PasswordHashingBusy
+from app.core.security import PasswordHashPool, password_hash_pool
+from app.database import default_shard
+from tests.support import PASSWORD, ApiTestCase
+
+def _rounds(password_hash: str) -> int:
+    return int(password_hash.split("$")[2])
+
+class PasswordHashPoolTests(unittest.TestCase):
+    def test_work_beyond_max_pending_is_rejected_until_a_slot_frees(self):
+        pool = PasswordHashPool(max_workers=1, max_pending=1)
+        release = threading.Event()
+
+        async def scenario():
+            first = asyncio.ensure_future(pool.run(release.wait, 5))
+            await asyncio.sleep(0)
+            with self.assertRaises(PasswordHashingBusy):
+                await pool.run(lambda: "second")
+            release.set()
+            self.assertTrue(await first)
+            return await pool.run(lambda: "third")
+
+        self.assertEqual(asyncio.run(scenario()), "third")
+        stats = pool.stats()
+        self.assertEqual((stats["pending"], stats["completed"], stats["rejected"]), (0, 2, 1))
+
+class LoginHashingTests(ApiTestCase):
+    def stored_hash(self, email: str) -> str:
+        with default_shard.engine.connect() as conn:
+            return conn.execute(text("SELECT password_hash FROM users WHERE email = :email"), {"email": email}).scalar_one()
+
+    def test_login_rehashes_a_password_stored_with_another_cost(self):
+        with default_shard.engine.begin() as conn:
+            conn.execute(
+                text("UPDATE users SET password_hash = :hash WHERE email = 'user@acme.test'"),
+                {"hash": bcrypt.using(rounds=BCRYPT_ROUNDS + 1).hash(PASSWORD)},
+            )
+
+        self.login("user@acme.test")
+
+        stored = self.stored_hash("user@acme.test")
+        self.assertEqual(_rounds(stored), BCRYPT_ROUNDS)
+        self.assertTrue(bcrypt.verify(PASSWORD, stored))
+        self.login("user@acme.test")
+
+    def test_a_saturated_pool_answers_503_with_retry_after(self):
+        with mock.patch.object(password_hash_pool, "max_pending", 0):
+            response = self.client.post("/auth/login", json={"email": "user@acme.test", "password": PASSWORD})
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers["Retry-After"], "1")
+
+if __name__ == "__main__":
+    unittest.main()
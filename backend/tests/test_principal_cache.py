@@ -0,0 +1,36 @@
+import unittest
+from app.core.cache import principal_cache
+from app.crud.backend import user as crud_user
+from app.database import default_shard
+from app.schemas.user import UserUpdate
+from tests.support import ApiTestCase, call_crud, recorded_statements
+
+class PrincipalCacheTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.member = self.login("user@acme.test")
+        self.me = self.client.get("/users/me", headers=self.member).json()
+
+    def test_warm_user_lookups_skip_the_users_table(self):
+        with recorded_statements(default_shard) as statements:
+            response = self.client.get("/users/me", headers=self.member)
+
+        self.assertEqual(response.json(), self.me)
+        self.assertFalse([sql for sql in statements if "FROM users" in sql])
+        self.assertGreaterEqual(principal_cache.stats()["hits"], 1)
+
+    def test_email_change_evicts_the_cached_user(self):
+        call_crud(crud_user.update_user, self.me["id"], self.me["tenant_id"], UserUpdate(email="renamed@acme.test"))
+
+        self.assertEqual(self.client.get("/users/me", headers=self.member).status_code, 401)
+        renamed = self.login("renamed@acme.test")
+        self.assertEqual(self.client.get("/users/me", headers=renamed).json()["email"], "renamed@acme.test")
+
+    def test_deleted_users_are_rejected_at_once(self):
+        call_crud(crud_user.delete_user, self.me["id"], self.me["tenant_id"])
+
+        self.assertEqual(self.client.get("/users/me", headers=self.member).status_code, 401)
+        self.assertIsNone(principal_cache.get((self.me["tenant_id"], self.me["id"])))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+from app.config import FREE_PLAN_NOTE_LIMIT
+from app.crud.backend import user as crud_user
+from tests.support import ApiTestCase, call_crud
+
+class FreePlanQuotaTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = self.login("admin@acme.test")
+        self.member = self.login("user@acme.test")
+
+    def fill_quota(self, headers: dict) -> list:
+        return [self.create_note(headers, f"note {i}", "quota body") for i in range(FREE_PLAN_NOTE_LIMIT)]
+
+    def test_free_tenant_is_capped_until_upgraded(self):
+        self.fill_quota(self.admin)
+
+        over = self.client.post("/notes", json={"title": "one too many"}, headers=self.member)
+        self.assertEqual(over.status_code, 403)
+
+        self.upgrade(self.admin, "acme")
+        self.create_note(self.member, "after upgrade")
+
+    def test_deleting_a_note_gives_back_its_quota(self):
+        notes = self.fill_quota(self.admin)
+        self.assertEqual(self.client.delete(f"/notes/{notes[0]['id']}", headers=self.admin).status_code, 200)
+
+        self.create_note(self.member, "fits again")
+
+    def test_bulk_create_over_the_limit_creates_nothing(self):
+        notes = [{"title": f"bulk {i}"} for i in range(FREE_PLAN_NOTE_LIMIT + 1)]
+
+        response = self.client.post("/notes/bulk", json={"notes": notes}, headers=self.admin)
+
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.client.get("/notes", headers=self.admin).json(), [])
+
+    def test_deleting_a_user_releases_their_notes(self):
+        self.fill_quota(self.member)
+        member_id = self.client.get("/users/me", headers=self.member).json()["id"]
+        tenant_id = self.client.get("/users/me", headers=self.admin).json()["tenant_id"]
+        etag = self.client.get("/notes", headers=self.admin).headers["ETag"]
+
+        self.assertTrue(call_crud(crud_user.delete_user, member_id, tenant_id))
+
+        listed = self.client.get("/notes", headers={**self.admin, "If-None-Match": etag})
+        self.assertEqual(listed.status_code, 200)
+        self.assertEqual(listed.json(), [])
+        found = self.client.get("/notes/search", params={"q": "quota"}, headers=self.admin)
+        self.assertEqual(found.json(), [])
+        self.fill_quota(self.admin)
+
+if __name__ == "__main__":
+    unittest.main()
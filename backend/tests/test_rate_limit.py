@@ -0,0 +1,101 @@
+import unittest
+from unittest import mock
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+import main
+from app.core import rate_limit
+from app.core.rate_limit import (
+    ANONYMOUS,
+    MemoryRateLimitBackend,
+    RateLimitPolicy,
+    RateLimiter,
+    client_address,
+)
+from tests.support import ApiTestCase
+
+PROXY = "10.0.0.2"
+
+def limiter() -> RateLimiter:
+    return RateLimiter(
+        MemoryRateLimitBackend(maxsize=1000),
+        RateLimitPolicy.from_config(
+            plans={
+                ANONYMOUS: {"ip": "2/minute"},
+                "free": {"user": "3/minute", "tenant": "100/minute"},
+                "pro": {"user": "100/minute", "tenant": "100/minute"},
+            },
+            routes={},
+        ),
+    )
+
+def behind(app, peer: str):
+    """The app as seen through a connection from peer"""
+    async def asgi(scope, receive, send):
+        if scope["type"] == "http":
+            scope = {**scope, "client": (peer, 40000)}
+        await app(scope, receive, send)
+    return asgi
+
+def request_from(peer: str, *forwarded: str) -> Request:
+    headers = [(b"x-forwarded-for", value.encode()) for value in forwarded]
+    return Request({"type": "http", "client": (peer, 40000), "headers": headers})
+
+class RateLimitTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        patchers = [
+            mock.patch.object(rate_limit, "rate_limiter", limiter()),
+            mock.patch.object(rate_limit, "TRUSTED_PROXIES", rate_limit.ip_networks(["10.0.0.0/24"])),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_user_bucket_is_sized_by_plan(self):
+        headers = self.login("user@acme.test")
+        statuses = [self.client.get("/notes", headers=headers).status_code for _ in range(4)]
+
+        self.assertEqual(statuses, [200, 200, 200, 429])
+        self.assertIn("Retry-After", self.client.get("/notes", headers=headers).headers)
+        self.upgrade(self.login("admin@acme.test"), "acme")
+        self.assertEqual(self.client.get("/notes", headers=headers).status_code, 200)
+
+    def test_anonymous_requests_behind_a_trusted_proxy_are_limited_per_client(self):
+        proxied = TestClient(behind(main.app, PROXY))
+
+        def attempt(client_ip: str) -> int:
+            return proxied.get("/notes", headers={"X-Forwarded-For": f"{client_ip}, {PROXY}"}).status_code
+
+        self.assertEqual([attempt("203.0.113.7") for _ in range(3)], [403, 403, 429])
+        self.assertEqual(attempt("203.0.113.8"), 403)
+
+    def test_plan_lookup_failure_lets_the_request_through(self):
+        headers = self.login("user@acme.test")
+        failing = mock.AsyncMock(side_effect=RuntimeError("database is down"))
+
+        with mock.patch.object(rate_limit, "_tenant_plan", failing), self.assertLogs("app.core.rate_limit", "WARNING"):
+            response = self.client.get("/notes", headers=headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(rate_limit.rate_limiter.errors, 1)
+
+class ClientAddressTests(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(rate_limit, "TRUSTED_PROXIES", rate_limit.ip_networks(["10.0.0.0/24"]))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_forwarded_for_is_ignored_from_untrusted_peers(self):
+        self.assertEqual(client_address(request_from("198.51.100.1", "203.0.113.7")), "198.51.100.1")
+
+    def test_rightmost_untrusted_hop_is_the_client(self):
+        request = request_from(PROXY, "1.1.1.1, 203.0.113.7", "10.0.0.3")
+
+        self.assertEqual(client_address(request), "203.0.113.7")
+
+    def test_only_trusted_hops_fall_back_to_the_leftmost(self):
+        self.assertEqual(client_address(request_from(PROXY, "10.0.0.3")), "10.0.0.3")
+        self.assertEqual(client_address(request_from(PROXY)), PROXY)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import asyncio
+import sqlite3
+import unittest
+from contextlib import closing
+from unittest import mock
+from sqlalchemy import create_engine
+from app import database
+from app.config import DATABASE_ASYNC
+from app.core.cache import RedisBackend, recent_writers
+from app.database import PoolMetrics, ReplicaSet, default_shard, to_async_url
+from tests.fakes import FakeRedis
+from tests.support import ApiTestCase
+
+class BrokenRedis(FakeRedis):
+    def get(self, name):
+        raise ConnectionError("redis is down")
+
+class ReadYourWritesTests(ApiTestCase):
+    """Reads go to a replica snapshot that never receives writes, so stale reads are easy to spot"""
+
+    def setUp(self):
+        super().setUp()
+        self.admin = self.login("admin@acme.test")
+        primary = default_shard.engine.url.database
+        self.replica_url = f"sqlite:///{primary[:-len('.db')]}-replica.db"
+        with closing(sqlite3.connect(primary)) as source:
+            with closing(sqlite3.connect(self.replica_url[len("sqlite:///"):])) as copy:
+                source.backup(copy)
+        if DATABASE_ASYNC:
+            self.replica_engine = database.create_async_engine(to_async_url(self.replica_url))
+            replica = self.replica_engine.sync_engine
+        else:
+            self.replica_engine = replica = create_engine(self.replica_url)
+        patcher = mock.patch.object(database, "read_replicas", ReplicaSet([replica], [PoolMetrics()], "round_robin"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        if DATABASE_ASYNC:
+            asyncio.run(self.replica_engine.dispose())
+        else:
+            self.replica_engine.dispose()
+
+    def titles(self) -> list:
+        return [note["title"] for note in self.client.get("/notes", headers=self.admin).json()]
+
+    def test_reads_after_a_write_see_it(self):
+        self.create_note(self.admin, "fresh")
+
+        self.assertEqual(self.titles(), ["fresh"])
+        self.assertEqual(database.read_replicas.primary_reads, 1)
+
+    def test_the_window_is_shared_between_workers_through_redis(self):
+        client = FakeRedis()
+        recent_writers.backend = RedisBackend(client)
+        self.create_note(self.admin, "fresh")
+
+        # Another worker: its own backend object over the same store
+        recent_writers.backend = RedisBackend(client)
+
+        self.assertEqual(self.titles(), ["fresh"])
+
+    def test_memory_window_is_per_worker(self):
+        self.create_note(self.admin, "fresh")
+        recent_writers.backend = type(recent_writers.backend)(maxsize=100, ttl=60)
+
+        self.assertEqual(self.titles(), [])
+
+    def test_unreachable_store_reads_from_the_primary(self):
+        self.create_note(self.admin, "fresh")
+        recent_writers.backend = RedisBackend(BrokenRedis())
+
+        with self.assertLogs("app.core.cache", "WARNING"):
+            self.assertEqual(self.titles(), ["fresh"])
+
+if __name__ == "__main__":
+    unittest.main()
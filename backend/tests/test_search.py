@@ -0,0 +1,62 @@
+import unittest
+from unittest import mock
+from app.crud import search
+from tests.support import ApiTestCase
+
+class NoteSearchTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = self.login("admin@acme.test")
+        self.upgrade(self.admin, "acme")
+
+    def search(self, q: str, headers: dict = None) -> list:
+        response = self.client.get("/notes/search", params={"q": q}, headers=headers or self.admin)
+        self.assertEqual(response.status_code, 200, response.text)
+        return response.json()
+
+    def test_title_matches_rank_first_and_terms_are_stemmed(self):
+        self.create_note(self.admin, "groceries", "remember the running shoes")
+        self.create_note(self.admin, "running plan", "five km")
+
+        hits = self.search("runs")
+
+        self.assertEqual([hit["title"] for hit in hits], ["running plan", "groceries"])
+        self.assertGreater(hits[0]["rank"], hits[1]["rank"])
+        self.assertIn("<b>running</b>", hits[1]["snippet"])
+
+    def test_other_tenants_notes_are_never_found(self):
+        self.create_note(self.admin, "acme secret", "launch codes")
+
+        self.assertEqual(self.search("launch", self.login("admin@globex.test")), [])
+
+    def test_index_follows_updates_and_deletes(self):
+        kept = self.create_note(self.admin, "draft", "alpha")
+        dropped = self.create_note(self.admin, "scratch", "alpha")
+        self.client.put(f"/notes/{kept['id']}", json={"content": "omega"}, headers=self.admin)
+        self.client.delete(f"/notes/{dropped['id']}", headers=self.admin)
+
+        self.assertEqual(self.search("alpha"), [])
+        self.assertEqual([hit["id"] for hit in self.search("omega")], [kept["id"]])
+
+    def test_bulk_writes_are_indexed(self):
+        created = self.client.post(
+            "/notes/bulk", json={"notes": [{"title": "bulk one"}, {"title": "bulk two"}]}, headers=self.admin
+        ).json()["results"]
+        self.client.post("/notes/bulk/delete", json={"ids": [created[0]["id"]]}, headers=self.admin)
+
+        self.assertEqual([hit["title"] for hit in self.search("bulk")], ["bulk two"])
+
+    def test_query_syntax_is_matched_literally(self):
+        self.create_note(self.admin, "syntax", "NOT a problem")
+
+        self.assertEqual(self.search('NOT OR "("'), [])
+        self.assertEqual(len(self.search("NOT")), 1)
+
+    def test_unsupported_database_answers_501(self):
+        with mock.patch.object(search, "_dialect", return_value="mysql"):
+            response = self.client.get("/notes/search", params={"q": "anything"}, headers=self.admin)
+
+        self.assertEqual(response.status_code, 501)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import time
+import unittest
+from sqlalchemy import text
+from app.config import SHARD_MAP_TTL_SECONDS
+from app.database import shards
+from app.utils.shards import _place, move_tenant
+from tests.support import ApiTestCase
+
+def expire_placements() -> None:
+    # Every process drops its cached placement within SHARD_MAP_TTL_SECONDS
+    time.sleep(SHARD_MAP_TTL_SECONDS * 2)
+
+class TenantMoveTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = self.login("admin@acme.test")
+        self.note = self.create_note(self.admin, "travels", "with its tenant")
+        self.tenant_id = self.client.get("/users/me", headers=self.admin).json()["tenant_id"]
+
+    def move(self, **options) -> dict:
+        return move_tenant("acme", "east", grace_seconds=0, **options)
+
+    def test_notes_and_tokens_follow_the_tenant(self):
+        result = self.move(drain_seconds=0)
+        expire_placements()
+
+        self.assertEqual(result["source_notes_dropped"], 1)
+        self.assertEqual([note["title"] for note in self.client.get("/notes", headers=self.admin).json()], ["travels"])
+        created = self.create_note(self.admin, "written on east")
+        with shards["east"].SessionLocal() as east:
+            count = east.execute(text("SELECT count(*) FROM notes WHERE id = :id"), {"id": created["id"]}).scalar()
+        self.assertEqual(count, 1)
+
+    def test_writes_pause_while_the_tenant_is_moving(self):
+        _place(self.tenant_id, "acme", "default", "moving")
+        expire_placements()
+
+        read = self.client.get("/notes", headers=self.admin)
+        write = self.client.post("/notes", json={"title": "paused"}, headers=self.admin)
+
+        self.assertEqual(read.status_code, 200)
+        self.assertEqual(write.status_code, 503)
+        self.assertIn("Retry-After", write.headers)
+
+    def test_login_during_the_drain_window_uses_the_target(self):
+        self.move(keep_source=True)
+        expire_placements()
+
+        # The source still holds a copy of every user until cleanup
+        headers = self.login("admin@acme.test")
+        self.assertEqual(self.client.post("/auth/revoke", headers=headers).status_code, 204)
+        headers = self.login("admin@acme.test")
+
+        self.assertEqual(self.client.get("/notes", headers=headers).status_code, 200)
+        self.assertEqual(self.client.get("/notes", headers=self.admin).status_code, 401)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+from app.core.security import create_access_token
+from app.crud.backend import user as crud_user
+from app.database import default_shard
+from app.models.user import UserRole
+from app.schemas.user import UserUpdate
+from tests.support import ApiTestCase, call_crud, recorded_statements
+
+class TokenClaimTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.member = self.login("user@acme.test")
+        self.me = self.client.get("/users/me", headers=self.member).json()
+
+    def test_warm_requests_authorize_without_user_queries(self):
+        self.client.get("/notes", headers=self.member)
+
+        with recorded_statements(default_shard) as statements:
+            response = self.client.get("/notes", headers=self.member)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([sql for sql in statements if "FROM users" in sql])
+
+    def test_role_comes_from_the_claims(self):
+        response = self.client.post("/tenants/acme/upgrade", headers=self.member)
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_revoke_invalidates_every_earlier_token(self):
+        other_session = self.login("user@acme.test")
+
+        self.assertEqual(self.client.post("/auth/revoke", headers=self.member).status_code, 204)
+
+        for headers in (self.member, other_session):
+            self.assertEqual(self.client.get("/notes", headers=headers).status_code, 401)
+            self.assertEqual(self.client.get("/users/me", headers=headers).status_code, 401)
+        self.assertEqual(self.client.get("/notes", headers=self.login("user@acme.test")).status_code, 200)
+
+    def test_role_change_invalidates_tokens_with_the_old_role(self):
+        call_crud(crud_user.update_user, self.me["id"], self.me["tenant_id"], UserUpdate(role=UserRole.ADMIN))
+
+        self.assertEqual(self.client.get("/notes", headers=self.member).status_code, 401)
+        promoted = self.login("user@acme.test")
+        self.assertEqual(self.client.post("/tenants/acme/upgrade", headers=promoted).status_code, 200)
+
+    def test_tokens_without_a_version_claim_still_work_until_revoked(self):
+        token = create_access_token(data={
+            "sub": self.me["email"],
+            "user_id": self.me["id"],
+            "tenant_id": self.me["tenant_id"],
+            "role": self.me["role"],
+        })
+        legacy = {"Authorization": f"Bearer {token}"}
+
+        self.assertEqual(self.client.get("/notes", headers=legacy).status_code, 200)
+        self.client.post("/auth/revoke", headers=self.member)
+        self.assertEqual(self.client.get("/notes", headers=legacy).status_code, 401)
+
+    def test_tampered_tokens_are_rejected(self):
+        token = self.member["Authorization"]
+        tampered = {"Authorization": token[:-2] + ("AA" if not token.endswith("AA") else "BB")}
+
+        self.assertEqual(self.client.get("/notes", headers=tampered).status_code, 401)
+
+if __name__ == "__main__":
+    unittest.main()
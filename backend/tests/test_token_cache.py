@@ -0,0 +1,44 @@
+import unittest
+from datetime import timedelta
+from unittest import mock
+from app.core import security
+from app.core.cache import token_cache
+from app.core.security import create_access_token, verify_token
+
+CLAIMS = {"sub": "user@acme.test", "user_id": 2, "tenant_id": 1, "role": "member", "ver": 0}
+
+class TokenCacheTests(unittest.TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.decode = mock.patch.object(security, "_decode_token", wraps=security._decode_token).start()
+        self.addCleanup(mock.patch.stopall)
+
+    def test_repeat_verifications_decode_once(self):
+        token = create_access_token(CLAIMS)
+
+        first, second = verify_token(token), verify_token(token)
+
+        self.assertEqual(first, second)
+        self.assertEqual(first.user_id, 2)
+        self.assertEqual(self.decode.call_count, 1)
+
+    def test_rejected_tokens_are_never_cached(self):
+        token = create_access_token(CLAIMS)
+        tampered = token[:-2] + ("AA" if token[-2:] != "AA" else "BB")
+
+        self.assertIsNone(verify_token(tampered))
+        self.assertIsNone(verify_token(tampered))
+
+        self.assertEqual(self.decode.call_count, 2)
+
+    def test_entries_expire_with_their_token(self):
+        with mock.patch.object(token_cache, "set", wraps=token_cache.set) as cache_set:
+            verify_token(create_access_token(CLAIMS, expires_delta=timedelta(seconds=30)))
+
+        self.assertLessEqual(cache_set.call_args.kwargs["ttl"], 30)
+
+    def test_expired_tokens_are_rejected(self):
+        self.assertIsNone(verify_token(create_access_token(CLAIMS, expires_delta=timedelta(seconds=-1))))
+
+if __name__ == "__main__":
+    unittest.main()